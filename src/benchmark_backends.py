@@ -0,0 +1,95 @@
+import argparse
+import json
+import logging
+import time
+import numpy as np
+from benchmark_length_bucketing import make_package_texts
+from pipeline.backends import BACKENDS, load_model
+from pipeline.batching import encode_in_token_batches, token_lengths
+from pipeline.config import EMBEDDING_MODEL_NAME, EMBEDDING_TOKEN_BUDGET
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+def neighbour_overlap(baseline: np.ndarray, candidate: np.ndarray, k: int = 10) -> float:
+    """
+    Uses every text as a query against all the others and returns the mean
+    fraction of its top-k neighbours that both embeddings agree on.
+    """
+    def top_k(embeddings):
+        scores = embeddings @ embeddings.T
+        np.fill_diagonal(scores, -np.inf)
+        return np.argpartition(-scores, k, axis=1)[:, :k]
+
+    k = min(k, len(baseline) - 2)
+    if k < 1:
+        return 1.0
+    overlaps = [len(set(a) & set(b)) / k for a, b in zip(top_k(baseline), top_k(candidate))]
+    return float(np.mean(overlaps))
+
+def benchmark_backend(model_name: str, backend: str, texts: list[str], token_budget: int, repeats: int) -> tuple[dict, np.ndarray]:
+    """
+    Loads a backend (converting it on first use) and measures its encoding
+    throughput on the given texts.
+    """
+    start = time.perf_counter()
+    model = load_model(model_name, backend)
+    load_seconds = time.perf_counter() - start
+
+    tokens = sum(token_lengths(model, texts))
+    encode_in_token_batches(model, texts[:8], token_budget)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        embeddings = encode_in_token_batches(model, texts, token_budget)
+        timings.append(time.perf_counter() - start)
+
+    seconds = min(timings)
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "encode_seconds": round(seconds, 3),
+        "texts_per_second": round(len(texts) / seconds, 2),
+        "tokens_per_second": round(tokens / seconds, 1),
+    }, _normalize(embeddings)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare embedding inference backends against fp32 PyTorch.")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--texts", type=int, default=500)
+    parser.add_argument("--token-budget", type=int, default=EMBEDDING_TOKEN_BUDGET or 16384)
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--output", default="benchmark_backends.json")
+    args = parser.parse_args()
+
+    texts = make_package_texts(args.texts)
+    backends = ["torch"] + [backend for backend in args.backends if backend != "torch"]
+
+    results = []
+    baseline = None
+    for backend in backends:
+        stats, embeddings = benchmark_backend(args.model, backend, texts, args.token_budget, args.repeats)
+        if baseline is None:
+            baseline = embeddings
+        cosines = np.sum(baseline * embeddings, axis=1)
+        stats.update({
+            "speedup": round(results[0]["encode_seconds"] / stats["encode_seconds"], 2) if results else 1.0,
+            "cosine_mean": round(float(cosines.mean()), 5),
+            "cosine_min": round(float(cosines.min()), 5),
+            "cosine_p1": round(float(np.percentile(cosines, 1)), 5),
+            "top10_overlap": round(neighbour_overlap(baseline, embeddings), 4),
+        })
+        results.append(stats)
+        logger.info(f"{backend}: {stats}")
+
+    with open(args.output, "w") as f:
+        json.dump({"model": args.model, "texts": args.texts, "results": results}, f, indent=2)
+
+    print(f"{'backend':<10} {'texts/s':>9} {'speedup':>8} {'cos mean':>9} {'cos min':>9} {'top10':>7} {'load s':>7}")
+    for stats in results:
+        print(f"{stats['backend']:<10} {stats['texts_per_second']:>9} {stats['speedup']:>8} "
+              f"{stats['cosine_mean']:>9} {stats['cosine_min']:>9} {stats['top10_overlap']:>7} {stats['load_seconds']:>7}")
@@ -0,0 +1,100 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from pipeline import extractor
+from pipeline.synthetic import DEFAULT_FANOUT, TEXT_PROFILES, populate_synthetic_catalog
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODES = ["orm", "core"]
+
+def extract_texts(session_factory, mode: str, batch_size: int) -> list[str]:
+    """
+    Walks the whole catalog with the given extraction mode and returns the
+    embedding text of every package, in id order.
+    """
+    db = session_factory()
+    try:
+        texts = []
+        for records in extractor.iter_record_batches(db, batch_size, mode=mode):
+            texts.extend(record.to_text() for record in records)
+        return texts
+    finally:
+        db.close()
+
+def measure(session_factory, mode: str, batch_size: int, repeats: int) -> dict:
+    """
+    Times a full extraction (best of ``repeats``) and, in a separate pass
+    under tracemalloc, measures the peak Python heap it needs.
+    """
+    cpu_times, wall_times = [], []
+    for _ in range(repeats):
+        gc.collect()
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        texts = extract_texts(session_factory, mode, batch_size)
+        cpu_times.append(time.process_time() - cpu_start)
+        wall_times.append(time.perf_counter() - wall_start)
+
+    gc.collect()
+    tracemalloc.start()
+    extract_texts(session_factory, mode, batch_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "packages": len(texts),
+        "cpu_seconds": round(min(cpu_times), 4),
+        "wall_seconds": round(min(wall_times), 4),
+        "packages_per_cpu_second": round(len(texts) / min(cpu_times), 1) if min(cpu_times) else 0.0,
+        "peak_heap_mb": round(peak / 2**20, 2),
+        "texts": texts,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ORM and Core extraction on a synthetic catalog.")
+    parser.add_argument("--packages", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--fanout-scale", type=float, default=1.0,
+                        help="Multiplier applied to the default child rows per package.")
+    parser.add_argument("--text-profile", choices=sorted(TEXT_PROFILES), default="realistic")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Optional JSON file for the results.")
+    args = parser.parse_args()
+
+    # Per-batch pipeline logging would dominate the timings.
+    logging.getLogger("pipeline").setLevel(logging.WARNING)
+
+    fanout = {table: mean * args.fanout_scale for table, mean in DEFAULT_FANOUT.items()}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'catalog.db')}")
+        populate_synthetic_catalog(engine, args.packages, fanout, args.text_profile, args.seed)
+        session_factory = sessionmaker(bind=engine)
+        results = {mode: measure(session_factory, mode, args.batch_size, args.repeats) for mode in MODES}
+        engine.dispose()
+
+    texts = {mode: results[mode].pop("texts") for mode in MODES}
+    identical = texts["orm"] == texts["core"]
+
+    print(f"{'mode':<6} {'CPU s':>8} {'wall s':>8} {'pkgs/CPU s':>12} {'peak heap MB':>13}")
+    for mode in MODES:
+        stats = results[mode]
+        print(f"{mode:<6} {stats['cpu_seconds']:>8} {stats['wall_seconds']:>8} "
+              f"{stats['packages_per_cpu_second']:>12} {stats['peak_heap_mb']:>13}")
+    print(f"CPU speedup: {results['orm']['cpu_seconds'] / results['core']['cpu_seconds']:.2f}x; "
+          f"texts byte-identical: {identical}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": results, "texts_identical": identical}, f, indent=2)
+
+    if not identical:
+        raise SystemExit("Core extraction produced different text than the ORM path.")
@@ -0,0 +1,81 @@
+import argparse
+import json
+import logging
+import os
+import random
+import time
+from pipeline.config import EMBEDDING_MODEL_NAME
+from pipeline.encode_pool import EncodePool
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WORDS = (
+    "tour package day trip hotel breakfast lunch dinner guide transfer airport "
+    "beach mountain city museum cruise safari desert island temple market"
+).split()
+
+def make_texts(count: int, seed: int = 0) -> list[str]:
+    """
+    Builds package-like texts of varying length.
+    """
+    rng = random.Random(seed)
+    return [
+        f"Package: {i}\nDetails: " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 300)))
+        for i in range(count)
+    ]
+
+def benchmark_encode_pool(model_name: str, max_workers: int, num_texts: int, repeats: int) -> list[dict]:
+    """
+    Measures encoding throughput with 1, 2, 4, ... up to max_workers processes,
+    splitting the available cores evenly between the workers.
+    """
+    texts = make_texts(num_texts)
+    worker_counts = []
+    workers = 1
+    while workers < max_workers:
+        worker_counts.append(workers)
+        workers *= 2
+    worker_counts.append(max_workers)
+
+    results = []
+    for workers in worker_counts:
+        with EncodePool(model_name, workers) as pool:
+            pool.encode(texts[:workers])  # warm-up
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                pool.encode(texts)
+                timings.append(time.perf_counter() - start)
+            best = min(timings)
+            results.append({
+                "workers": workers,
+                "threads_per_worker": pool.threads_per_worker,
+                "seconds": round(best, 3),
+                "texts_per_second": round(num_texts / best, 2),
+            })
+        logger.info(f"{workers} workers: {results[-1]['texts_per_second']} texts/s")
+
+    baseline = results[0]["texts_per_second"]
+    for result in results:
+        result["speedup"] = round(result["texts_per_second"] / baseline, 2)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark multi-process CPU encoding throughput.")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    results = benchmark_encode_pool(args.model, args.max_workers, args.texts, args.repeats)
+
+    print(f"{'workers':>8} {'threads':>8} {'texts/s':>10} {'speedup':>8}")
+    for result in results:
+        print(f"{result['workers']:>8} {result['threads_per_worker']:>8} {result['texts_per_second']:>10} {result['speedup']:>8}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"model": args.model, "texts": args.texts, "results": results}, f, indent=2)
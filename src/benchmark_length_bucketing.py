@@ -0,0 +1,114 @@
+import argparse
+import json
+import logging
+import random
+import time
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from pipeline.batching import encode_in_token_batches, padded_tokens, plan_token_batches, token_lengths
+from pipeline.config import EMBEDDING_MODEL_NAME, EMBEDDING_TOKEN_BUDGET
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WORDS = (
+    "tour package day trip hotel breakfast lunch dinner guide transfer airport "
+    "beach mountain city museum cruise safari desert island temple market"
+).split()
+
+def make_package_texts(count: int, seed: int = 0) -> list[str]:
+    """
+    Builds texts shaped like Package.to_text() output: most packages are
+    short, a long tail carries long tourDetail, tour plans and meal summaries.
+    """
+    rng = random.Random(seed)
+    texts = []
+    for i in range(count):
+        detail_words = int(min(2000, rng.lognormvariate(3.5, 1.0)))
+        parts = [
+            f"Package: Package {i}",
+            f"Duration: {rng.randint(1, 14)} days",
+            "Details: " + " ".join(rng.choice(WORDS) for _ in range(detail_words)),
+        ]
+        if rng.random() < 0.5:
+            plans = [f"Day {d}: " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 60))) for d in range(1, 4)]
+            parts.append(f"Tour Plans: {'; '.join(plans)}")
+        if rng.random() < 0.3:
+            parts.append("Meals: Breakfast: " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 30))))
+        texts.append("\n".join(parts))
+    return texts
+
+def fixed_size_batches(texts: list[str], batch_size: int) -> list[list[int]]:
+    """
+    The batch plan sentence-transformers uses on its own: sort by character
+    length and cut into fixed-size batches.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+def benchmark_length_bucketing(model_name: str, num_texts: int, batch_size: int, token_budget: int, repeats: int) -> dict:
+    """
+    Compares fixed-size batching in database order against length-bucketed
+    batches sized to a token budget.
+    """
+    model = SentenceTransformer(model_name, device="cpu")
+    texts = make_package_texts(num_texts)
+    lengths = token_lengths(model, texts)
+
+    fixed_plan = fixed_size_batches(texts, batch_size)
+    bucketed_plan = plan_token_batches(lengths, token_budget)
+
+    def time_it(function):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = function()
+            timings.append(time.perf_counter() - start)
+        return min(timings), result
+
+    encode_in_token_batches(model, texts[:8], token_budget)  # warm-up
+    fixed_seconds, fixed_embeddings = time_it(
+        lambda: model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+    )
+    bucketed_seconds, bucketed_embeddings = time_it(
+        lambda: encode_in_token_batches(model, texts, token_budget)
+    )
+
+    return {
+        "model": model_name,
+        "texts": num_texts,
+        "real_tokens": sum(lengths),
+        "fixed": {
+            "batch_size": batch_size,
+            "batches": len(fixed_plan),
+            "padded_tokens": padded_tokens(lengths, fixed_plan),
+            "seconds": round(fixed_seconds, 3),
+            "texts_per_second": round(num_texts / fixed_seconds, 2),
+        },
+        "bucketed": {
+            "token_budget": token_budget,
+            "batches": len(bucketed_plan),
+            "padded_tokens": padded_tokens(lengths, bucketed_plan),
+            "seconds": round(bucketed_seconds, 3),
+            "texts_per_second": round(num_texts / bucketed_seconds, 2),
+        },
+        "speedup": round(fixed_seconds / bucketed_seconds, 2),
+        "max_abs_difference": float(np.max(np.abs(np.asarray(fixed_embeddings) - bucketed_embeddings))),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark length-bucketed encoding against fixed-size batches.")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--texts", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--token-budget", type=int, default=EMBEDDING_TOKEN_BUDGET or 16384)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    results = benchmark_length_bucketing(args.model, args.texts, args.batch_size, args.token_budget, args.repeats)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,276 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from pipeline import extractor
+from pipeline.config import EMBEDDING_MODEL_NAME
+from pipeline.loader import Loader
+from pipeline.synthetic import DEFAULT_FANOUT, TEXT_PROFILES, populate_synthetic_catalog
+from pipeline.vector_batch import VectorBatch
+from pipeline.vector_store import LocalStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STAGES = ["extract", "to_text", "embed", "load"]
+
+CHILD_RELATIONSHIPS = [
+    "moods", "sub_moods", "destinations", "days", "months", "years", "types",
+    "tour_plans", "prices", "meals", "transportations", "transport_upgrades",
+]
+
+class HashingEmbedder:
+    """
+    A deterministic stand-in for the Transformer that derives a random unit
+    vector from each text's CRC, for measuring everything except the model.
+    """
+    def __init__(self, dimension: int = 1024):
+        self.dimension = dimension
+        self.model_name = f"hashing-{dimension}"
+
+    def encode_texts(self, texts: list[str]) -> np.ndarray:
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            vectors[i] = np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(self.dimension)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+def _current_rss_bytes() -> int:
+    """
+    Returns the current resident set size, or the peak so far where /proc
+    is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+class RssSampler:
+    """
+    Samples RSS in a background thread and attributes the peak to whichever
+    stage is currently running.
+    """
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.stage = None
+        self.peaks = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            time.sleep(self.interval)
+
+    def sample(self):
+        stage = self.stage
+        if stage is not None:
+            self.peaks[stage] = max(self.peaks.get(stage, 0), _current_rss_bytes())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+def _percentile(values: list[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            text=True, stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run_benchmark(
+    num_packages: int,
+    batch_size: int,
+    fanout: dict,
+    text_profile: str,
+    embedder,
+    workdir: str,
+    seed: int = 0,
+) -> dict:
+    """
+    Generates a synthetic catalog in SQLite, then runs extraction, to_text,
+    embedding and loading into a local vector store batch by batch, timing
+    every stage.
+
+    Returns:
+        A JSON-serializable report with rows/s, p50/p99 batch latency and
+        peak RSS for each stage.
+    """
+    database_path = os.path.join(workdir, "catalog.db")
+    engine = create_engine(f"sqlite:///{database_path}")
+    generate_start = time.perf_counter()
+    table_counts = populate_synthetic_catalog(engine, num_packages, fanout, text_profile, seed)
+    generate_seconds = time.perf_counter() - generate_start
+
+    db = sessionmaker(bind=engine)()
+    loader = Loader(index=LocalStore(os.path.join(workdir, "vectors")))
+
+    latencies = {stage: [] for stage in STAGES}
+    rows = {stage: 0 for stage in STAGES}
+    child_rows = 0
+    text_chars = 0
+
+    run_start = time.perf_counter()
+    with RssSampler() as sampler:
+        batches = extractor.iter_record_batches(db, batch_size)
+        while True:
+            sampler.stage = "extract"
+            start = time.perf_counter()
+            records = next(batches, None)
+            if records is None:
+                break
+            latencies["extract"].append(time.perf_counter() - start)
+            rows["extract"] += len(records)
+            child_rows += sum(len(getattr(record, name)) for record in records for name in CHILD_RELATIONSHIPS)
+            sampler.sample()
+
+            sampler.stage = "to_text"
+            start = time.perf_counter()
+            texts = [record.to_text() for record in records]
+            latencies["to_text"].append(time.perf_counter() - start)
+            rows["to_text"] += len(texts)
+            text_chars += sum(len(text) for text in texts)
+            sampler.sample()
+
+            sampler.stage = "embed"
+            start = time.perf_counter()
+            embeddings = embedder.encode_texts(texts)
+            latencies["embed"].append(time.perf_counter() - start)
+            rows["embed"] += len(texts)
+            sampler.sample()
+
+            sampler.stage = "load"
+            start = time.perf_counter()
+            report = loader.upsert_data(
+                VectorBatch([str(record.id) for record in records], embeddings, model_version=embedder.model_name)
+            )
+            latencies["load"].append(time.perf_counter() - start)
+            rows["load"] += len(report.succeeded_ids)
+            sampler.sample()
+        sampler.stage = None
+    total_seconds = time.perf_counter() - run_start
+
+    loader.close()
+    db.close()
+
+    stages = {}
+    for stage in STAGES:
+        seconds = sum(latencies[stage])
+        stages[stage] = {
+            "rows": rows[stage],
+            "seconds": round(seconds, 4),
+            "rows_per_second": round(rows[stage] / seconds, 2) if seconds else 0.0,
+            "batch_latency_p50_ms": round(_percentile(latencies[stage], 50) * 1000, 3),
+            "batch_latency_p99_ms": round(_percentile(latencies[stage], 99) * 1000, 3),
+            "peak_rss_mb": round(sampler.peaks.get(stage, 0) / 2**20, 1),
+        }
+    stages["extract"]["child_rows"] = child_rows
+    stages["to_text"]["average_chars"] = round(text_chars / rows["to_text"], 1) if rows["to_text"] else 0.0
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "packages": num_packages,
+            "batch_size": batch_size,
+            "fanout": fanout,
+            "text_profile": text_profile,
+            "embedder": embedder.model_name,
+            "seed": seed,
+        },
+        "generate_seconds": round(generate_seconds, 3),
+        "table_rows": table_counts,
+        "total_seconds": round(total_seconds, 3),
+        "end_to_end_rows_per_second": round(rows["load"] / total_seconds, 2) if total_seconds else 0.0,
+        "stages": stages,
+    }
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Returns a description of every stage whose throughput dropped by more
+    than ``tolerance`` (a fraction) relative to the baseline report.
+    """
+    regressions = []
+    for stage, current in results["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if not previous or not previous.get("rows_per_second"):
+            continue
+        change = current["rows_per_second"] / previous["rows_per_second"] - 1
+        if change < -tolerance:
+            regressions.append(
+                f"{stage}: {previous['rows_per_second']} -> {current['rows_per_second']} rows/s ({change:+.1%})"
+            )
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark on a synthetic catalog.")
+    parser.add_argument("--packages", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--fanout-scale", type=float, default=1.0,
+                        help="Multiplier applied to the default child rows per package.")
+    parser.add_argument("--text-profile", choices=sorted(TEXT_PROFILES), default="realistic")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME,
+                        help="Embedding model, or 'hashing' to skip the model and measure the rest of the pipeline.")
+    parser.add_argument("--dimension", type=int, default=1024, help="Vector dimension for the hashing embedder.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="Empty directory for the SQLite catalog and local store (default: a temp dir).")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="A previous results file to compare throughput against.")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Allowed fractional throughput drop before a stage counts as a regression.")
+    args = parser.parse_args()
+
+    # Per-batch pipeline logging would dominate the timings.
+    logging.getLogger("pipeline").setLevel(logging.WARNING)
+
+    if args.model == "hashing":
+        embedder = HashingEmbedder(args.dimension)
+    else:
+        from pipeline.transformer import Transformer
+        embedder = Transformer(args.model, use_cache=False)
+
+    fanout = {table: mean * args.fanout_scale for table, mean in DEFAULT_FANOUT.items()}
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run_benchmark(
+            args.packages, args.batch_size, fanout, args.text_profile, embedder, args.workdir or tmp, args.seed
+        )
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'stage':<10} {'rows/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'peak RSS MB':>12}")
+    for stage, stats in results["stages"].items():
+        print(f"{stage:<10} {stats['rows_per_second']:>12} {stats['batch_latency_p50_ms']:>10} "
+              f"{stats['batch_latency_p99_ms']:>10} {stats['peak_rss_mb']:>12}")
+    print(f"End to end: {results['end_to_end_rows_per_second']} rows/s; results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
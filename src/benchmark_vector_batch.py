@@ -0,0 +1,150 @@
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from pipeline.metadata import limit_metadata_size
+from pipeline.vector_batch import TRANSPORT_DTYPES, VectorBatch
+from pipeline.vector_store import LocalStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Vectors per upsert request in both paths.
+REQUEST_SIZE = 100
+
+def make_batch(size: int, dimension: int, seed: int = 0) -> tuple[np.ndarray, list[str], list[dict]]:
+    """
+    Builds a transform-stage batch: random normalized embeddings plus
+    package-like metadata.
+    """
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((size, dimension)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    ids = [str(i) for i in range(size)]
+    metadata = [
+        {"name": f"Package {i}", "destinations": ["Paris", "Rome"], "base_price": 1000.0 + i, "content_hash": "0" * 64}
+        for i in range(size)
+    ]
+    return embeddings, ids, metadata
+
+def list_path(embeddings: np.ndarray, ids: list[str], metadata: list[dict], model_name: str) -> int:
+    """
+    The previous path: one Python list per embedding in the Transformer, then
+    a second list of per-vector dicts in the Loader, all held until every
+    request is sent.
+    """
+    items = [
+        {"id": ids[i], "embedding": embeddings[i].tolist(), "model_version": model_name, "metadata": metadata[i]}
+        for i in range(len(ids))
+    ]
+    vectors = [
+        {"id": item["id"], "values": item["embedding"],
+         "metadata": limit_metadata_size({"model_version": item["model_version"], **item["metadata"]})}
+        for item in items
+    ]
+    sent = 0
+    for i in range(0, len(vectors), REQUEST_SIZE):
+        sent += len(vectors[i:i + REQUEST_SIZE])
+    return sent
+
+def batch_path(embeddings: np.ndarray, ids: list[str], metadata: list[dict], model_name: str) -> int:
+    """
+    The VectorBatch path: the matrix travels as is and each request's values
+    are converted to floats in one call when its payload is built, as
+    PineconeStore.upsert_batch() does, and released once it is sent.
+    """
+    batch = VectorBatch(ids, embeddings, metadata, model_name)
+    sent = 0
+    for i in range(0, len(batch), REQUEST_SIZE):
+        part = batch[i:i + REQUEST_SIZE]
+        sent += len(list(zip(part.ids, part.float32_values().tolist(), part.payload_metadata())))
+    return sent
+
+def measure(function, *args, repeats: int = 3) -> dict:
+    """
+    Reports the best wall time of ``function`` and the peak memory it
+    allocates, measured in a separate traced run.
+    """
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(*args)
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(min(seconds), 4), "peak_mb": round(peak / 1e6, 2)}
+
+def local_store_upsert(embeddings: np.ndarray, ids: list[str], metadata: list[dict], model_name: str) -> dict:
+    """
+    Times loading the batch into a LocalStore with per-vector dicts and with
+    upsert_batch(), which writes the matrix without building float lists.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="vector-batch-") as workdir:
+        store = LocalStore(os.path.join(workdir, "dicts"))
+        start = time.perf_counter()
+        for i in range(0, len(ids), REQUEST_SIZE):
+            store.upsert([
+                {"id": ids[j], "values": embeddings[j].tolist(), "metadata": {"model_version": model_name, **metadata[j]}}
+                for j in range(i, min(i + REQUEST_SIZE, len(ids)))
+            ])
+        results["dicts_seconds"] = round(time.perf_counter() - start, 4)
+        store.close()
+
+        store = LocalStore(os.path.join(workdir, "batch"))
+        batch = VectorBatch(ids, embeddings, metadata, model_name)
+        start = time.perf_counter()
+        for i in range(0, len(batch), REQUEST_SIZE):
+            store.upsert_batch(batch[i:i + REQUEST_SIZE])
+        results["vector_batch_seconds"] = round(time.perf_counter() - start, 4)
+        store.close()
+    return results
+
+def benchmark_vector_batch(size: int, dimension: int, repeats: int) -> dict:
+    """
+    Compares the memory and time of preparing one transform batch's upsert
+    requests, and the size and accuracy of each transport encoding.
+    """
+    embeddings, ids, metadata = make_batch(size, dimension)
+    model_name = "benchmark-model"
+
+    transport = {}
+    batch = VectorBatch(ids, embeddings, metadata, model_name)
+    for dtype in TRANSPORT_DTYPES:
+        encoded = batch.astype(dtype)
+        decoded = encoded.float32_values()
+        transport[dtype] = {
+            "value_bytes": int(encoded.values.nbytes + (encoded.scales.nbytes if encoded.scales is not None else 0)),
+            "max_abs_error": float(np.abs(decoded - embeddings).max()),
+            "min_cosine": float(np.min(np.sum(decoded * embeddings, axis=1) / np.linalg.norm(decoded, axis=1))),
+        }
+
+    return {
+        "vectors": size,
+        "dimension": dimension,
+        "list_path": measure(list_path, embeddings, ids, metadata, model_name, repeats=repeats),
+        "vector_batch_path": measure(batch_path, embeddings, ids, metadata, model_name, repeats=repeats),
+        "local_store": local_store_upsert(embeddings, ids, metadata, model_name),
+        "transport": transport,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare list-of-dicts vector batches with VectorBatch.")
+    parser.add_argument("--vectors", type=int, default=1000, help="Vectors per transform batch.")
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    results = benchmark_vector_batch(args.vectors, args.dimension, args.repeats)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -1,6 +1,5 @@
 from pipeline import extractor
 from pipeline.database import get_db_session
-from datetime import datetime, timedelta
 import logging
 
 # Set up logging
@@ -13,16 +12,16 @@ def check_records():
     db = next(db_session_gen)
     
     try:
-        # Get records from the last 24 hours (or since last run)
-        last_run_ts = datetime.utcnow() - timedelta(days=1)
-        records = extractor.get_records_to_update(db, last_run_ts, 10)
+        # The schema has no updated_at column, so preview the first packages by id
+        records = extractor.get_records_to_update(db, 10)
         
-        print(f'Found {len(records)} records to process since {last_run_ts}')
+        print(f'Found {len(records)} records to process')
         
         if records:
             print("\nFirst few records:")
             for i, record in enumerate(records[:3]):
-                text_preview = record.to_text()[:100] + "..." if len(record.to_text()) > 100 else record.to_text()
+                text = record.to_text()
+                text_preview = text[:100] + "..." if len(text) > 100 else text
                 print(f'Record {i+1}: ID: {record.id}, Text preview: {text_preview}')
         else:
             print("No records to process - might explain why the pipeline appears to be stuck")
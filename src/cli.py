@@ -0,0 +1,253 @@
+import argparse
+import json
+import logging
+import sys
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Every subcommand imports what it needs inside its handler: the model stack (torch,
+# sentence-transformers), the Pinecone client and the database engine are only loaded by the
+# subcommands that use them, so lightweight ones start quickly.
+
+def cmd_run(args):
+    import main
+
+    summary = main.run_pipeline(mode=args.mode, resume=not args.no_resume, export_dir=args.export)
+    return 0 if summary.get("status") == "completed" else 1
+
+def cmd_import(args):
+    from pipeline import chunking
+    from pipeline.bulk_export import import_parquet, record_import
+    from pipeline.config import CHUNK_OVERLAP_TOKENS, CHUNK_TOKENS, EMBEDDING_MODEL_NAME
+    from pipeline.manifest import EmbeddingManifest
+    from pipeline.vector_store import get_vector_store
+
+    store = get_vector_store()
+    manifest = EmbeddingManifest(model_name=chunking.manifest_key(EMBEDDING_MODEL_NAME, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS))
+    try:
+        if not args.record_only:
+            imported = import_parquet(args.directory, store, batch_size=args.batch_size)
+            print(f"Imported {imported} vectors from {args.directory}.")
+        recorded = record_import(args.directory, store, manifest)
+    finally:
+        manifest.close()
+        if hasattr(store, "close"):
+            store.close()
+    print(f"Recorded {recorded} packages in the manifest.")
+    return 0
+
+def cmd_count(args):
+    if args.list:
+        from count_records import count_all_records
+
+        count_all_records()
+        return 0
+
+    from sqlalchemy import func, select
+    from pipeline.database import get_db_session
+    from pipeline.models import Package
+
+    db = next(get_db_session(read_only=True))
+    try:
+        print(f"Total records in packages table: {db.scalar(select(func.count()).select_from(Package))}")
+    finally:
+        db.close()
+    return 0
+
+def cmd_check(args):
+    from check_records import check_records
+
+    check_records()
+    return 0
+
+def cmd_fetch(args):
+    from pipeline.config import QUERY_SERVICE_URL
+
+    filter = json.loads(args.filter) if args.filter else None
+    if QUERY_SERVICE_URL:
+        from pipeline.query_service import search_remote
+
+        results = search_remote(QUERY_SERVICE_URL, args.query, top_k=args.top_k, filter=filter)
+    else:
+        from pipeline.query_service import QueryService
+
+        service = QueryService(fanout_workers=1)
+        try:
+            results = service.search(args.query, top_k=args.top_k, filter=filter)
+        finally:
+            service.close()
+
+    for i, match in enumerate(results["matches"]):
+        print(f"Result {i+1}: ID: {match['id']}  Score: {match['score']:.4f}")
+        print(f"  Metadata: {match.get('metadata')}")
+    return 0
+
+def cmd_verify(args):
+    from comprehensive_fetch import comprehensive_fetch
+
+    report = comprehensive_fetch(args.output, query=args.query or None, batch_size=args.batch_size)
+    return 0 if report is not None and report.missing == 0 and report.stale_model == 0 else 1
+
+def cmd_reconcile(args):
+    from pipeline.database import get_db_session
+    from pipeline.reconcile import reconcile
+    from pipeline.vector_store import get_vector_store
+
+    store = get_vector_store()
+    db = next(get_db_session(read_only=True))
+    try:
+        report = reconcile(db, store, batch_size=args.batch_size, concurrency=args.concurrency, find_orphans=not args.no_orphans)
+    finally:
+        db.close()
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "packages": report.packages,
+            "matched": report.matched,
+            "missing": report.missing,
+            "stale": report.stale,
+            "orphaned": report.orphaned,
+        }, f, indent=2)
+    print(f"Checked {report.packages} packages: {report.matched} match, {len(report.missing)} missing, "
+          f"{len(report.stale)} stale, {len(report.orphaned)} orphaned vectors (ids in {args.output}).")
+    if report.consistent or not args.repair:
+        return 0 if report.consistent else 1
+
+    # Targeted repair: drop the orphans and re-embed only the missing and stale packages.
+    if report.orphaned:
+        from pipeline.deletes import delete_vectors
+        from pipeline.manifest import EmbeddingManifest
+
+        manifest = EmbeddingManifest()
+        try:
+            delete_vectors(store, report.orphaned, manifest)
+        finally:
+            manifest.close()
+        print(f"Deleted {len(report.orphaned)} orphaned vectors.")
+    if report.repair_ids:
+        import main
+
+        summary = main.run_pipeline(mode=args.mode, package_ids=report.repair_ids)
+        print(f"Re-embedded {summary['embedded']} packages, {summary['failed']} failed.")
+        return 0 if summary["status"] == "completed" else 1
+    return 0
+
+def cmd_reindex(args):
+    from reindex import reindex
+
+    reindex(
+        model_name=args.model,
+        target=args.target,
+        shards=args.shards,
+        workers=args.workers,
+        upsert_concurrency=args.upsert_concurrency,
+        switch=not args.no_switch,
+        retire=args.retire,
+    )
+    return 0
+
+def cmd_reset_index(args):
+    from pipeline.reindex import live_index
+
+    if not args.yes:
+        answer = input(f"Delete the Pinecone index '{live_index('pinecone')}'? [y/N] ")
+        if answer.strip().lower() not in ("y", "yes"):
+            print("Aborted.")
+            return 1
+
+    from fix_pinecone_index import fix_pinecone_index
+
+    fix_pinecone_index()
+    return 0
+
+def cmd_serve(args):
+    from pipeline.query_service import QueryService, serve
+
+    service = QueryService()
+    server = serve(service, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down the query service.")
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the argument parser. Only config (environment variables) is read
+    here, never the database or the model.
+    """
+    from pipeline.config import BULK_EXPORT_DIR, EMBEDDING_MODEL_NAME, PIPELINE_MODE, QUERY_SERVICE_HOST, QUERY_SERVICE_PORT
+
+    parser = argparse.ArgumentParser(prog="cli.py", description="MySQL to Pinecone ETL pipeline.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    run = subcommands.add_parser("run", help="Run the ETL pipeline.")
+    run.add_argument("--mode", choices=("sequential", "pipelined"), default=PIPELINE_MODE)
+    run.add_argument("--no-resume", action="store_true", help="Start a new run instead of resuming an interrupted one.")
+    run.add_argument("--export", metavar="DIR", default=BULK_EXPORT_DIR, help="Write the vectors to Parquet files in DIR instead of upserting them.")
+    run.set_defaults(handler=cmd_run)
+
+    import_ = subcommands.add_parser("import", help="Load Parquet files written by 'run --export' into the vector store.")
+    import_.add_argument("directory")
+    import_.add_argument("--batch-size", type=int, default=1000, help="Vectors read and upserted at a time.")
+    import_.add_argument("--record-only", action="store_true", help="Only update the manifest, after the files were imported elsewhere (e.g. a Pinecone bulk import).")
+    import_.set_defaults(handler=cmd_import)
+
+    count = subcommands.add_parser("count", help="Count the packages in MySQL.")
+    count.add_argument("--list", action="store_true", help="Also print a text preview of every package.")
+    count.set_defaults(handler=cmd_count)
+
+    check = subcommands.add_parser("check", help="Preview the first packages the pipeline would process.")
+    check.set_defaults(handler=cmd_check)
+
+    fetch = subcommands.add_parser("fetch", help="Run a semantic search against the vector index.")
+    fetch.add_argument("query", nargs="?", default="tour package")
+    fetch.add_argument("--top-k", type=int, default=10)
+    fetch.add_argument("--filter", help='Metadata filter as JSON, e.g. \'{"base_price": {"$lt": 2000}}\'.')
+    fetch.set_defaults(handler=cmd_fetch)
+
+    verify = subcommands.add_parser("verify", help="Compare the packages in MySQL with what the index stores.")
+    verify.add_argument("--output", default="comprehensive_result.txt", help="Where the report is written.")
+    verify.add_argument("--query", default="tour package", help="Sample semantic search to include ('' skips it and the model).")
+    verify.add_argument("--batch-size", type=int, default=100, help="Packages read per query.")
+    verify.set_defaults(handler=cmd_verify)
+
+    reconcile = subcommands.add_parser("reconcile", help="Compare MySQL with the index by content fingerprint.")
+    reconcile.add_argument("--output", default="reconcile_report.json", help="Where the missing, stale and orphaned ids are written.")
+    reconcile.add_argument("--repair", action="store_true", help="Delete orphans and re-embed only missing and stale packages.")
+    reconcile.add_argument("--mode", choices=("sequential", "pipelined"), default=PIPELINE_MODE, help="Pipeline mode for --repair.")
+    reconcile.add_argument("--batch-size", type=int, default=500, help="Packages read per query.")
+    reconcile.add_argument("--concurrency", type=int, default=8, help="Vector fetch requests kept in flight.")
+    reconcile.add_argument("--no-orphans", action="store_true", help="Skip the scan for vectors whose package is gone.")
+    reconcile.set_defaults(handler=cmd_reconcile)
+
+    reindex = subcommands.add_parser("reindex", help="Backfill a new index (e.g. for another model) while the live one serves, then switch to it.")
+    reindex.add_argument("--model", default=EMBEDDING_MODEL_NAME, help="Embedding model for the new index.")
+    reindex.add_argument("--target", help="New index name or local directory (default: timestamped). Reuse it to resume.")
+    reindex.add_argument("--shards", type=int, default=4, help="Extraction shards for the backfill.")
+    reindex.add_argument("--workers", type=int, default=0, help="Embedding worker processes for the backfill.")
+    reindex.add_argument("--upsert-concurrency", type=int, default=16, help="Upserts in flight for the backfill.")
+    reindex.add_argument("--no-switch", action="store_true", help="Backfill only; leave the alias on the live index.")
+    reindex.add_argument("--retire", action="store_true", help="Delete the previous index after switching.")
+    reindex.set_defaults(handler=cmd_reindex)
+
+    reset_index = subcommands.add_parser("reset-index", help="Delete the Pinecone index so the next run recreates it (search is down until then; prefer reindex).")
+    reset_index.add_argument("--yes", action="store_true", help="Do not ask for confirmation.")
+    reset_index.set_defaults(handler=cmd_reset_index)
+
+    serve = subcommands.add_parser("serve", help="Run the resident semantic search service.")
+    serve.add_argument("--host", default=QUERY_SERVICE_HOST)
+    serve.add_argument("--port", type=int, default=QUERY_SERVICE_PORT)
+    serve.set_defaults(handler=cmd_serve)
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,24 @@
 from pipeline.database import get_db_session
-from pipeline.models import Package
+from pipeline.extractor import iter_record_batches
+from pipeline.verify import count_packages
 
-def count_all_records():
+def count_all_records(batch_size: int = 500):
     # Get database session
-    db_session_gen = get_db_session()
+    db_session_gen = get_db_session(read_only=True)
     db = next(db_session_gen)
     
     try:
-        # Count all records
-        total_count = db.query(Package).count()
+        # Count all records on the server
+        total_count = count_packages(db)
         print(f"Total records in packages table: {total_count}")
         
-        # Show all records
-        records = db.query(Package).all()
+        # Show all records, streamed in batches so memory stays bounded
         print("\nAll records in the database:")
-        for record in records:
-            text_preview = record.to_text()[:100] + "..." if len(record.to_text()) > 100 else record.to_text()
-            print(f"ID: {record.id}, Text preview: {text_preview}")
+        for records in iter_record_batches(db, batch_size):
+            for record in records:
+                text = record.to_text()
+                text_preview = text[:100] + "..." if len(text) > 100 else text
+                print(f"ID: {record.id}, Text preview: {text_preview}")
         
     except Exception as e:
         print(f"Error counting records: {e}")
@@ -24,4 +26,4 @@ def count_all_records():
         db.close()
 
 if __name__ == "__main__":
-    count_all_records()
\ No newline at end of file
+    count_all_records()
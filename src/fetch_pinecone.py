@@ -1,6 +1,8 @@
 import logging
 from pipeline.loader import Loader
-from pipeline.config import PINECONE_INDEX_NAME
+from pipeline.config import VECTOR_BACKEND, QUERY_SERVICE_URL
+from pipeline.query_service import QueryService, search_remote
+from pipeline.reindex import live_index
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -9,9 +11,9 @@ def fetch_from_pinecone():
     """
     Fetches records from Pinecone and stores details in result.txt.
     """
-    logger.info("Initializing Pinecone connection...")
+    logger.info("Connecting to the vector store...")
     
-    # Initialize the loader (which connects to Pinecone)
+    # Initialize the loader (which connects to the configured vector store)
     loader = Loader()
     
     # Get the index
@@ -21,32 +23,27 @@ def fetch_from_pinecone():
     # For this test, we'll try to fetch records by ID if we know them
     # Otherwise, we'll demonstrate how to query with a vector
     
-    logger.info(f"Fetching index stats for '{PINECONE_INDEX_NAME}'...")
+    logger.info(f"Fetching index stats for '{live_index(VECTOR_BACKEND)}'...")
     stats = index.describe_index_stats()
     print(f"Index stats: {stats}")
     
     # Try to fetch up to 10 records using the list method if available
     # Since Pinecone doesn't have a direct "list all vectors" method, 
     # we'll try to query with a random vector and see what we get
-    import numpy as np
-    from sentence_transformers import SentenceTransformer
-    
-    # Use the same model to generate a test embedding
-    model = SentenceTransformer('sentence-transformers/all-roberta-large-v1')
-    
-    # Generate a simple query vector
     query_text = "tour package"
-    query_embedding = model.encode([query_text]).tolist()[0]
     
     logger.info("Performing similarity search in Pinecone...")
     try:
-        # Query Pinecone for similar vectors
-        results = index.query(
-            vector=query_embedding,
-            top_k=10,  # Get up to 10 most similar records
-            include_values=False,  # Don't include the full embedding values to save space
-            include_metadata=True  # Include the metadata we stored
-        )
+        if QUERY_SERVICE_URL:
+            # A running query service already has the model loaded
+            results = search_remote(QUERY_SERVICE_URL, query_text, top_k=10)
+        else:
+            # Loads the model with the configured backend and follows the index alias
+            service = QueryService(fanout_workers=1)
+            try:
+                results = service.search(query_text, top_k=10)
+            finally:
+                service.close()
         
         logger.info(f"Found {len(results['matches'])} results from Pinecone")
         
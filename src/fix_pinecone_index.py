@@ -1,6 +1,7 @@
 import logging
 from pinecone import Pinecone
-from pipeline.config import PINECONE_API_KEY, PINECONE_INDEX_NAME
+from pipeline.config import PINECONE_API_KEY
+from pipeline.reindex import live_index
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,7 +17,8 @@ def fix_pinecone_index():
     logger.info("Initializing Pinecone connection...")
     pc = Pinecone(api_key=PINECONE_API_KEY)
     
-    index_name = PINECONE_INDEX_NAME
+    # The index the alias points to, if a reindex has switched it.
+    index_name = live_index("pinecone")
     
     if index_name in pc.list_indexes().names():
         logger.info(f"Deleting existing index '{index_name}' with potentially wrong dimension...")
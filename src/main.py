@@ -1,68 +1,241 @@
 import logging
 import time
-from datetime import datetime, timedelta
-from pipeline import database, extractor, transformer, loader
+from datetime import datetime
+from typing import Optional
+from pipeline import database, extractor, transformer, loader, manifest, stages, checkpoint, deletes, chunking
+from pipeline.config import (
+    PIPELINE_MODE, PIPELINE_QUEUE_SIZE, EXTRACTION_BATCH_SIZE, EXTRACTION_SHARDS, PROPAGATE_DELETES, BULK_EXPORT_DIR,
+    EMBEDDING_MODEL_NAME, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, MANIFEST_PATH, CHECKPOINT_PATH,
+    METRICS_TEXTFILE, METRICS_PORT, RUN_SUMMARY_PATH,
+)
+from pipeline.metrics import registry as metrics
+from pipeline.reindex import alias_model_conflict
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_last_run_timestamp(filepath="last_run.txt"):
-    """Reads the timestamp of the last successful run."""
-    try:
-        with open(filepath, "r") as f:
-            return datetime.fromisoformat(f.read().strip())
-    except FileNotFoundError:
-        # If the file doesn't exist, process records from the last 24 hours.
-        return datetime.utcnow() - timedelta(days=1)
-
-def set_last_run_timestamp(filepath="last_run.txt"):
-    """Saves the timestamp of the current successful run."""
-    with open(filepath, "w") as f:
-        f.write(datetime.utcnow().isoformat())
-
-def run_pipeline():
+def run_pipeline(
+    mode: str = PIPELINE_MODE,
+    resume: bool = True,
+    package_ids: Optional[list[int]] = None,
+    export_dir: str = BULK_EXPORT_DIR,
+):
     """
     Executes the full ETL pipeline.
+
+    Progress is checkpointed batch by batch once upserts are acknowledged, so
+    a run that fails or is killed resumes from its last committed batch.
+
+    Args:
+        mode: "sequential" runs extract, transform and load one batch at a time;
+              "pipelined" runs them as concurrent stages connected by bounded
+              queues, so database reads, encoding and upserts overlap.
+        resume: Continue an interrupted run; False starts from the beginning.
+        package_ids: Re-embed and upsert only these packages, whether or not
+                     the manifest considers them changed (a targeted repair
+                     after reconciliation). Checkpoints are left untouched,
+                     so an interrupted full run still resumes.
+        export_dir: Write the vectors to Parquet files in this directory for
+                    a bulk import instead of upserting them. The export has
+                    its own manifest and checkpoint (see
+                    bulk_export.export_state_path()), where batches are
+                    recorded once their file is complete; the live manifest
+                    only learns about them when the import is recorded.
+
+    Returns:
+        The run summary (status, embedded, skipped and failed counts, ...).
     """
-    logger.info("Starting ETL pipeline run...")
+    # An EMBEDDING_MODEL_NAME left over from before a reindex would embed into the new index with the old model.
+    conflict = alias_model_conflict(EMBEDDING_MODEL_NAME)
+    if conflict:
+        logger.error(conflict)
+        raise ValueError(conflict)
+
+    repair = package_ids is not None
+    if repair:
+        logger.info(f"Starting ETL pipeline repair of {len(package_ids)} packages ({mode} mode)...")
+    else:
+        logger.info(f"Starting ETL pipeline run ({mode} mode)...")
     start_time = time.time()
+    if METRICS_PORT:
+        metrics.start_http_server(METRICS_PORT)
+
+    # An export has not reached the index, so it must not touch the live manifest and checkpoint.
+    manifest_path, checkpoint_path = MANIFEST_PATH, CHECKPOINT_PATH
+    if export_dir:
+        from pipeline.bulk_export import export_state_path
+
+        manifest_path = export_state_path(MANIFEST_PATH, export_dir)
+        checkpoint_path = export_state_path(CHECKPOINT_PATH, export_dir)
+
+    checkpoints = None
+    if not repair:
+        checkpoints = checkpoint.CheckpointStore(checkpoint_path)
+        checkpoints.start_run(mode, resume=resume)
+        pending_ranges = checkpoints.pending_ranges()
+
+    def commit_span(span, **counts):
+        if checkpoints is not None:
+            checkpoints.commit_batch(*span, **counts)
 
-    last_run_ts = get_last_run_timestamp()
-    
     # Initialize components
-    db_session_gen = database.get_db_session()
+    db_session_gen = database.get_db_session(read_only=True)
     db = next(db_session_gen)
+    summary = {"embedded": 0, "skipped": 0, "failed": 0, "status": "failed"}
+    embedding_transformer = None
+    pinecone_loader = None
+    embedding_manifest = None
+    exporter = None
     
     try:
         # Initialize transformer and loader
         embedding_transformer = transformer.Transformer()
-        pinecone_loader = loader.Loader()
+        if export_dir:
+            from pipeline.bulk_export import ParquetVectorWriter
 
-        while True:
-            # 1. Extract
-            records = extractor.get_records_to_update(db, last_run_ts, loader.BATCH_SIZE)
-            if not records:
-                logger.info("No new records to process. Pipeline run finished.")
-                break
+            exporter = ParquetVectorWriter(export_dir)
+        else:
+            pinecone_loader = loader.Loader(dimension=embedding_transformer.dimension)
+        embedding_manifest = manifest.EmbeddingManifest(
+            manifest_path,
+            model_name=chunking.manifest_key(EMBEDDING_MODEL_NAME, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS)
+        )
+        def extract():
+            # 1. Extract, skipping packages whose text has not changed since they were last embedded
+            # Only the id ranges this run has not committed yet are read.
+            if repair:
+                batches = extractor.iter_id_batches(db, package_ids, EXTRACTION_BATCH_SIZE)
+            elif EXTRACTION_SHARDS > 1:
+                batches = extractor.iter_sharded_record_batches(
+                    database.ReadSessionLocal, EXTRACTION_BATCH_SIZE, EXTRACTION_SHARDS, ranges=pending_ranges
+                )
+            else:
+                batches = extractor.iter_range_batches(db, EXTRACTION_BATCH_SIZE, pending_ranges)
+            for records in batches:
+                span = None if repair else (records.after_id, records.until_id, len(records))
+                changed_records, hashes = embedding_manifest.select_changed(records, force=repair)
+                summary["skipped"] += len(records) - len(changed_records)
+                metrics.inc("pipeline_skipped_rows_total", len(records) - len(changed_records))
+                if changed_records:
+                    yield changed_records, hashes, span
+                else:
+                    # Nothing to upsert, so the batch is already done.
+                    commit_span(span)
 
+        def transform(batch):
             # 2. Transform
-            transformed_data = embedding_transformer.generate_embeddings(records)
+            changed_records, hashes, span = batch
+            return embedding_transformer.generate_embeddings(changed_records, fingerprints=hashes), hashes, span
 
+        def finish(upserted, chunk_counts, span, failed=0):
+            embedding_manifest.commit(upserted, chunk_counts)
+            summary["embedded"] += len(upserted)
+            summary["failed"] += failed
+            commit_span(span, embedded=len(upserted), failed=failed)
+            if METRICS_TEXTFILE:
+                metrics.write_textfile(METRICS_TEXTFILE)
+
+        def load(batch):
             # 3. Load
-            pinecone_loader.upsert_data(transformed_data)
-            
+            transformed_data, hashes, span = batch
+            chunk_counts = {
+                metadata["package_id"]: metadata["chunk_count"]
+                for metadata in transformed_data.metadata if "chunk_count" in metadata
+            }
+            if exporter is not None:
+                # Batches are done once the Parquet file holding them is complete.
+                for completed in exporter.write(transformed_data, (hashes, chunk_counts, span)):
+                    finish(*completed)
+                return
+
+            report = pinecone_loader.upsert_data(transformed_data)
+
+            # A package is only done once every one of its vectors (chunks) is upserted.
+            failed_packages = {chunking.package_key(vector_id) for vector_id in report.failed_ids}
+            upserted = {
+                package_id: digest for package_id, digest in hashes.items() if str(package_id) not in failed_packages
+            }
+            if failed_packages:
+                logger.warning(f"{len(failed_packages)} records failed to upsert and will be retried on the next run.")
+
+            # Remove vectors a package no longer has (fewer chunks, or a switch in chunking mode).
+            previous_counts = embedding_manifest.chunk_counts(list(upserted))
+            stale_ids = [
+                vector_id
+                for package_id in upserted
+                for vector_id in chunking.stale_vector_ids(
+                    package_id, previous_counts.get(package_id), chunk_counts.get(package_id, 0)
+                )
+            ]
+            for i in range(0, len(stale_ids), deletes.DELETE_BATCH_SIZE):
+                pinecone_loader.index.delete(stale_ids[i:i + deletes.DELETE_BATCH_SIZE])
+            metrics.inc("pipeline_stale_chunks_deleted_total", len(stale_ids))
+
+            finish(upserted, chunk_counts, span, failed=len(failed_packages))
+
             # Optional: Update a status field in the database for the processed records
             # This would require adding a 'status' field to the Package model
             # and updating it here.
 
+        if mode == "pipelined":
+            stages.StagedPipeline(
+                extract(), [("transform", transform), ("load", load)], queue_size=PIPELINE_QUEUE_SIZE
+            ).run()
+        elif mode == "sequential":
+            for batch in extract():
+                load(transform(batch))
+        else:
+            raise ValueError(f"Unknown pipeline mode '{mode}'.")
+        if exporter is not None:
+            for completed in exporter.close():
+                finish(*completed)
+            logger.info(f"Exported {len(exporter.files)} Parquet files to '{export_dir}'.")
+
+        # Batches whose upserts failed are retried by resuming this run.
+        summary["status"] = "completed" if summary["failed"] == 0 else "failed"
+        logger.info("Packages table exhausted. Pipeline run finished.")
+        if embedding_transformer.cache is not None:
+            logger.info(f"Embedding cache stats: {embedding_transformer.cache.stats()}")
+
+        # 4. Remove vectors of packages deleted from MySQL
+        if PROPAGATE_DELETES != "off" and summary["status"] == "completed" and not repair and exporter is None:
+            delete_report = deletes.propagate_deletes(
+                db, pinecone_loader.index, dry_run=PROPAGATE_DELETES == "dry-run", manifest=embedding_manifest
+            )
+            summary["orphaned"] = delete_report.orphaned
+            summary["deleted"] = delete_report.deleted
+
     except Exception as e:
         logger.error(f"An error occurred during the pipeline run: {e}")
     finally:
+        if embedding_transformer is not None:
+            embedding_transformer.close()
+        if pinecone_loader is not None:
+            pinecone_loader.close()
+        if embedding_manifest is not None:
+            embedding_manifest.close()
         db.close()
 
-    set_last_run_timestamp()
+    if checkpoints is not None:
+        checkpoints.finish_run(summary["status"])
+        summary["watermark"] = checkpoints.watermark
+        checkpoints.close()
     end_time = time.time()
+    logger.info(f"Re-embedded {summary['embedded']} packages, skipped {summary['skipped']} unchanged packages.")
     logger.info(f"Pipeline run completed in {end_time - start_time:.2f} seconds.")
 
+    metrics.set("pipeline_run_seconds", end_time - start_time)
+    if METRICS_TEXTFILE:
+        metrics.write_textfile(METRICS_TEXTFILE)
+    if RUN_SUMMARY_PATH:
+        metrics.write_summary(RUN_SUMMARY_PATH, {
+            "mode": mode,
+            "repair": repair,
+            "started_at": datetime.utcfromtimestamp(start_time).isoformat(),
+            "duration_seconds": end_time - start_time,
+            **summary,
+        })
+    return summary
+
 if __name__ == "__main__":
     run_pipeline()
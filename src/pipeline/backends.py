@@ -0,0 +1,104 @@
+import logging
+import os
+import shutil
+from .config import EMBEDDING_BACKEND, EMBEDDING_BACKEND_CACHE_DIR, EMBEDDING_ONNX_QUANTIZATION
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# "torch": fp32 PyTorch (the baseline).
+# "int8": PyTorch with dynamic int8 quantization of every Linear layer.
+# "onnx": the model exported to an ONNX Runtime graph.
+# "onnx-int8": the ONNX graph with dynamically quantized int8 weights.
+BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+
+def model_key(model_name: str, backend: str = EMBEDDING_BACKEND, quantization: str = EMBEDDING_ONNX_QUANTIZATION) -> str:
+    """
+    Returns the name the embedding cache and manifest key a model's vectors
+    on. Quantized and ONNX backends only approximate the fp32 vectors, so
+    each one (and each ONNX quantization config) gets its own entries and
+    switching backends re-embeds; "torch" keeps the plain model name.
+    """
+    if backend == "torch":
+        return model_name
+    suffix = f"-{quantization}" if backend == "onnx-int8" else ""
+    return f"{model_name}@{backend}{suffix}"
+
+def _export_path(cache_dir: str, model_name: str, backend: str, quantization: str = None) -> str:
+    # Each quantization config gets its own export, so changing it converts the model again.
+    suffix = f"-{quantization}" if backend == "onnx-int8" else ""
+    return os.path.join(cache_dir, f"{model_name.replace('/', '__')}--{backend}{suffix}")
+
+def _load_int8(model_name: str, path: str):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if os.path.exists(path):
+        return torch.load(path, weights_only=False)
+
+    model = SentenceTransformer(model_name, device="cpu")
+    quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    temporary = f"{path}.tmp"
+    torch.save(quantized, temporary)
+    os.replace(temporary, path)
+    return quantized
+
+def _export_onnx(model_name: str, path: str, quantization: str = None):
+    """
+    Exports the model to ONNX (optionally quantized) in a temporary
+    directory and moves it into place once complete.
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    temporary = f"{path}.tmp"
+    shutil.rmtree(temporary, ignore_errors=True)
+    # Loading with backend="onnx" exports the graph when the model repo has none.
+    model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+    model.save_pretrained(temporary)
+    if quantization:
+        export_dynamic_quantized_onnx_model(model, quantization, temporary)
+    os.replace(temporary, path)
+
+def load_model(
+    model_name: str,
+    backend: str = EMBEDDING_BACKEND,
+    cache_dir: str = EMBEDDING_BACKEND_CACHE_DIR,
+    quantization: str = EMBEDDING_ONNX_QUANTIZATION,
+):
+    """
+    Loads a SentenceTransformer for CPU inference with the given backend.
+
+    Converted models (quantized PyTorch modules and ONNX graphs) are written
+    to ``cache_dir`` the first time and loaded from there afterwards, so the
+    conversion only runs once per model.
+
+    Args:
+        model_name: The sentence-transformers model.
+        backend: One of BACKENDS.
+        cache_dir: Where converted models are kept.
+        quantization: The ONNX Runtime quantization config for "onnx-int8"
+                      ("avx2", "avx512", "avx512_vnni" or "arm64").
+
+    Returns:
+        A SentenceTransformer (or its quantized copy) exposing encode(),
+        tokenizer and max_seq_length like the fp32 model.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}'; expected one of {BACKENDS}.")
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _export_path(cache_dir, model_name, backend, quantization)
+    cached = os.path.exists(path)
+    logger.info(f"{'Loading cached' if cached else 'Converting'} {backend} model for {model_name} ({path}).")
+
+    if backend == "int8":
+        return _load_int8(model_name, path)
+
+    if not cached:
+        _export_onnx(model_name, path, quantization if backend == "onnx-int8" else None)
+    model_kwargs = {"file_name": f"onnx/model_qint8_{quantization}.onnx"} if backend == "onnx-int8" else None
+    return SentenceTransformer(path, device="cpu", backend="onnx", model_kwargs=model_kwargs)
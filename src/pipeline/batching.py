@@ -0,0 +1,91 @@
+import logging
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def token_lengths(model, texts: list[str]) -> list[int]:
+    """
+    Returns the number of tokens the model will actually see for each text,
+    i.e. after truncation to its max sequence length.
+    """
+    encoded = model.tokenizer(
+        texts,
+        add_special_tokens=True,
+        truncation=True,
+        max_length=model.max_seq_length,
+    )
+    return [len(ids) for ids in encoded["input_ids"]]
+
+def plan_token_batches(
+    lengths: list[int], token_budget: int, max_batch_size: int = 256, max_padding: float = 0.1
+) -> list[list[int]]:
+    """
+    Groups text indices into batches of similar length.
+
+    Texts are sorted longest first and each batch grows while
+    ``batch size * longest length`` (the padded size of the batch) stays
+    within the token budget, so short texts end up in large batches and long
+    texts in small ones. A text that would be padded by more than
+    ``max_padding`` of the batch's longest length starts a new batch.
+
+    Args:
+        lengths: Token length of each text.
+        token_budget: Maximum padded tokens per batch.
+        max_batch_size: Upper bound on texts per batch.
+        max_padding: Largest fraction of a row that may be padding.
+
+    Returns:
+        Lists of indices into ``lengths``, one list per batch.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches = []
+    current = []
+    for i in order:
+        longest = lengths[current[0]] if current else lengths[i]
+        full = (len(current) + 1) * longest > token_budget or len(current) >= max_batch_size
+        too_short = lengths[i] < longest * (1 - max_padding)
+        if current and (full or too_short):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+def padded_tokens(lengths: list[int], batches: list[list[int]]) -> int:
+    """
+    Returns the total number of tokens, padding included, that a batch plan
+    feeds through the model.
+    """
+    return sum(len(batch) * max(lengths[i] for i in batch) for batch in batches)
+
+def encode_in_token_batches(
+    model, texts: list[str], token_budget: int, max_batch_size: int = 256, lengths: list[int] = None
+) -> np.ndarray:
+    """
+    Encodes texts in length-bucketed batches sized to a token budget and
+    returns the embeddings in the original order. ``lengths`` may be passed
+    if the caller has already tokenized the texts.
+    """
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+
+    if lengths is None:
+        lengths = token_lengths(model, texts)
+    batches = plan_token_batches(lengths, token_budget, max_batch_size)
+    logger.debug(
+        f"Encoding {len(texts)} texts in {len(batches)} length-bucketed batches "
+        f"({padded_tokens(lengths, batches)} padded tokens for {sum(lengths)} real tokens)."
+    )
+
+    embeddings = None
+    for batch in batches:
+        encoded = model.encode(
+            [texts[i] for i in batch], batch_size=len(batch), show_progress_bar=False
+        )
+        encoded = np.asarray(encoded, dtype=np.float32)
+        if embeddings is None:
+            embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        embeddings[batch] = encoded
+    return embeddings
@@ -0,0 +1,245 @@
+import glob
+import json
+import logging
+import os
+from typing import Any, Optional
+import numpy as np
+from . import chunking
+from .config import BULK_EXPORT_ROW_GROUP_SIZE, BULK_EXPORT_ROWS_PER_FILE, MANIFEST_PATH
+from .deletes import DELETE_BATCH_SIZE
+from .manifest import EmbeddingManifest
+from .metrics import registry as metrics
+from .vector_batch import VectorBatch
+from .vector_store import VectorStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def export_state_path(path: str, directory: str) -> str:
+    """
+    Returns an export's own variant of a state file, e.g.
+    embedding_manifest.full-export.db for the export directory full-export.
+
+    An export run checkpoints and records its packages there rather than in
+    the live manifest, since nothing reaches the index until the files are
+    imported.
+    """
+    root, extension = os.path.splitext(path)
+    return f"{root}.{os.path.basename(os.path.normpath(directory))}{extension}"
+
+def _schema():
+    import pyarrow as pa
+
+    # The layout of Pinecone's bulk import: a string id, float32 values and metadata as a JSON string.
+    return pa.schema([
+        ("id", pa.string()),
+        ("values", pa.list_(pa.float32())),
+        ("metadata", pa.string()),
+    ])
+
+class ParquetVectorWriter:
+    """
+    Streams vectors into Parquet files for a vector store's bulk import.
+
+    Rows are buffered until a row group is full and then written, so memory
+    holds at most one row group. A file is written under a temporary name
+    and renamed to ``part-<n>.parquet`` once it holds ``rows_per_file`` rows
+    (or the writer is closed), so an importer never sees a partial file.
+
+    Callers pass a token with every write; write() and close() return the
+    tokens whose rows are all in finished files, i.e. the work that is now
+    durable and can be checkpointed.
+    """
+    def __init__(
+        self,
+        directory: str,
+        row_group_size: int = BULK_EXPORT_ROW_GROUP_SIZE,
+        rows_per_file: int = BULK_EXPORT_ROWS_PER_FILE,
+    ):
+        """
+        Args:
+            directory: Where the Parquet files are written. Numbering continues
+                       after the files already there, so a resumed export adds
+                       to them.
+            row_group_size: Rows per Parquet row group.
+            rows_per_file: Rows per file; rounded up to whole row groups.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._pq = pq
+        self.directory = directory
+        self.row_group_size = max(1, row_group_size)
+        self.rows_per_file = max(self.row_group_size, rows_per_file)
+        self.schema = _schema()
+        os.makedirs(directory, exist_ok=True)
+
+        self.files = []
+        existing = [os.path.basename(path)[len("part-"):-len(".parquet")] for path in glob.glob(os.path.join(directory, "part-*.parquet"))]
+        self._next_part = max((int(number) for number in existing if number.isdigit()), default=-1) + 1
+        self._writer = None
+        self._temporary_path = None
+        self._file_rows = 0
+        self._ids, self._values, self._metadata = [], [], []
+        # Tokens whose rows are written (or buffered) but not in a finished file yet.
+        self._pending = []
+
+    def _open_file(self):
+        self._temporary_path = os.path.join(self.directory, f".part-{self._next_part:05d}.parquet.tmp")
+        self._writer = self._pq.ParquetWriter(self._temporary_path, self.schema, compression="zstd")
+        self._file_rows = 0
+
+    def _finish_file(self) -> list:
+        """
+        Closes and publishes the current file, returning the tokens it completed.
+        """
+        self._writer.close()
+        path = os.path.join(self.directory, f"part-{self._next_part:05d}.parquet")
+        os.replace(self._temporary_path, path)
+        self.files.append(path)
+        self._next_part += 1
+        self._writer = None
+        metrics.inc("pipeline_export_files_total")
+        logger.info(f"Wrote {path} ({self._file_rows} vectors).")
+        done, self._pending = self._pending, []
+        return done
+
+    def _write_row_group(self):
+        """
+        Writes the buffered rows as one row group, with the values as a single
+        contiguous float32 array.
+        """
+        pa = self._pa
+        if self._writer is None:
+            self._open_file()
+        values = np.concatenate(self._values)
+        dimension = values.shape[1]
+        offsets = np.arange(0, (len(values) + 1) * dimension, dimension, dtype=np.int32)
+        table = pa.Table.from_arrays(
+            [
+                pa.array(self._ids, pa.string()),
+                pa.ListArray.from_arrays(pa.array(offsets), pa.array(values.reshape(-1), pa.float32())),
+                pa.array(self._metadata, pa.string()),
+            ],
+            schema=self.schema,
+        )
+        self._writer.write_table(table, row_group_size=len(values))
+        self._file_rows += len(values)
+        metrics.inc("pipeline_export_rows_total", len(values))
+        self._ids, self._values, self._metadata = [], [], []
+
+    def write(self, transformed_data: VectorBatch, token: Any = None) -> list:
+        """
+        Adds a VectorBatch from the Transformer, with the same metadata as
+        Loader.upsert_data() would send.
+
+        Returns:
+            The tokens of earlier (and possibly this) writes whose rows are
+            now all in finished files.
+        """
+        done = []
+        start = 0
+        while start < len(transformed_data):
+            # Fill the buffer up to exactly one row group.
+            items = transformed_data[start:start + self.row_group_size - len(self._ids)]
+            start += len(items)
+            self._ids.extend(items.ids)
+            self._values.append(items.float32_values())
+            self._metadata.extend(json.dumps(metadata) for metadata in items.payload_metadata())
+            if len(self._ids) >= self.row_group_size:
+                self._write_row_group()
+                if self._file_rows >= self.rows_per_file:
+                    done.extend(self._finish_file())
+        self._pending.append(token)
+        return done
+
+    def close(self) -> list:
+        """
+        Writes the buffered rows and publishes the last file.
+
+        Returns:
+            The tokens of every write not returned yet.
+        """
+        if self._ids:
+            self._write_row_group()
+        if self._writer is not None:
+            return self._finish_file()
+        done, self._pending = self._pending, []
+        return done
+
+def record_import(
+    directory: str, store: VectorStore, manifest: EmbeddingManifest, manifest_path: str = MANIFEST_PATH
+) -> int:
+    """
+    Records an imported export in the live manifest, so the next incremental
+    run skips its packages, and deletes the vectors the import left behind
+    (chunks beyond a package's new chunk count, or its former single vector).
+
+    Call this only once every file of the export is in ``store``.
+
+    Args:
+        directory: The export directory.
+        store: The vector store the files were imported into.
+        manifest: The live manifest.
+        manifest_path: The live manifest's path, from which the export's
+                       manifest path is derived.
+
+    Returns:
+        The number of packages recorded.
+    """
+    path = export_state_path(manifest_path, directory)
+    if not os.path.exists(path):
+        raise ValueError(f"No export manifest at '{path}'; was '{directory}' written by an export run?")
+
+    recorded = 0
+    export_manifest = EmbeddingManifest(path, model_name=manifest.model_name)
+    try:
+        for hashes, chunk_counts in export_manifest.iter_entries():
+            previous_counts = manifest.chunk_counts(list(hashes))
+            stale_ids = [
+                vector_id
+                for package_id in hashes
+                for vector_id in chunking.stale_vector_ids(package_id, previous_counts.get(package_id), chunk_counts[package_id])
+            ]
+            for i in range(0, len(stale_ids), DELETE_BATCH_SIZE):
+                store.delete(stale_ids[i:i + DELETE_BATCH_SIZE])
+            metrics.inc("pipeline_stale_chunks_deleted_total", len(stale_ids))
+            manifest.commit(hashes, chunk_counts)
+            recorded += len(hashes)
+    finally:
+        export_manifest.close()
+    logger.info(f"Recorded {recorded} exported packages in the manifest.")
+    return recorded
+
+def import_parquet(directory: str, store: VectorStore, batch_size: int = 1000, namespace: Optional[str] = None) -> int:
+    """
+    Loads exported Parquet files into a vector store, one record batch at a
+    time, so memory holds at most ``batch_size`` vectors.
+
+    Meant for the local backend (load tests and CI); Pinecone can import the
+    same files directly from object storage. Either way, record_import()
+    then updates the live manifest.
+
+    Returns:
+        The number of vectors imported.
+    """
+    import pyarrow.parquet as pq
+
+    paths = sorted(glob.glob(os.path.join(directory, "part-*.parquet")))
+    if not paths:
+        raise ValueError(f"No part-*.parquet files in '{directory}'.")
+
+    imported = 0
+    for path in paths:
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=batch_size):
+            ids = batch.column("id").to_pylist()
+            # The list column's flattened child array is contiguous float32: reshape it without copying.
+            values = batch.column("values").flatten().to_numpy().reshape(len(ids), -1)
+            metadata = [json.loads(value) if value else {} for value in batch.column("metadata").to_pylist()]
+            store.upsert_batch(VectorBatch(ids, values, metadata), namespace=namespace)
+            imported += len(ids)
+            metrics.inc("pipeline_import_rows_total", len(ids))
+        logger.info(f"Imported {path} ({imported} vectors so far).")
+    return imported
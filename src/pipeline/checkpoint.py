@@ -0,0 +1,183 @@
+import logging
+import sqlite3
+import threading
+from typing import Optional
+from .config import CHECKPOINT_PATH
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class CheckpointStore:
+    """
+    A durable SQLite record of pipeline runs and the batches each one has
+    committed, so an interrupted run can resume where it stopped.
+
+    Every batch covers a span of package ids (after_id < id <= until_id). A
+    batch is only recorded as committed once its vectors were acknowledged by
+    the vector store (or it had nothing to upsert). Resuming re-reads exactly
+    the spans that were not committed, whatever order the batches finished
+    in, and the run's watermark is the highest id below which every batch
+    has been committed.
+    """
+    def __init__(self, path: str = CHECKPOINT_PATH):
+        """
+        Opens (or creates) the checkpoint database.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                mode TEXT NOT NULL,
+                status TEXT NOT NULL,
+                watermark INTEGER NOT NULL DEFAULT 0,
+                started_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                finished_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS batches (
+                run_id INTEGER NOT NULL,
+                after_id INTEGER NOT NULL,
+                until_id INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                records INTEGER NOT NULL DEFAULT 0,
+                embedded INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (run_id, after_id)
+            );
+            """
+        )
+        self._conn.commit()
+        self.run_id: Optional[int] = None
+        self.watermark = 0
+        # Committed spans above the watermark, keyed by after_id.
+        self._ahead: dict[int, int] = {}
+        logger.info(f"Opened checkpoint store at '{path}'.")
+
+    def start_run(self, mode: str, resume: bool = True) -> int:
+        """
+        Starts a new run, or resumes the most recent one if it did not
+        complete (it failed, or the process was killed).
+
+        Args:
+            mode: The pipeline mode, recorded for reference.
+            resume: Set to False to start from scratch even if the last run
+                    was interrupted.
+
+        Returns:
+            The run id.
+        """
+        with self._lock:
+            last = self._conn.execute(
+                "SELECT run_id, status FROM runs ORDER BY run_id DESC LIMIT 1"
+            ).fetchone()
+            if resume and last is not None and last[1] != "completed":
+                self.run_id = last[0]
+                self._conn.execute("UPDATE runs SET status = 'running', mode = ? WHERE run_id = ?", (mode, self.run_id))
+                spans = self._conn.execute(
+                    "SELECT after_id, until_id FROM batches WHERE run_id = ? AND status = 'committed'",
+                    (self.run_id,),
+                ).fetchall()
+            else:
+                if last is not None and last[1] == "running":
+                    self._conn.execute("UPDATE runs SET status = 'abandoned' WHERE run_id = ?", (last[0],))
+                self.run_id = self._conn.execute(
+                    "INSERT INTO runs (mode, status) VALUES (?, 'running')", (mode,)
+                ).lastrowid
+                spans = []
+            self._conn.commit()
+
+            self.watermark = 0
+            self._ahead = dict(spans)
+            self._advance()
+
+        if spans:
+            logger.info(
+                f"Resuming run {self.run_id}: {len(spans)} batches already committed, "
+                f"watermark at package id {self.watermark}."
+            )
+        else:
+            logger.info(f"Started run {self.run_id}.")
+        return self.run_id
+
+    def _advance(self):
+        """
+        Moves the watermark over committed spans that now join it. Must be
+        called with the lock held.
+        """
+        # Batches start where an earlier batch or range ended, so spans chain exactly.
+        while self.watermark in self._ahead:
+            self.watermark = max(self.watermark, self._ahead.pop(self.watermark))
+
+    def pending_ranges(self) -> list[tuple[int, Optional[int]]]:
+        """
+        Returns the (after_id, until_id) ranges the current run still has to
+        read; the last range is open-ended (until_id None).
+        """
+        with self._lock:
+            ranges = []
+            cursor = self.watermark
+            for after_id, until_id in sorted(self._ahead.items()):
+                if after_id > cursor:
+                    ranges.append((cursor, after_id))
+                cursor = max(cursor, until_id)
+            ranges.append((cursor, None))
+            return ranges
+
+    def commit_batch(self, after_id: int, until_id: int, records: int, embedded: int = 0, failed: int = 0):
+        """
+        Records the outcome of a batch once its upserts were acknowledged.
+
+        A batch with failed upserts is recorded as failed and is read again
+        when the run resumes; the content-hash manifest keeps its successful
+        records from being re-embedded.
+
+        Args:
+            after_id: The batch covers ids greater than this...
+            until_id: ...up to and including this.
+            records: Packages extracted in the batch.
+            embedded: Vectors upserted successfully.
+            failed: Vectors whose upsert failed.
+        """
+        status = "failed" if failed else "committed"
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO batches (run_id, after_id, until_id, status, records, embedded, failed, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(run_id, after_id) DO UPDATE SET
+                    until_id = excluded.until_id,
+                    status = excluded.status,
+                    records = excluded.records,
+                    embedded = excluded.embedded,
+                    failed = excluded.failed,
+                    updated_at = excluded.updated_at
+                """,
+                (self.run_id, after_id, until_id, status, records, embedded, failed),
+            )
+            if status == "committed":
+                self._ahead[after_id] = until_id
+                self._advance()
+                self._conn.execute("UPDATE runs SET watermark = ? WHERE run_id = ?", (self.watermark, self.run_id))
+            self._conn.commit()
+
+    def finish_run(self, status: str):
+        """
+        Marks the current run as completed or failed. A completed run is not
+        resumed; the next run starts from the beginning of the table.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, finished_at = CURRENT_TIMESTAMP WHERE run_id = ?",
+                (status, self.run_id),
+            )
+            self._conn.commit()
+
+    def close(self):
+        """
+        Closes the underlying SQLite connection.
+        """
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,157 @@
+import logging
+from typing import Optional
+from . import models
+from .backends import model_key
+from .config import EMBEDDING_BACKEND, EMBEDDING_ONNX_QUANTIZATION
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Separates the package id from the chunk number in vector ids ("42#0").
+# It sorts before every digit, so a package's chunk ids list right after its
+# own id and delete propagation can merge them against package ids.
+CHUNK_SEPARATOR = "#"
+
+def chunk_id(package_id, chunk: int) -> str:
+    """
+    Returns the vector id of one chunk of a package.
+    """
+    return f"{package_id}{CHUNK_SEPARATOR}{chunk}"
+
+def package_key(vector_id: str) -> str:
+    """
+    Returns the package id part of a vector id, chunked or not.
+    """
+    return vector_id.split(CHUNK_SEPARATOR, 1)[0]
+
+def manifest_key(
+    model_name: str,
+    chunk_tokens: int,
+    overlap_tokens: int,
+    backend: str = EMBEDDING_BACKEND,
+    quantization: str = EMBEDDING_ONNX_QUANTIZATION,
+) -> str:
+    """
+    Returns the model name the manifest hashes with, so changing the chunking
+    settings or the inference backend (see backends.model_key()) re-embeds
+    every package.
+    """
+    model_name = model_key(model_name, backend, quantization)
+    if chunk_tokens <= 0:
+        return model_name
+    return f"{model_name}{CHUNK_SEPARATOR}chunks={chunk_tokens}/{overlap_tokens}"
+
+def package_document(record) -> str:
+    """
+    Returns the full text of a package for chunking, with every tour plan.
+    """
+    return models.package_to_text(record, max_tour_plans=None)
+
+def _token_counts(tokenizer, texts: list[str]) -> list[int]:
+    if not texts:
+        return []
+    return [len(ids) for ids in tokenizer(texts, add_special_tokens=False, truncation=False)["input_ids"]]
+
+def _split_words(tokenizer, line: str, budget: int, overlap_tokens: int) -> list[str]:
+    """
+    Splits a line that does not fit in one chunk into windows of whole words,
+    repeating about ``overlap_tokens`` tokens of context between windows.
+    """
+    words = line.split(" ")
+    counts = _token_counts(tokenizer, words)
+    windows = []
+    start = 0
+    while start < len(words):
+        end, used = start, 0
+        while end < len(words) and (end == start or used + counts[end] <= budget):
+            used += counts[end]
+            end += 1
+        windows.append(" ".join(words[start:end]))
+        if end >= len(words):
+            break
+
+        # Step back over the last words of this window to overlap the next one.
+        next_start, carried = end, 0
+        while next_start - 1 > start and carried + counts[next_start - 1] <= overlap_tokens:
+            next_start -= 1
+            carried += counts[next_start]
+        start = next_start
+    return windows
+
+def chunk_document(tokenizer, text: str, chunk_tokens: int, overlap_tokens: int = 0) -> list[str]:
+    """
+    Splits a package document into chunks of at most ``chunk_tokens`` tokens
+    (special tokens excluded).
+
+    Whole lines (one field each) are packed into chunks; a line too long for
+    a chunk of its own, typically the tour details, is split into windows of
+    words overlapping by ``overlap_tokens``. Every chunk after the first
+    starts with the document's first line (the package name), so each vector
+    can be traced back to its package. A document that fits is returned as a
+    single chunk identical to the input.
+
+    Args:
+        tokenizer: The embedding model's tokenizer.
+        text: The document, one field per line.
+        chunk_tokens: Token budget per chunk.
+        overlap_tokens: Tokens of context repeated between the windows of a
+                        split line.
+
+    Returns:
+        The chunk texts, in document order.
+    """
+    lines = text.split("\n")
+    counts = _token_counts(tokenizer, lines)
+    # Lines are joined with a newline, which counts as (at most) one token.
+    if sum(counts) + len(lines) - 1 <= chunk_tokens:
+        return [text]
+
+    # Every chunk after the first starts with the header line and its newline,
+    # unless the header alone would take up most of the chunk.
+    repeat_header = counts[0] + 1 <= chunk_tokens // 2
+    prefix, prefix_tokens = ([lines[0]], counts[0] + 1) if repeat_header else ([], 0)
+    chunks = []
+    current, used = [], 0
+
+    def has_content() -> bool:
+        return len(current) > (len(prefix) if chunks else 0)
+
+    def close_chunk():
+        nonlocal current, used
+        chunks.append("\n".join(current))
+        current, used = list(prefix), prefix_tokens
+
+    for line, count in zip(lines, counts):
+        if has_content() and used + count + 1 > chunk_tokens:
+            close_chunk()
+        cost = count + (1 if current else 0)
+        if used + cost <= chunk_tokens:
+            current.append(line)
+            used += cost
+            continue
+
+        # The line does not fit even in an empty chunk: split it into windows.
+        budget = max(1, chunk_tokens - used - 1)
+        for i, window in enumerate(_split_words(tokenizer, line, budget, overlap_tokens)):
+            if i:
+                close_chunk()
+            current.append(window)
+            # Treat the chunk as full; the next line starts a new one.
+            used = chunk_tokens
+    if has_content():
+        chunks.append("\n".join(current))
+    return chunks
+
+def stale_vector_ids(package_id, old_chunks: Optional[int], new_chunks: int) -> list[str]:
+    """
+    Returns the vector ids of a package that an upsert with ``new_chunks``
+    chunks leaves behind.
+
+    Chunk counts of 0 stand for a single, unchunked vector whose id is the
+    package id; None means the package was never embedded.
+    """
+    if old_chunks is None or old_chunks == new_chunks == 0:
+        return []
+    if old_chunks == 0:
+        return [str(package_id)]
+    return [chunk_id(package_id, n) for n in range(new_chunks, old_chunks)]
@@ -1,19 +1,64 @@
+import threading
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from .config import DATABASE_URL
+from .config import (
+    DATABASE_URL, DATABASE_READ_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_PRE_PING, DB_POOL_RECYCLE
+)
 
-# Create the SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+def _create_engine(url: str):
+    """
+    Creates an engine with the configured connection pool. Pre-ping replaces
+    connections MySQL has dropped, and recycling keeps them younger than its
+    wait_timeout.
+    """
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+
+# engine, read_engine, SessionLocal and ReadSessionLocal are created on first use (see
+# __getattr__), so importing this module neither connects nor loads the MySQL driver. Assigning
+# one of them (e.g. in tests) before first use takes precedence over the configured URL.
+_LAZY_ATTRIBUTES = ("engine", "read_engine", "SessionLocal", "ReadSessionLocal")
+_lock = threading.RLock()
+
+def _build(name: str):
+    if name == "engine":
+        return _create_engine(DATABASE_URL)
+    if name == "read_engine":
+        # Extraction reads from the replica when one is configured
+        return _create_engine(DATABASE_READ_URL) if DATABASE_READ_URL else _get("engine")
+    bind = _get("engine" if name == "SessionLocal" else "read_engine")
+    return sessionmaker(autocommit=False, autoflush=False, bind=bind)
 
-# Create a configured "Session" class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _get(name: str):
+    """
+    Returns a lazily created attribute, creating it on first use.
+    """
+    module = globals()
+    if name not in module:
+        with _lock:
+            if name not in module:
+                module[name] = _build(name)
+    return module[name]
 
-def get_db_session():
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return _get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_db_session(read_only: bool = False):
     """
     Provides a database session for dependency injection.
     Ensures the session is properly closed after use.
+
+    Args:
+        read_only: Use the read replica (DATABASE_READ_URL) if one is configured.
     """
-    db = SessionLocal()
+    db = _get("ReadSessionLocal" if read_only else "SessionLocal")()
     try:
         yield db
     finally:
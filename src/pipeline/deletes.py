@@ -0,0 +1,150 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+from sqlalchemy import String, cast, select
+from sqlalchemy.orm import Session
+from . import models
+from .chunking import package_key
+from .manifest import EmbeddingManifest
+from .metrics import registry as metrics
+from .vector_store import VectorStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pinecone accepts at most 1000 ids per delete request.
+DELETE_BATCH_SIZE = 1000
+
+# Number of orphaned ids kept in the report for inspection.
+_SAMPLE_SIZE = 20
+
+@dataclass
+class DeleteReport:
+    """
+    The outcome of one delete propagation pass.
+    """
+    dry_run: bool
+    vectors_scanned: int = 0
+    orphaned: int = 0
+    deleted: int = 0
+    sample: list[str] = field(default_factory=list)
+
+def iter_live_ids(db: Session, page_size: int = 10000) -> Iterator[str]:
+    """
+    Streams the ids of every package in MySQL as strings, in the same
+    ascending string order that vector stores list their ids in.
+
+    The sort happens in the database and rows are fetched ``page_size`` at a
+    time, so memory stays flat however large the table is.
+    """
+    key = cast(models.Package.__table__.c.id, String)
+    result = db.execute(select(key).order_by(key).execution_options(yield_per=page_size))
+    for package_id in result.scalars():
+        yield package_id
+
+def _ascending(ids: Iterable[str], source: str) -> Iterator[str]:
+    """
+    Passes ids through, failing if they are not strictly ascending. A merge
+    scan over unsorted input would report live packages as orphaned.
+    """
+    previous = None
+    for id_ in ids:
+        if previous is not None and id_ <= previous:
+            raise ValueError(f"{source} ids are not in ascending order ('{previous}' then '{id_}').")
+        previous = id_
+        yield id_
+
+def find_orphaned_ids(live_ids: Iterable[str], vector_ids: Iterable[str]) -> Iterator[str]:
+    """
+    Merge-scans two ascending streams and yields the vector ids that have
+    no live package, holding a single id from each stream at a time. Chunk
+    vectors ("<package>#<n>") are matched on their package id.
+    """
+    live = _ascending(live_ids, "Package")
+    current = next(live, None)
+    for vector_id in _ascending(vector_ids, "Vector"):
+        key = package_key(vector_id)
+        while current is not None and current < key:
+            current = next(live, None)
+        if current != key:
+            yield vector_id
+
+def delete_vectors(
+    store: VectorStore,
+    ids: list[str],
+    manifest: Optional[EmbeddingManifest] = None,
+    delete_batch_size: int = DELETE_BATCH_SIZE,
+) -> int:
+    """
+    Deletes vectors in batches and, if a manifest is given, forgets their
+    packages so they are embedded again if they come back.
+
+    Returns:
+        The number of ids deleted.
+    """
+    for i in range(0, len(ids), delete_batch_size):
+        batch = ids[i:i + delete_batch_size]
+        store.delete(batch)
+        if manifest is not None:
+            manifest.forget(sorted({int(key) for key in map(package_key, batch) if key.isdigit()}))
+        metrics.inc("pipeline_deleted_vectors_total", len(batch))
+    return len(ids)
+
+def propagate_deletes(
+    db: Session,
+    store: VectorStore,
+    dry_run: bool = False,
+    manifest: Optional[EmbeddingManifest] = None,
+    page_size: int = 1000,
+    delete_batch_size: int = DELETE_BATCH_SIZE,
+) -> DeleteReport:
+    """
+    Deletes vectors whose package was removed from MySQL.
+
+    The live package ids and the index's vector ids are streamed side by
+    side, in pages, and compared with a merge scan; orphans are deleted in
+    batches as they are found.
+
+    Args:
+        db: The SQLAlchemy database session.
+        store: The vector store to clean up.
+        dry_run: Only count (and sample) what would be deleted.
+        manifest: If given, deleted packages are also removed from the
+                  content-hash manifest, so a package that is re-created, or
+                  upserted while this pass was running, is embedded again.
+        page_size: Vector ids listed per request.
+        delete_batch_size: Ids per delete request.
+
+    Returns:
+        A DeleteReport.
+    """
+    report = DeleteReport(dry_run=dry_run)
+
+    def vector_ids():
+        for page in store.list_ids(page_size=page_size):
+            report.vectors_scanned += len(page)
+            yield from page
+
+    def flush(ids: list[str]):
+        if dry_run or not ids:
+            return
+        report.deleted += delete_vectors(store, ids, manifest, delete_batch_size)
+        logger.info(f"Deleted {len(ids)} orphaned vectors.")
+
+    pending = []
+    for vector_id in find_orphaned_ids(iter_live_ids(db), vector_ids()):
+        report.orphaned += 1
+        if len(report.sample) < _SAMPLE_SIZE:
+            report.sample.append(vector_id)
+        pending.append(vector_id)
+        if len(pending) >= delete_batch_size:
+            flush(pending)
+            pending = []
+    flush(pending)
+
+    action = "would delete" if dry_run else "deleted"
+    logger.info(
+        f"Delete propagation scanned {report.vectors_scanned} vectors and {action} "
+        f"{report.orphaned if dry_run else report.deleted} orphans (sample: {report.sample})."
+    )
+    return report
@@ -0,0 +1,217 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import unicodedata
+import numpy as np
+from .config import EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MAX_ENTRIES
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def cache_key(model_name: str, text: str) -> str:
+    """
+    Returns the cache key for a text encoded by a given model.
+    The text is Unicode-normalized so equivalent inputs share an entry.
+    """
+    normalized = unicodedata.normalize("NFC", text).strip()
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalized.encode("utf-8"))
+    return digest.hexdigest()
+
+class EmbeddingCache:
+    """
+    A disk-backed embedding cache.
+
+    Vectors are stored as rows of a memory-mapped float32 matrix
+    (``vectors.f32``) and a small SQLite index maps each key to its row and
+    last-use tick. When the cache is full, the least recently used entries
+    are evicted and their rows reused for new entries.
+
+    A row is only overwritten once no committed key points at it: evictions
+    are committed before their rows are reused, and new keys are committed
+    after their vectors are written, so a crash in between leaves unused rows
+    rather than keys pointing at other texts' vectors.
+    """
+    _GROWTH_ROWS = 1024
+
+    def __init__(self, directory: str = EMBEDDING_CACHE_DIR, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        """
+        Opens (or creates) the cache in the given directory.
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive.")
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                row INTEGER NOT NULL UNIQUE,
+                last_used INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            """
+        )
+        meta = dict(self._conn.execute("SELECT name, value FROM meta").fetchall())
+        self.dimension = meta.get("dimension")
+        self._size = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        self._tick = self._conn.execute("SELECT COALESCE(MAX(last_used), 0) FROM entries").fetchone()[0]
+        # Rows below _next_row that no key points at (left by evictions or an interrupted put_many).
+        used_rows = {row for (row,) in self._conn.execute("SELECT row FROM entries")}
+        self._next_row = max(used_rows) + 1 if used_rows else 0
+        self._free_rows = sorted(set(range(self._next_row)) - used_rows, reverse=True)
+        self._vectors = None
+        if self.dimension is not None:
+            self._open_vectors()
+
+        logger.info(f"Opened embedding cache at '{directory}' with {self._size} entries.")
+
+    def _open_vectors(self, min_rows: int = 0):
+        """
+        Maps the vector file, growing it to hold at least ``min_rows`` rows.
+        """
+        row_bytes = self.dimension * 4
+        current_rows = os.path.getsize(self._vectors_path) // row_bytes if os.path.exists(self._vectors_path) else 0
+        rows = current_rows
+        if rows < min_rows:
+            rows = min(self.max_entries, max(min_rows, rows + self._GROWTH_ROWS, rows * 2))
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(rows * row_bytes)
+        if rows == 0:
+            self._vectors = None
+            return
+
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dimension))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _lookup_rows(self, keys: list[str]) -> dict[str, int]:
+        """
+        Returns the matrix row of every key that is present in the index.
+        """
+        rows = {}
+        # Stay well below SQLite's bound-parameter limit.
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows.update(self._conn.execute(
+                f"SELECT key, row FROM entries WHERE key IN ({placeholders})", chunk
+            ).fetchall())
+        return rows
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """
+        Looks up a list of keys and refreshes their last-use tick.
+
+        Returns:
+            A mapping of the keys that were found to copies of their vectors.
+        """
+        found = {}
+        if not keys or self._vectors is None:
+            self.misses += len(keys)
+            return found
+
+        with self._lock:
+            for key, row in self._lookup_rows(keys).items():
+                found[key] = np.array(self._vectors[row])
+
+            if found:
+                self._tick += 1
+                self._conn.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?",
+                    [(self._tick, key) for key in found],
+                )
+                self._conn.commit()
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries: dict[str, np.ndarray]):
+        """
+        Stores vectors, evicting the least recently used entries if the cache
+        is full.
+        """
+        if not entries:
+            return
+
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = len(next(iter(entries.values())))
+                self._conn.execute("INSERT INTO meta (name, value) VALUES ('dimension', ?)", (self.dimension,))
+
+            existing = self._lookup_rows(list(entries))
+            new_keys = [key for key in entries if key not in existing][:self.max_entries]
+
+            evict_count = self._size + len(new_keys) - self.max_entries
+            if evict_count > 0:
+                evicted = self._conn.execute(
+                    "SELECT key, row FROM entries ORDER BY last_used LIMIT ?", (evict_count,)
+                ).fetchall()
+                self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in evicted])
+                # Commit the eviction before its rows are overwritten.
+                self._conn.commit()
+                self._free_rows.extend(row for _, row in evicted)
+                self._size -= len(evicted)
+                logger.debug(f"Evicted {len(evicted)} embedding cache entries.")
+
+            rows = [self._free_rows.pop() for _ in range(min(len(new_keys), len(self._free_rows)))]
+            appended = len(new_keys) - len(rows)
+            rows.extend(range(self._next_row, self._next_row + appended))
+            self._next_row += appended
+
+            if self._vectors is None or self._vectors.shape[0] < self._next_row:
+                self._open_vectors(min_rows=self._next_row)
+
+            self._tick += 1
+            for key, row in zip(new_keys, rows):
+                self._vectors[row] = np.asarray(entries[key], dtype=np.float32)
+            self._conn.executemany(
+                "INSERT INTO entries (key, row, last_used) VALUES (?, ?, ?)",
+                [(key, row, self._tick) for key, row in zip(new_keys, rows)],
+            )
+            self._size += len(new_keys)
+            self._vectors.flush()
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Returns the hit/miss counters and current size of the cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": self._size,
+            "max_entries": self.max_entries,
+        }
+
+    def close(self):
+        """
+        Flushes the vector file and closes the index.
+        """
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+            self._conn.close()
@@ -0,0 +1,200 @@
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from typing import Optional
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# How long to wait for a worker to load its model copy, and to encode a shard.
+_STARTUP_TIMEOUT_SECONDS = 600
+_TASK_TIMEOUT_SECONDS = 3600
+
+# How often the parent checks that its workers are still alive while waiting.
+_POLL_SECONDS = 1.0
+
+def _worker_main(model_name: str, num_threads: int, token_budget: int, backend: str, tasks, results):
+    """
+    Worker process entry point: loads its own model copy and encodes shards
+    until it receives None. With a token budget, each result also carries the
+    shard's token count, which the length bucketing computes anyway.
+    """
+    import torch
+    from .backends import load_model
+    from .batching import encode_in_token_batches, token_lengths
+
+    torch.set_num_threads(num_threads)
+    try:
+        model = load_model(model_name, backend)
+    except Exception as e:
+        results.put(("ready", None, f"{type(e).__name__}: {e}", None))
+        return
+    results.put(("ready", os.getpid(), None, None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, texts, encode_kwargs = task
+        try:
+            tokens = None
+            if token_budget > 0:
+                lengths = token_lengths(model, texts)
+                tokens = sum(lengths)
+                embeddings = encode_in_token_batches(model, texts, token_budget, lengths=lengths)
+            else:
+                embeddings = model.encode(texts, show_progress_bar=False, **encode_kwargs)
+            results.put((task_id, np.asarray(embeddings, dtype=np.float32), None, tokens))
+        except Exception as e:
+            results.put((task_id, None, f"{type(e).__name__}: {e}", None))
+
+class EncodePool:
+    """
+    A pool of worker processes, each holding its own copy of the embedding
+    model and its own torch thread count.
+
+    A batch of texts is split into one contiguous shard per worker and the
+    results are reassembled in the original order.
+    """
+    def __init__(
+        self,
+        model_name: str,
+        num_workers: int,
+        threads_per_worker: int = 0,
+        token_budget: int = 0,
+        backend: str = "torch",
+    ):
+        """
+        Starts the workers and waits until every one has loaded the model.
+
+        Args:
+            model_name: The sentence-transformers model each worker loads.
+            num_workers: Number of worker processes.
+            threads_per_worker: torch intra-op threads per worker. Defaults to
+                                an even split of the available cores.
+            token_budget: If positive, each worker encodes its shard in
+                          length-bucketed batches of this many padded tokens.
+            backend: The inference backend each worker loads; converted
+                     models must already be in the backend cache (the
+                     Transformer loads its own copy first).
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1.")
+        if threads_per_worker <= 0:
+            threads_per_worker = max(1, (os.cpu_count() or 1) // num_workers)
+
+        self.model_name = model_name
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+        self.token_budget = token_budget
+        self._next_task_id = 0
+
+        # torch is not fork-safe once initialized, so always spawn.
+        context = multiprocessing.get_context("spawn")
+        self._results = context.Queue()
+        self._tasks = [context.Queue() for _ in range(num_workers)]
+        self._processes = [
+            context.Process(
+                target=_worker_main,
+                args=(model_name, threads_per_worker, token_budget, backend, tasks, self._results),
+                name=f"encode-worker-{i}",
+                daemon=True,
+            )
+            for i, tasks in enumerate(self._tasks)
+        ]
+
+        logger.info(f"Starting {num_workers} encode workers with {threads_per_worker} threads each...")
+        for process in self._processes:
+            process.start()
+        try:
+            self._wait_until_ready()
+        except Exception:
+            self.close()
+            raise
+        logger.info("Encode workers ready.")
+
+    def _get_result(self, timeout: float):
+        """
+        Waits for the next message from a worker, failing fast if a worker died.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self._results.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                dead = [p.name for p in self._processes if not p.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Encode workers exited unexpectedly: {dead}")
+                if time.monotonic() > deadline:
+                    raise RuntimeError("Timed out waiting for encode workers.")
+
+    def _wait_until_ready(self):
+        for _ in self._processes:
+            _, pid, error, _ = self._get_result(_STARTUP_TIMEOUT_SECONDS)
+            if error is not None:
+                raise RuntimeError(f"Encode worker failed to load the model: {error}")
+
+    def encode(self, texts: list[str], **encode_kwargs) -> np.ndarray:
+        """
+        Encodes texts across all workers.
+
+        Returns:
+            A float32 array with one embedding row per input text, in input order.
+        """
+        return self.encode_with_tokens(texts, **encode_kwargs)[0]
+
+    def encode_with_tokens(self, texts: list[str], **encode_kwargs) -> tuple[np.ndarray, Optional[int]]:
+        """
+        Encodes texts across all workers, like encode().
+
+        Returns:
+            The embeddings and the number of tokens the workers encoded, or
+            None without a token budget (the workers do not tokenize then).
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32), 0 if self.token_budget > 0 else None
+
+        shard_size = -(-len(texts) // self.num_workers)
+        shards = {}
+        for worker, start in enumerate(range(0, len(texts), shard_size)):
+            task_id = self._next_task_id
+            self._next_task_id += 1
+            shards[task_id] = start
+            self._tasks[worker].put((task_id, texts[start:start + shard_size], encode_kwargs))
+
+        results = {}
+        tokens = 0 if self.token_budget > 0 else None
+        while len(results) < len(shards):
+            task_id, embeddings, error, shard_tokens = self._get_result(_TASK_TIMEOUT_SECONDS)
+            if error is not None:
+                raise RuntimeError(f"Encode worker failed: {error}")
+            if task_id in shards:
+                results[task_id] = embeddings
+                if tokens is not None:
+                    tokens += shard_tokens
+
+        return np.concatenate([results[task_id] for task_id in sorted(shards, key=shards.get)]), tokens
+
+    def close(self):
+        """
+        Stops all workers, terminating any that do not exit promptly.
+        """
+        for tasks, process in zip(self._tasks, self._processes):
+            if process.is_alive():
+                tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=30)
+            if process.is_alive():
+                logger.warning(f"Terminating unresponsive {process.name}.")
+                process.terminate()
+                process.join()
+        logger.info("Encode workers stopped.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,29 +1,67 @@
 import logging
-from datetime import datetime
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Optional
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session, selectinload
 from . import models
+from .config import EXTRACTION_MODE
+from .metrics import registry as metrics
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_records_to_update(db: Session, last_run_timestamp: datetime, batch_size: int):
+# Package columns and (relationship name, child table) pairs, read from the ORM
+# mapping so the Core path stays in step with the model.
+_PACKAGE_COLUMNS = tuple(column.key for column in models.Package.__table__.columns)
+_CHILD_TABLES = tuple(
+    (relationship.key, relationship.mapper.local_table)
+    for relationship in models.Package.__mapper__.relationships
+)
+
+# Marks a finished shard on the queue shared by the shard workers.
+_SHARD_DONE = object()
+
+# How often a blocked shard worker wakes up to check whether the walk was abandoned.
+_POLL_SECONDS = 0.5
+
+class RecordBatch(list):
     """
-    Fetches a batch of records from the 'packages' table with related data.
-    Since the schema does not have an updated_at column, we'll fetch records
-    without time-based filtering.
+    A batch of records that also remembers the slice of the id space it
+    covers: every package with after_id < id <= until_id is in the batch.
+    The checkpoint store records these spans to resume interrupted runs.
+    """
+    def __init__(self, records, after_id: int, until_id: int):
+        super().__init__(records)
+        self.after_id = after_id
+        self.until_id = until_id
 
-    Args:
-        db: The SQLAlchemy database session.
-        last_run_timestamp: The timestamp of the last successful pipeline run.
-        batch_size: The number of records to fetch in one batch.
+class PackageRecord:
+    """
+    A read-only stand-in for a Package built from plain Core rows.
 
-    Returns:
-        A list of Package objects with related data loaded.
+    It exposes the same column and relationship attributes (children are
+    SQLAlchemy Row tuples, ordered by id like the ORM relationships) and the
+    same to_text(), without identity-map bookkeeping or attribute
+    instrumentation.
     """
-    logger.info(f"Fetching records from packages table with related data")
+    __slots__ = _PACKAGE_COLUMNS + tuple(key for key, _ in _CHILD_TABLES)
 
+    def __init__(self, row, children: dict):
+        for key, value in zip(_PACKAGE_COLUMNS, row):
+            setattr(self, key, value)
+        for key, rows in children.items():
+            setattr(self, key, rows)
+
+    to_text = models.package_to_text
+
+def _package_query(db: Session):
+    """
+    Builds the base 'packages' query with all related tables eagerly loaded.
+    """
     # Use selectinload to efficiently load related data
-    query = db.query(models.Package).options(
+    return db.query(models.Package).options(
         selectinload(models.Package.moods),
         selectinload(models.Package.sub_moods),
         selectinload(models.Package.destinations),
@@ -38,7 +76,301 @@ def get_records_to_update(db: Session, last_run_timestamp: datetime, batch_size:
         selectinload(models.Package.transport_upgrades)
     )
 
-    records = query.limit(batch_size).all()
+def get_records_to_update(
+    db: Session,
+    batch_size: int,
+    after_id: int = 0,
+    until_id: Optional[int] = None,
+):
+    """
+    Fetches a batch of records from the 'packages' table with related data.
+    Since the schema does not have an updated_at column, we'll fetch records
+    without time-based filtering and page through the table by primary key.
+
+    Args:
+        db: The SQLAlchemy database session.
+        batch_size: The number of records to fetch in one batch.
+        after_id: Only packages with an id greater than this are returned.
+        until_id: If set, only packages with an id up to and including this
+                  are returned.
+
+    Returns:
+        A list of Package objects with related data loaded, ordered by id.
+    """
+    logger.info(f"Fetching records from packages table with related data (id > {after_id})")
+
+    query = _package_query(db).filter(models.Package.id > after_id)
+    if until_id is not None:
+        query = query.filter(models.Package.id <= until_id)
+    query = query.order_by(models.Package.id).limit(batch_size)
+
+    with metrics.timer("pipeline_extract_query_seconds"):
+        records = query.all()
+
+    metrics.inc("pipeline_extract_rows_total", len(records))
+    metrics.inc("pipeline_extract_child_rows_total", sum(
+        len(getattr(record, relationship.key))
+        for record in records
+        for relationship in models.Package.__mapper__.relationships
+    ))
 
     logger.info(f"Found {len(records)} records to process in this batch.")
     return records
+
+def get_package_rows(
+    db: Session,
+    batch_size: int,
+    after_id: int = 0,
+    until_id: Optional[int] = None,
+) -> list[PackageRecord]:
+    """
+    Fetches a batch of packages with SQLAlchemy Core instead of the ORM.
+
+    The packages are read with one keyset query, then each child table is
+    read with one ``package_id IN (...)`` query and its rows are grouped per
+    package. No mapped instances are created, which makes extraction much
+    cheaper in CPU and memory than get_records_to_update().
+
+    Args:
+        db: The SQLAlchemy database session.
+        batch_size: The number of packages to fetch.
+        after_id: Only packages with an id greater than this are returned.
+        until_id: If set, only packages with an id up to and including this
+                  are returned.
+
+    Returns:
+        A list of PackageRecord objects, ordered by id.
+    """
+    logger.info(f"Fetching records from packages table with related data (id > {after_id}, core)")
+    packages = models.Package.__table__
+
+    statement = select(*packages.columns).where(packages.c.id > after_id)
+    if until_id is not None:
+        statement = statement.where(packages.c.id <= until_id)
+
+    with metrics.timer("pipeline_extract_query_seconds"):
+        rows = db.execute(statement.order_by(packages.c.id).limit(batch_size)).all()
+
+        ids = [row.id for row in rows]
+        children = {package_id: {key: [] for key, _ in _CHILD_TABLES} for package_id in ids}
+        child_rows = 0
+        if ids:
+            for key, table in _CHILD_TABLES:
+                result = db.execute(
+                    select(table)
+                    .where(table.c.package_id.in_(ids))
+                    .order_by(table.c.package_id, table.c.id)
+                )
+                for child in result:
+                    children[child.package_id][key].append(child)
+                    child_rows += 1
+
+    records = [PackageRecord(row, children[row.id]) for row in rows]
+
+    metrics.inc("pipeline_extract_rows_total", len(records))
+    metrics.inc("pipeline_extract_child_rows_total", child_rows)
+
+    logger.info(f"Found {len(records)} records to process in this batch.")
+    return records
+
+def iter_record_batches(
+    db: Session,
+    batch_size: int,
+    after_id: int = 0,
+    mode: str = EXTRACTION_MODE,
+    until_id: Optional[int] = None,
+) -> Iterator[RecordBatch]:
+    """
+    Walks the 'packages' table in primary-key order and yields batches until
+    the table is exhausted.
+
+    Each batch is fetched with a keyset predicate (``id > last_seen_id``), so
+    the cost of a page does not grow with the position in the table. Once the
+    consumer asks for the next batch, the session's identity map is cleared so
+    memory stays flat across a full sync.
+
+    Args:
+        db: The SQLAlchemy database session.
+        batch_size: The number of records to fetch per batch.
+        after_id: Resume the walk after this package id.
+        mode: "orm" yields Package objects; "core" yields PackageRecord
+              objects built without ORM hydration (same to_text() output).
+        until_id: Stop the walk after this package id (inclusive).
+
+    Yields:
+        RecordBatch lists of Package (or PackageRecord) objects with related
+        data loaded.
+    """
+    if mode not in ("orm", "core"):
+        raise ValueError(f"Unknown extraction mode '{mode}'.")
+
+    last_seen_id = after_id
+    while True:
+        if mode == "core":
+            records = get_package_rows(db, batch_size, after_id=last_seen_id, until_id=until_id)
+        else:
+            records = get_records_to_update(db, batch_size, after_id=last_seen_id, until_id=until_id)
+        if not records:
+            return
+
+        # A short batch exhausts the walk, so it covers the rest of the range.
+        exhausted = len(records) < batch_size
+        covered_id = until_id if exhausted and until_id is not None else records[-1].id
+        batch = RecordBatch(records, last_seen_id, covered_id)
+
+        last_seen_id = records[-1].id
+        yield batch
+
+        # The consumer is done with this batch; drop it from the session.
+        db.expunge_all()
+
+        if exhausted:
+            return
+
+def get_id_ranges(db: Session, shards: int, after_id: int = 0) -> list[tuple[int, int]]:
+    """
+    Splits the ids of 'packages' above ``after_id`` into contiguous ranges of
+    equal width.
+
+    Args:
+        db: The SQLAlchemy database session.
+        shards: The maximum number of ranges.
+        after_id: Only ids greater than this are covered.
+
+    Returns:
+        (after_id, until_id) pairs: each range covers after_id < id <= until_id.
+    """
+    packages = models.Package.__table__
+    low, high = db.execute(
+        select(func.min(packages.c.id), func.max(packages.c.id)).where(packages.c.id > after_id)
+    ).one()
+    if low is None:
+        return []
+
+    width = -(-(high - low + 1) // max(1, shards))
+    return [(start - 1, min(start + width - 1, high)) for start in range(low, high + 1, width)]
+
+def iter_sharded_record_batches(
+    session_factory: Callable[[], Session],
+    batch_size: int,
+    shards: int,
+    after_id: int = 0,
+    mode: str = EXTRACTION_MODE,
+    queue_size: Optional[int] = None,
+    ranges: Optional[list[tuple[int, Optional[int]]]] = None,
+) -> Iterator[RecordBatch]:
+    """
+    Walks the 'packages' table as ``shards`` id ranges in parallel, each in
+    its own thread with its own session (and so its own pooled connection),
+    and yields batches as they arrive.
+
+    A full resync then overlaps the round-trips of several connections
+    instead of waiting on one. Batches are not yielded in global id order,
+    although each shard's batches are.
+
+    Args:
+        session_factory: Creates one session per shard (e.g.
+                         database.ReadSessionLocal).
+        batch_size: The number of records to fetch per batch.
+        shards: The number of id ranges read concurrently.
+        after_id: Only packages with an id greater than this are read.
+        mode: "orm" or "core", as for iter_record_batches().
+        queue_size: Batches buffered ahead of the consumer (default: two per
+                    shard).
+        ranges: (after_id, until_id) ranges to read instead of everything
+                above ``after_id``, e.g. the gaps left by an interrupted run.
+                An open-ended range (until_id None) is split into ``shards``
+                ranges.
+
+    Yields:
+        RecordBatch lists of Package (or PackageRecord) objects with related
+        data loaded.
+    """
+    db = session_factory()
+    try:
+        bounded = []
+        for range_after_id, range_until_id in ranges if ranges is not None else [(after_id, None)]:
+            if range_until_id is None:
+                bounded.extend(get_id_ranges(db, shards, range_after_id))
+            elif range_until_id > range_after_id:
+                bounded.append((range_after_id, range_until_id))
+    finally:
+        db.close()
+    ranges = bounded
+    if not ranges:
+        return
+
+    logger.info(f"Reading packages as {len(ranges)} id ranges with {shards} parallel sessions.")
+    batches = queue.Queue(maxsize=queue_size or 2 * len(ranges))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def walk(range_after_id: int, range_until_id: int):
+        shard_db = session_factory()
+        try:
+            for records in iter_record_batches(shard_db, batch_size, range_after_id, mode, until_id=range_until_id):
+                if not put(records):
+                    return
+        except BaseException as e:
+            put(e)
+        finally:
+            shard_db.close()
+            put(_SHARD_DONE)
+
+    executor = ThreadPoolExecutor(max_workers=min(shards, len(ranges)), thread_name_prefix="extract-shard")
+    try:
+        for range_after_id, range_until_id in ranges:
+            executor.submit(walk, range_after_id, range_until_id)
+
+        finished = 0
+        while finished < len(ranges):
+            item = batches.get()
+            if item is _SHARD_DONE:
+                finished += 1
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                yield item
+    finally:
+        # Also reached when the consumer abandons the generator early.
+        stop.set()
+        executor.shutdown(wait=True)
+
+def iter_range_batches(
+    db: Session,
+    batch_size: int,
+    ranges: list[tuple[int, Optional[int]]],
+    mode: str = EXTRACTION_MODE,
+) -> Iterator[RecordBatch]:
+    """
+    Walks several (after_id, until_id) ranges of the 'packages' table one
+    after another on a single session; until_id None means "to the end".
+    """
+    for range_after_id, range_until_id in ranges:
+        yield from iter_record_batches(db, batch_size, range_after_id, mode, until_id=range_until_id)
+
+def iter_id_batches(db: Session, package_ids: list[int], batch_size: int) -> Iterator[list]:
+    """
+    Yields the given packages, in id order, ``batch_size`` at a time, e.g. to
+    re-embed only the packages a reconciliation found missing or stale.
+    Unknown ids are skipped. Batches are plain lists of Package objects: they
+    do not cover a contiguous id span, so they are not checkpointed.
+    """
+    package_ids = sorted(set(package_ids))
+    for i in range(0, len(package_ids), batch_size):
+        chunk = package_ids[i:i + batch_size]
+        query = _package_query(db).filter(models.Package.id.in_(chunk)).order_by(models.Package.id)
+        with metrics.timer("pipeline_extract_query_seconds"):
+            records = query.all()
+        metrics.inc("pipeline_extract_rows_total", len(records))
+        if records:
+            yield records
+        db.expunge_all()
@@ -0,0 +1,136 @@
+import json
+import random
+import threading
+import time
+from typing import Optional
+import numpy as np
+from .vector_batch import VectorBatch
+from .vector_store import VectorStore
+
+class FakeIndexError(Exception):
+    """
+    An error raised by FakeIndex, carrying an HTTP-like status code the same
+    way the Pinecone client's exceptions do.
+    """
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"({status}) {reason}")
+        self.status = status
+
+class FakeIndex(VectorStore):
+    """
+    An in-memory stand-in for a Pinecone index that injects latency and
+    errors, so the Loader's concurrency and retry behaviour can be exercised
+    without a live service.
+    """
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        throttle_rate: float = 0.0,
+        error_rate: float = 0.0,
+        fail_ids: Optional[set[str]] = None,
+        seed: Optional[int] = None,
+        latency_per_mb: float = 0.0,
+        max_request_bytes: Optional[int] = None,
+    ):
+        """
+        Args:
+            latency: Seconds each upsert takes.
+            jitter: Extra random latency of up to this many seconds.
+            throttle_rate: Probability that an upsert is rejected with 429.
+            error_rate: Probability that an upsert fails with 503.
+            fail_ids: Ids that always make their batch fail with a
+                      non-retryable 400.
+            seed: Seed for the random error injection.
+            latency_per_mb: Extra seconds per MB of JSON request body.
+            max_request_bytes: Reject requests whose JSON body is larger
+                               with 413, like Pinecone's 2 MB limit.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.fail_ids = fail_ids or set()
+        self.latency_per_mb = latency_per_mb
+        self.max_request_bytes = max_request_bytes
+        self.vectors = {}
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors: list[dict], namespace: Optional[str] = None):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            roll = self._random.random()
+            delay = self.latency + self._random.uniform(0, self.jitter)
+        try:
+            if self.latency_per_mb or self.max_request_bytes:
+                # The body Pinecone's REST client would send.
+                request_bytes = len(json.dumps({"vectors": vectors, "namespace": namespace or ""}))
+                if self.max_request_bytes and request_bytes > self.max_request_bytes:
+                    raise FakeIndexError(413, "Request Entity Too Large")
+                delay += self.latency_per_mb * request_bytes / 1e6
+            time.sleep(delay)
+            if any(vector["id"] in self.fail_ids for vector in vectors):
+                raise FakeIndexError(400, "Bad Request")
+            if roll < self.throttle_rate:
+                raise FakeIndexError(429, "Too Many Requests")
+            if roll < self.throttle_rate + self.error_rate:
+                raise FakeIndexError(503, "Service Unavailable")
+            with self._lock:
+                for vector in vectors:
+                    self.vectors[vector["id"]] = vector
+            return {"upserted_count": len(vectors)}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def request_bytes(self, batch: VectorBatch) -> np.ndarray:
+        # Sized like the Pinecone requests this index stands in for.
+        return batch.json_bytes()
+
+    def fetch(self, ids: list[str], namespace: Optional[str] = None):
+        with self._lock:
+            return {"vectors": {id_: self.vectors[id_] for id_ in ids if id_ in self.vectors}}
+
+    def delete(self, ids: list[str], namespace: Optional[str] = None):
+        with self._lock:
+            for id_ in ids:
+                self.vectors.pop(id_, None)
+        return {}
+
+    def list_ids(self, prefix=None, page_size=1000, namespace=None):
+        with self._lock:
+            ids = sorted(id_ for id_ in self.vectors if id_.startswith(prefix or ""))
+        for i in range(0, len(ids), page_size):
+            yield ids[i:i + page_size]
+
+    def query(self, vector, top_k=10, include_values=False, include_metadata=True, filter=None, namespace=None):
+        with self._lock:
+            stored = list(self.vectors.values())
+        query = np.asarray(vector, dtype=np.float32)
+        scored = []
+        for item in stored:
+            values = np.asarray(item["values"], dtype=np.float32)
+            denominator = (np.linalg.norm(values) * np.linalg.norm(query)) or 1.0
+            scored.append((float(values @ query / denominator), item))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return {
+            "matches": [
+                {"id": item["id"], "score": score, "metadata": item.get("metadata", {})}
+                for score, item in scored[:top_k]
+            ]
+        }
+
+    def describe_index_stats(self):
+        with self._lock:
+            dimension = len(next(iter(self.vectors.values()))["values"]) if self.vectors else 0
+            return {
+                "dimension": dimension,
+                "total_vector_count": len(self.vectors),
+                "namespaces": {"": {"vector_count": len(self.vectors)}},
+            }
@@ -1,77 +1,305 @@
 import logging
-from pinecone import Pinecone, ServerlessSpec
-from .config import PINECONE_API_KEY, PINECONE_ENVIRONMENT, PINECONE_INDEX_NAME, BATCH_SIZE
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional, Union
+import numpy as np
+from .config import (
+    UPSERT_CONCURRENCY, UPSERT_MAX_RETRIES, UPSERT_BACKOFF_SECONDS, UPSERT_MAX_BACKOFF_SECONDS,
+    UPSERT_TRANSPORT_DTYPE, UPSERT_MAX_BYTES, UPSERT_MIN_BYTES, UPSERT_MAX_BATCH_SIZE, UPSERT_TARGET_LATENCY_SECONDS,
+)
+from .metrics import registry as metrics
+from .vector_batch import VectorBatch
+from .vector_store import VectorStore, get_vector_store
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# HTTP statuses that indicate throttling or a transient server-side failure.
+TRANSIENT_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Connection-level errors raised by urllib3 underneath the Pinecone client.
+TRANSIENT_ERROR_NAMES = {"MaxRetryError", "NewConnectionError", "ProtocolError", "ReadTimeoutError"}
+
+def _status(error: Exception) -> Optional[int]:
+    return getattr(error, "status", None) or getattr(error, "status_code", None)
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    Returns True if an upsert that failed with this error is worth retrying.
+    """
+    status = _status(error)
+    if status is not None:
+        return status in TRANSIENT_STATUSES
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+def pack_requests(vector_bytes: np.ndarray, max_bytes: int, max_vectors: int) -> list[tuple[int, int]]:
+    """
+    Splits a batch into consecutive requests of at most ``max_bytes`` of
+    estimated payload and ``max_vectors`` vectors. A vector larger than
+    ``max_bytes`` on its own is sent alone.
+
+    Args:
+        vector_bytes: Each vector's estimated payload bytes.
+
+    Returns:
+        (start, stop) index pairs.
+    """
+    spans = []
+    start = 0
+    ends = np.cumsum(vector_bytes)
+    while start < len(vector_bytes):
+        base = ends[start - 1] if start else 0
+        # The last vector that still fits under the byte limit, at least one.
+        stop = int(np.searchsorted(ends, base + max_bytes, side="right"))
+        stop = min(max(stop, start + 1), start + max_vectors)
+        spans.append((start, stop))
+        start = stop
+    return spans
+
+class UpsertTuner:
+    """
+    Adapts the payload size of upsert requests (additive increase,
+    multiplicative decrease).
+
+    Every request that succeeds within ``target_latency`` grows the byte
+    target by ``min_bytes``; a slow request shrinks it by a quarter, and a
+    throttled (429) or oversized (413) one halves it. An oversized request
+    also lowers ``max_bytes`` below its size, so the target does not climb
+    back to a size the store rejects. The target stays between
+    ``min_bytes`` and ``max_bytes`` and is exported as the
+    pipeline_upsert_target_bytes gauge.
+    """
+    def __init__(
+        self,
+        max_bytes: int = UPSERT_MAX_BYTES,
+        min_bytes: int = UPSERT_MIN_BYTES,
+        target_latency: float = UPSERT_TARGET_LATENCY_SECONDS,
+    ):
+        self.max_bytes = max_bytes
+        self.min_bytes = min(min_bytes, max_bytes)
+        self.target_latency = target_latency
+        self.target_bytes = max_bytes
+        self._lock = threading.Lock()
+        metrics.set("pipeline_upsert_target_bytes", self.target_bytes)
+
+    def _adjust(self, target: float, direction: str):
+        with self._lock:
+            previous = self.target_bytes
+            self.target_bytes = int(min(self.max_bytes, max(self.min_bytes, target(previous))))
+            if self.target_bytes != previous:
+                metrics.inc("pipeline_upsert_tuner_adjustments_total", direction=direction)
+                metrics.set("pipeline_upsert_target_bytes", self.target_bytes)
+
+    def succeeded(self, latency: float):
+        if latency > self.target_latency:
+            self._adjust(lambda target: target * 0.75, "down")
+        else:
+            self._adjust(lambda target: target + self.min_bytes, "up")
+
+    def throttled(self):
+        self._adjust(lambda target: target / 2, "down")
+
+    def too_large(self, request_bytes: int):
+        with self._lock:
+            self.max_bytes = max(self.min_bytes, min(self.max_bytes, int(request_bytes * 0.9)))
+        self.throttled()
+
+@dataclass
+class BatchResult:
+    """
+    The outcome of upserting one batch of vectors.
+    """
+    ids: list[str]
+    attempts: int = 0
+    latency: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+@dataclass
+class UpsertReport:
+    """
+    Per-batch results of an upsert call.
+    """
+    batches: list[BatchResult] = field(default_factory=list)
+
+    @property
+    def succeeded_ids(self) -> set[str]:
+        return {id_ for batch in self.batches if batch.succeeded for id_ in batch.ids}
+
+    @property
+    def failed_ids(self) -> set[str]:
+        return {id_ for batch in self.batches if not batch.succeeded for id_ in batch.ids}
+
+    @property
+    def retries(self) -> int:
+        return sum(max(batch.attempts - 1, 0) for batch in self.batches)
+
 class Loader:
     """
-    A class to handle loading data into a Pinecone index.
+    A class to handle loading data into a vector index (Pinecone or local).
     """
-    def __init__(self):
+    def __init__(
+        self,
+        index: Optional[VectorStore] = None,
+        concurrency: int = UPSERT_CONCURRENCY,
+        max_retries: int = UPSERT_MAX_RETRIES,
+        dimension: Optional[int] = None,
+        transport_dtype: str = UPSERT_TRANSPORT_DTYPE,
+        tuner: Optional[UpsertTuner] = None,
+        max_batch_size: int = UPSERT_MAX_BATCH_SIZE,
+    ):
         """
-        Initializes the Loader by connecting to Pinecone.
+        Initializes the Loader by connecting to the configured vector store.
+
+        Args:
+            index: A vector store to load into instead of the one selected by
+                   VECTOR_BACKEND (e.g. a FakeIndex for local testing).
+            concurrency: Number of upsert requests kept in flight.
+            max_retries: Number of retries for throttled or transient failures.
+            dimension: The embedding model's output dimension, used to create
+                       the index if it does not exist yet.
+            transport_dtype: Encoding of the values sent to the store:
+                             "float32", or "float16" / "int8" if the store
+                             accepts them (otherwise float32 is sent).
+            tuner: Chooses the payload bytes per request; defaults to an
+                   UpsertTuner with the UPSERT_* settings.
+            max_batch_size: Most vectors in one request.
         """
-        if not PINECONE_API_KEY or not PINECONE_ENVIRONMENT:
-            raise ValueError("PINECONE_API_KEY and PINECONE_ENVIRONMENT must be set.")
-            
-        logger.info("Initializing Pinecone connection...")
-        self.pc = Pinecone(api_key=PINECONE_API_KEY)
-        
-        self.index_name = PINECONE_INDEX_NAME
-        self.index = self._get_or_create_index()
-
-    def _get_or_create_index(self):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.tuner = tuner if tuner is not None else UpsertTuner()
+        self.max_batch_size = max(1, max_batch_size)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+        self.index = index if index is not None else get_vector_store(dimension=dimension)
+        self.transport_dtype = transport_dtype
+        if transport_dtype not in self.index.transport_dtypes:
+            logger.warning(
+                f"{type(self.index).__name__} does not accept {transport_dtype} vectors; sending float32 instead."
+            )
+            self.transport_dtype = "float32"
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="upsert")
+            return self._executor
+
+    def _backoff(self, attempt: int) -> float:
         """
-        Gets the Pinecone index, creating it if it doesn't exist.
+        Returns the delay before retry number ``attempt`` (exponential backoff
+        with full jitter).
         """
-        if self.index_name not in self.pc.list_indexes().names():
-            logger.info(f"Index '{self.index_name}' not found. Creating it...")
-            # Note: The dimension must match the output of the embedding model.
-            # 'all-roberta-large-v1' has a dimension of 1024.
-            self.pc.create_index(
-                name=self.index_name,
-                dimension=1024,
-                metric='cosine',
-                spec=ServerlessSpec(cloud='aws', region=PINECONE_ENVIRONMENT)
-            )
-            logger.info(f"Index '{self.index_name}' created successfully.")
+        ceiling = min(UPSERT_MAX_BACKOFF_SECONDS, UPSERT_BACKOFF_SECONDS * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def _upsert_batch(self, batch: VectorBatch, payload_bytes: int) -> list[BatchResult]:
+        """
+        Upserts one request, retrying throttled and transient failures. A
+        request the store rejects as too large (413) is split in half.
+        """
+        result = BatchResult(ids=list(batch.ids))
+        metrics.observe("pipeline_upsert_batch_vectors", len(batch))
+        metrics.observe("pipeline_upsert_request_bytes", payload_bytes)
+        start = time.perf_counter()
+        while True:
+            result.attempts += 1
+            if result.attempts > 1:
+                metrics.inc("pipeline_upsert_retries_total")
+            try:
+                metrics.inc("pipeline_upsert_bytes_total", payload_bytes)
+                attempt_start = time.perf_counter()
+                self.index.upsert_batch(batch)
+                self.tuner.succeeded(time.perf_counter() - attempt_start)
+                result.error = None
+                break
+            except Exception as e:
+                result.error = f"{type(e).__name__}: {e}"
+                status = _status(e)
+                if status == 413:
+                    self.tuner.too_large(payload_bytes)
+                elif status == 429:
+                    self.tuner.throttled()
+                if status == 413 and len(batch) > 1:
+                    logger.warning(f"Upsert of {len(batch)} vectors ({payload_bytes} bytes) was too large; splitting it.")
+                    half = len(batch) // 2
+                    return (
+                        self._upsert_batch(batch[:half], payload_bytes * half // len(batch))
+                        + self._upsert_batch(batch[half:], payload_bytes - payload_bytes * half // len(batch))
+                    )
+                if not is_transient_error(e) or result.attempts > self.max_retries:
+                    logger.error(f"Failed to upsert batch of {len(batch)} records after {result.attempts} attempts: {e}")
+                    break
+                delay = self._backoff(result.attempts)
+                logger.warning(f"Transient upsert failure ({e}); retrying in {delay:.2f}s.")
+                time.sleep(delay)
+
+        result.latency = time.perf_counter() - start
+        metrics.observe("pipeline_upsert_seconds", result.latency)
+        if result.succeeded:
+            metrics.inc("pipeline_upsert_vectors_total", len(batch))
         else:
-            logger.info(f"Found existing index '{self.index_name}'.")
-            
-        return self.pc.Index(self.index_name)
+            metrics.inc("pipeline_upsert_failed_vectors_total", len(batch))
+        return [result]
 
-    def upsert_data(self, transformed_data: list[dict]):
+    def upsert_data(self, transformed_data: Union[VectorBatch, list[dict]]) -> UpsertReport:
         """
-        Upserts a batch of transformed data into the Pinecone index.
+        Upserts a batch of transformed data into the vector index, keeping up
+        to ``concurrency`` requests in flight.
+
+        The batch is packed into requests of at most the tuner's current byte
+        target (and ``max_batch_size`` vectors), so large-metadata batches
+        stay under the request size limit and small vectors share requests.
 
         Args:
-            transformed_data: A list of dictionaries, where each dictionary contains
-                              the id, embedding, and metadata.
+            transformed_data: A VectorBatch from the Transformer, or a list of
+                              {"id", "embedding", "model_version", "metadata"}
+                              dictionaries.
+
+        Returns:
+            An UpsertReport with the outcome of every request, so callers know
+            exactly which ids failed.
         """
+        report = UpsertReport()
         if not transformed_data:
-            return
-
-        logger.info(f"Upserting {len(transformed_data)} records to Pinecone.")
-        
-        # Format data for Pinecone upsert
-        vectors_to_upsert = []
-        for item in transformed_data:
-            vectors_to_upsert.append({
-                "id": item["id"],
-                "values": item["embedding"],
-                "metadata": {"model_version": item["model_version"]}
-            })
-
-        # Upsert in batches
-        for i in range(0, len(vectors_to_upsert), BATCH_SIZE):
-            batch = vectors_to_upsert[i:i + BATCH_SIZE]
-            try:
-                self.index.upsert(vectors=batch)
-                logger.info(f"Successfully upserted batch of {len(batch)} records.")
-            except Exception as e:
-                logger.error(f"Failed to upsert batch: {e}")
-                # Optionally, add more robust error handling here (e.g., retries)
+            return report
 
-        logger.info("Upsert operation completed.")
+        logger.info(f"Upserting {len(transformed_data)} records to the vector index.")
+
+        if not isinstance(transformed_data, VectorBatch):
+            transformed_data = VectorBatch.from_items(transformed_data)
+        vectors = transformed_data.astype(self.transport_dtype)
+
+        # Pack requests by payload size; slices share the batch's arrays
+        vector_bytes = self.index.request_bytes(vectors)
+        spans = pack_requests(vector_bytes, self.tuner.target_bytes, self.max_batch_size)
+        futures = [
+            self._get_executor().submit(self._upsert_batch, vectors[start:stop], int(vector_bytes[start:stop].sum()))
+            for start, stop in spans
+        ]
+        report.batches = [result for future in futures for result in future.result()]
+
+        failed = report.failed_ids
+        logger.info(
+            f"Upsert operation completed: {len(transformed_data) - len(failed)} succeeded, "
+            f"{len(failed)} failed, {report.retries} retries."
+        )
+        return report
+
+    def close(self):
+        """
+        Shuts down the upsert thread pool.
+        """
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
@@ -0,0 +1,196 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import Callable, Optional
+from .chunking import package_document
+from .config import EMBEDDING_MODEL_NAME, MANIFEST_PATH, CHUNK_TOKENS
+from .metadata import metadata_fingerprint
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def content_hash(text: str, model_name: str = EMBEDDING_MODEL_NAME) -> str:
+    """
+    Returns the fingerprint of an embedding input: the text together with the
+    model that encodes it, so changing either one invalidates the entry.
+    """
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+def fingerprint_text(record, chunk_tokens: int = CHUNK_TOKENS) -> str:
+    """
+    Returns what the manifest hashes for a package: the text that gets
+    embedded (the full document when chunking, since it includes every tour
+    plan) and the metadata stored with its vectors, so e.g. a changed
+    accessibility flag is upserted again.
+    """
+    text = package_document(record) if chunk_tokens > 0 else record.to_text()
+    return f"{text}\n{metadata_fingerprint(record)}"
+
+def package_fingerprint(record, model_name: str = EMBEDDING_MODEL_NAME, chunk_tokens: int = CHUNK_TOKENS) -> str:
+    """
+    Returns a package's content hash as the manifest records it and as it is
+    stored in its vectors' metadata (``content_hash``).
+    """
+    return content_hash(fingerprint_text(record, chunk_tokens), model_name)
+
+class EmbeddingManifest:
+    """
+    A persistent SQLite manifest mapping package ids to the content hash of
+    the text that was last embedded and upserted for them.
+
+    Since the schema has no updated_at column, this is how the pipeline tells
+    which packages actually need to be re-embedded.
+    """
+    def __init__(self, path: str = MANIFEST_PATH, model_name: str = EMBEDDING_MODEL_NAME):
+        """
+        Opens (or creates) the manifest database.
+        """
+        self.path = path
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS manifest (
+                package_id INTEGER PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                model_name TEXT NOT NULL,
+                updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                chunks INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        # Manifests written before chunking existed lack the chunk count.
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(manifest)")]
+        if "chunks" not in columns:
+            self._conn.execute("ALTER TABLE manifest ADD COLUMN chunks INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+        logger.info(f"Opened embedding manifest at '{path}'.")
+
+    def select_changed(
+        self, records: list, text_of: Optional[Callable] = None, force: bool = False
+    ) -> tuple[list, dict[int, str]]:
+        """
+        Splits a batch into the records whose content changed (or that are new)
+        and computes their new hashes.
+
+        Args:
+            records: A list of Package objects.
+            text_of: Builds the content to hash; defaults to fingerprint_text().
+            force: Treat every record as changed, e.g. to repair vectors that
+                   are missing from the index although the manifest has them.
+
+        Returns:
+            A tuple of (changed records, {package id: new content hash}).
+        """
+        if not records:
+            return [], {}
+
+        text_of = text_of or fingerprint_text
+        hashes = {record.id: content_hash(text_of(record), self.model_name) for record in records}
+        if force:
+            return list(records), hashes
+        ids = list(hashes)
+        stored = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit.
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                stored.update(self._conn.execute(
+                    f"SELECT package_id, content_hash FROM manifest WHERE package_id IN ({placeholders})",
+                    chunk,
+                ).fetchall())
+
+        changed = [record for record in records if stored.get(record.id) != hashes[record.id]]
+        return changed, {record.id: hashes[record.id] for record in changed}
+
+    def chunk_counts(self, package_ids: list[int]) -> dict[int, int]:
+        """
+        Returns the number of chunk vectors stored for each known package
+        (0 for a single, unchunked vector); unknown packages are left out.
+        """
+        counts = {}
+        with self._lock:
+            for i in range(0, len(package_ids), 500):
+                chunk = package_ids[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                counts.update(self._conn.execute(
+                    f"SELECT package_id, chunks FROM manifest WHERE package_id IN ({placeholders})",
+                    chunk,
+                ).fetchall())
+        return counts
+
+    def commit(self, hashes: dict[int, str], chunk_counts: Optional[dict[int, int]] = None):
+        """
+        Records the hashes of packages whose vectors were successfully upserted.
+
+        Args:
+            hashes: A mapping of package id to content hash.
+            chunk_counts: The number of chunk vectors written per package;
+                          packages left out were written as a single vector.
+        """
+        if not hashes:
+            return
+
+        chunk_counts = chunk_counts or {}
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO manifest (package_id, content_hash, model_name, updated_at, chunks)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?)
+                ON CONFLICT(package_id) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    model_name = excluded.model_name,
+                    updated_at = excluded.updated_at,
+                    chunks = excluded.chunks
+                """,
+                [
+                    (package_id, digest, self.model_name, chunk_counts.get(package_id, 0))
+                    for package_id, digest in hashes.items()
+                ],
+            )
+            self._conn.commit()
+
+    def iter_entries(self, batch_size: int = 1000):
+        """
+        Yields the recorded packages in id order, a batch at a time.
+
+        Yields:
+            Tuples of ({package id: content hash}, {package id: chunk count}).
+        """
+        after_id = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT package_id, content_hash, chunks FROM manifest WHERE package_id > ? ORDER BY package_id LIMIT ?",
+                    (after_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            yield {row[0]: row[1] for row in rows}, {row[0]: row[2] for row in rows}
+            after_id = rows[-1][0]
+
+    def forget(self, package_ids: list[int]):
+        """
+        Removes packages from the manifest, e.g. after their vectors were
+        deleted, so they are embedded again if they ever come back.
+        """
+        if not package_ids:
+            return
+
+        with self._lock:
+            self._conn.executemany("DELETE FROM manifest WHERE package_id = ?", [(package_id,) for package_id in package_ids])
+            self._conn.commit()
+
+    def close(self):
+        """
+        Closes the underlying SQLite connection.
+        """
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,122 @@
+import json
+import logging
+import re
+from typing import Optional
+from .config import METADATA_MAX_BYTES
+from .metrics import registry as metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Longest string and list kept for any single metadata field.
+MAX_STRING_CHARS = 500
+MAX_LIST_ITEMS = 50
+
+# Keys the size guard never drops: they identify the vector and its content.
+_REQUIRED_KEYS = ("model_version", "content_hash", "package_id", "chunk", "chunk_count")
+
+# Keys dropped, in this order, when trimming lists is not enough.
+_DROP_ORDER = ("url", "name", "months", "years", "types", "moods", "destinations")
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+def _parse_number(value) -> Optional[float]:
+    """
+    Extracts the first number from a free-text column like "$1,250.00" or
+    "7 days", or returns None.
+    """
+    if value is None:
+        return None
+    match = _NUMBER.search(str(value).replace(",", ""))
+    return float(match.group()) if match else None
+
+def _strings(values) -> list[str]:
+    """
+    Returns distinct, non-empty strings in their original order, bounded in
+    count and length.
+    """
+    seen = []
+    for value in values:
+        if value is None:
+            continue
+        value = str(value).strip()[:MAX_STRING_CHARS]
+        if value and value not in seen:
+            seen.append(value)
+            if len(seen) >= MAX_LIST_ITEMS:
+                break
+    return seen
+
+def package_metadata(record) -> dict:
+    """
+    Builds the filterable metadata stored with a package's vectors.
+
+    Only types Pinecone can filter on are used (strings, numbers, booleans
+    and lists of strings); missing values are left out rather than stored
+    as null, which the index rejects.
+
+    Args:
+        record: A Package or extractor.PackageRecord.
+
+    Returns:
+        A dict such as {"destinations": ["Paris"], "base_price": 1250.0,
+        "child_friendly": True, ...}.
+    """
+    metadata = {
+        "name": (record.name or "")[:MAX_STRING_CHARS],
+        "url": (record.pkgURL or "")[:MAX_STRING_CHARS],
+        "destinations": _strings(destination.destination for destination in record.destinations),
+        "moods": _strings(mood.mood for mood in record.moods),
+        "types": _strings(type.type for type in record.types),
+        "months": _strings(month.month for month in record.months),
+        "years": _strings(year.year for year in record.years),
+        "base_price": _parse_number(record.basePrice),
+        "duration_days": _parse_number(record.numberOfDays),
+        "child_friendly": record.isChildFriendly,
+        "accessible": record.isHandicapAccessible,
+    }
+    return {key: value for key, value in metadata.items() if value not in (None, "", [])}
+
+def metadata_size(metadata: dict) -> int:
+    """
+    Returns the size of the metadata as JSON, which is how Pinecone counts
+    it against its per-vector limit.
+    """
+    return len(json.dumps(metadata, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+def limit_metadata_size(metadata: dict, max_bytes: int = METADATA_MAX_BYTES) -> dict:
+    """
+    Returns the metadata shrunk to at most ``max_bytes``.
+
+    The longest lists are trimmed first, then optional fields are dropped in
+    _DROP_ORDER; the keys that identify the vector are always kept.
+    """
+    if metadata_size(metadata) <= max_bytes:
+        return metadata
+
+    limited = dict(metadata)
+    while metadata_size(limited) > max_bytes:
+        lists = [key for key, value in limited.items() if isinstance(value, list) and len(value) > 1]
+        if lists:
+            longest = max(lists, key=lambda key: len(limited[key]))
+            limited[longest] = limited[longest][:len(limited[longest]) // 2]
+            continue
+        droppable = [key for key in _DROP_ORDER if key in limited]
+        droppable += [key for key in limited if key not in _REQUIRED_KEYS and key not in droppable]
+        if not droppable:
+            break
+        del limited[droppable[0]]
+
+    metrics.inc("pipeline_metadata_truncated_total")
+    logger.warning(
+        f"Metadata of {metadata_size(metadata)} bytes exceeds {max_bytes}; "
+        f"trimmed to {metadata_size(limited)} bytes."
+    )
+    return limited
+
+def metadata_fingerprint(record) -> str:
+    """
+    Returns a stable string form of a package's metadata for the change
+    manifest, so edits to fields that are not part of the embedded text
+    (e.g. the accessibility flag) still trigger an upsert.
+    """
+    return json.dumps(package_metadata(record), sort_keys=True)
@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Every metric the pipeline reports: name -> (type, help).
+# "summary" metrics keep a bounded window of observations for quantiles.
+METRICS = {
+    "pipeline_extract_query_seconds": ("summary", "Time to run one extraction query, child tables included."),
+    "pipeline_extract_rows_total": ("counter", "Packages read from MySQL."),
+    "pipeline_extract_child_rows_total": ("counter", "Related-table rows loaded alongside packages."),
+    "pipeline_skipped_rows_total": ("counter", "Packages skipped because their content hash was unchanged."),
+    "pipeline_to_text_seconds": ("summary", "Time to build the embedding text for one batch."),
+    "pipeline_encode_seconds": ("summary", "Time to encode one batch with the embedding model."),
+    "pipeline_encode_texts_total": ("counter", "Texts run through the embedding model."),
+    "pipeline_encode_tokens_total": ("counter", "Tokens run through the embedding model (counted with EMBEDDING_TOKEN_BUDGET set)."),
+    "pipeline_encode_tokens_per_second": ("gauge", "Encoding throughput of the most recent batch."),
+    "pipeline_embedding_cache_hits_total": ("counter", "Embedding cache hits."),
+    "pipeline_embedding_cache_misses_total": ("counter", "Embedding cache misses."),
+    "pipeline_upsert_seconds": ("summary", "Latency of one upsert request, retries included."),
+    "pipeline_upsert_vectors_total": ("counter", "Vectors upserted successfully."),
+    "pipeline_upsert_failed_vectors_total": ("counter", "Vectors whose upsert failed after all retries."),
+    "pipeline_upsert_bytes_total": ("counter", "Estimated upsert payload bytes sent."),
+    "pipeline_upsert_retries_total": ("counter", "Upsert retries after throttling or transient errors."),
+    "pipeline_upsert_target_bytes": ("gauge", "Payload bytes per upsert request currently chosen by the tuner."),
+    "pipeline_upsert_tuner_adjustments_total": ("counter", "Changes of the upsert byte target, by direction."),
+    "pipeline_upsert_batch_vectors": ("summary", "Vectors per upsert request."),
+    "pipeline_upsert_request_bytes": ("summary", "Estimated payload bytes per upsert request."),
+    "pipeline_metadata_truncated_total": ("counter", "Vectors whose metadata was trimmed to fit the per-vector size limit."),
+    "pipeline_chunks_total": ("counter", "Chunk vectors produced from chunked package documents."),
+    "pipeline_stale_chunks_deleted_total": ("counter", "Leftover chunk vectors deleted after a package got fewer chunks."),
+    "pipeline_deleted_vectors_total": ("counter", "Vectors deleted because their package no longer exists in MySQL."),
+    "pipeline_export_rows_total": ("counter", "Vectors written to bulk-export Parquet files."),
+    "pipeline_export_files_total": ("counter", "Bulk-export Parquet files completed."),
+    "pipeline_import_rows_total": ("counter", "Vectors loaded from bulk-export Parquet files."),
+    "pipeline_query_seconds": ("summary", "Query service latency of one search, embedding and vector store query included."),
+    "pipeline_query_encode_seconds": ("summary", "Time to encode one micro-batch of query texts."),
+    "pipeline_query_batch_size": ("summary", "Distinct query texts per micro-batch."),
+    "pipeline_query_cache_hits_total": ("counter", "Query embeddings served from the query cache."),
+    "pipeline_query_cache_misses_total": ("counter", "Query embeddings that had to be encoded."),
+    "pipeline_query_errors_total": ("counter", "Query service requests that failed."),
+    "pipeline_queue_depth": ("gauge", "Batches waiting in front of a pipeline stage."),
+    "pipeline_run_seconds": ("gauge", "Duration of the last pipeline run."),
+}
+
+# Number of observations kept per summary for quantile estimates.
+_WINDOW = 2048
+
+class MetricsRegistry:
+    """
+    A small thread-safe metrics registry.
+
+    Metrics are exposed in the Prometheus text format (as a textfile for the
+    node exporter's textfile collector, or over HTTP) and as a JSON summary.
+    """
+    def __init__(self, definitions: dict = METRICS):
+        self.definitions = definitions
+        self._lock = threading.Lock()
+        self._values = {}
+        self._summaries = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return (name, tuple(sorted(labels.items())))
+
+    def _check(self, name: str, kind: str):
+        if self.definitions[name][0] != kind:
+            raise ValueError(f"Metric '{name}' is a {self.definitions[name][0]}, not a {kind}.")
+
+    def inc(self, name: str, value: float = 1, **labels):
+        self._check(name, "counter")
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        self._check(name, "gauge")
+        with self._lock:
+            self._values[self._key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        self._check(name, "summary")
+        key = self._key(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = {"count": 0, "sum": 0.0, "window": deque(maxlen=_WINDOW)}
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["window"].append(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """
+        Observes the duration of the wrapped block, in seconds.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+            self._summaries.clear()
+
+    def snapshot(self) -> dict:
+        """
+        Returns every metric as plain data: counters and gauges as values,
+        summaries as count, sum, mean, p50 and p99.
+        """
+        result = {}
+        with self._lock:
+            for (name, labels), value in self._values.items():
+                result.setdefault(name, []).append({"labels": dict(labels), "value": value})
+            for (name, labels), summary in self._summaries.items():
+                window = np.fromiter(summary["window"], dtype=float)
+                result.setdefault(name, []).append({
+                    "labels": dict(labels),
+                    "count": summary["count"],
+                    "sum": summary["sum"],
+                    "mean": summary["sum"] / summary["count"],
+                    "p50": float(np.percentile(window, 50)),
+                    "p99": float(np.percentile(window, 99)),
+                })
+        return result
+
+    def render_prometheus(self) -> str:
+        """
+        Renders all metrics in the Prometheus text exposition format.
+        """
+        def label_text(labels: dict, extra: dict = None) -> str:
+            merged = {**labels, **(extra or {})}
+            if not merged:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(merged.items())) + "}"
+
+        lines = []
+        for name, samples in sorted(self.snapshot().items()):
+            kind, help_text = self.definitions[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample in samples:
+                if kind == "summary":
+                    lines.append(f"{name}{label_text(sample['labels'], {'quantile': '0.5'})} {sample['p50']}")
+                    lines.append(f"{name}{label_text(sample['labels'], {'quantile': '0.99'})} {sample['p99']}")
+                    lines.append(f"{name}_sum{label_text(sample['labels'])} {sample['sum']}")
+                    lines.append(f"{name}_count{label_text(sample['labels'])} {sample['count']}")
+                else:
+                    lines.append(f"{name}{label_text(sample['labels'])} {sample['value']}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """
+        Atomically writes the Prometheus exposition to a file.
+        """
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            f.write(self.render_prometheus())
+        os.replace(temporary, path)
+
+    def write_summary(self, path: str, extra: dict = None):
+        """
+        Writes a JSON run summary containing every metric plus ``extra``.
+        """
+        with open(path, "w") as f:
+            json.dump({**(extra or {}), "metrics": self.snapshot()}, f, indent=2)
+
+    def start_http_server(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """
+        Serves /metrics (Prometheus text) and /summary (JSON) from a daemon thread.
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = registry.render_prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == "/summary":
+                    body = json.dumps(registry.snapshot()).encode("utf-8")
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return server
+
+# The process-wide registry used by the pipeline modules.
+registry = MetricsRegistry()
@@ -1,9 +1,93 @@
+from typing import Optional
 from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, TIMESTAMP, ForeignKey
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.sql import func
 
 Base = declarative_base()
 
+def package_to_text(package, max_tour_plans: Optional[int] = 3) -> str:
+    """
+    Concatenates relevant text fields into a single string for embedding.
+
+    Works on anything with Package's column and relationship attributes, so
+    the ORM model and the lightweight rows built by the Core extraction path
+    produce byte-identical text.
+
+    Args:
+        package: A Package or extractor.PackageRecord.
+        max_tour_plans: Tour plans to include; None includes all of them
+                        (used when documents are chunked).
+    """
+    parts = [
+        f"Package: {package.name}",
+        f"URL: {package.pkgURL}",
+        f"Duration: {package.numberOfDays}",
+        f"Details: {package.tourDetail}",
+        f"Age Range: {package.ageRange}",
+        f"Promotion: {package.promotionPercentage}",
+        f"Group Size: {package.groupSize}",
+        f"Base Price: {package.basePrice}",
+    ]
+
+    # Add related data if available
+    if package.moods:
+        mood_list = [mood.mood for mood in package.moods if mood.mood]
+        if mood_list:
+            parts.append(f"Moods: {', '.join(mood_list)}")
+
+    if package.destinations:
+        dest_list = [dest.destination for dest in package.destinations if dest.destination]
+        if dest_list:
+            parts.append(f"Destinations: {', '.join(dest_list)}")
+
+    if package.types:
+        type_list = [type.type for type in package.types if type.type]
+        if type_list:
+            parts.append(f"Types: {', '.join(type_list)}")
+
+    if package.days:
+        day_list = [day.day for day in package.days if day.day]
+        if day_list:
+            parts.append(f"Available Days: {', '.join(day_list)}")
+
+    if package.months:
+        month_list = [month.month for month in package.months if month.month]
+        if month_list:
+            parts.append(f"Available Months: {', '.join(month_list)}")
+
+    if package.years:
+        year_list = [year.year for year in package.years if year.year]
+        if year_list:
+            parts.append(f"Available Years: {', '.join(year_list)}")
+
+    if package.tour_plans:
+        plan_list = [f"{plan.dayNumber}: {plan.detail}" for plan in package.tour_plans if plan.detail]
+        if plan_list:
+            parts.append(f"Tour Plans: {'; '.join(plan_list[:max_tour_plans])}")  # Limit to first 3 by default to avoid too much text
+
+    if package.meals:
+        meal_list = [f"{meal.mealType}: {meal.detail}" for meal in package.meals if meal.detail]
+        if meal_list:
+            parts.append(f"Meals: {'; '.join(meal_list)}")
+
+    if package.transportations:
+        transport_list = [f"{transport.mode}: {transport.detail}" for transport in package.transportations if transport.detail]
+        if transport_list:
+            parts.append(f"Transportation: {'; '.join(transport_list)}")
+
+    if package.transport_upgrades:
+        upgrade_list = [f"{upgrade.upgradeType}: {upgrade.detail}" for upgrade in package.transport_upgrades if upgrade.detail]
+        if upgrade_list:
+            parts.append(f"Transportation Upgrades: {'; '.join(upgrade_list)}")
+
+    if package.prices:
+        price_list = [f"{price.rangeTitle}: ${price.price}" for price in package.prices if price.rangeTitle and price.price]
+        if price_list:
+            parts.append(f"Prices: {'; '.join(price_list)}")
+
+    return "\n".join(part for part in parts if part and str(part).strip() != "None" and str(part).strip() != ":")
+
+
 class Package(Base):
     """
     SQLAlchemy model for the 'packages' table.
@@ -25,92 +109,26 @@ class Package(Base):
     basePrice = Column(String(100))
     singleSupplementPrc = Column(String(100))
 
-    # Relationships to related tables
-    moods = relationship("PackageMood", back_populates="package", lazy="select")
-    sub_moods = relationship("SubMood", back_populates="package", lazy="select")
-    destinations = relationship("Destination", back_populates="package", lazy="select")
-    days = relationship("PkgDay", back_populates="package", lazy="select")
-    months = relationship("PkgMonth", back_populates="package", lazy="select")
-    years = relationship("PkgYear", back_populates="package", lazy="select")
-    types = relationship("PkgType", back_populates="package", lazy="select")
-    tour_plans = relationship("TourPlan", back_populates="package", lazy="select")
-    prices = relationship("NumberTravelerPrice", back_populates="package", lazy="select")
-    meals = relationship("MealSummary", back_populates="package", lazy="select")
-    transportations = relationship("Transportation", back_populates="package", lazy="select")
-    transport_upgrades = relationship("TransportationUpgrade", back_populates="package", lazy="select")
+    # Relationships to related tables. Children are ordered by id so that
+    # to_text() is deterministic and its content hash is stable between runs.
+    moods = relationship("PackageMood", back_populates="package", lazy="select", order_by="PackageMood.id")
+    sub_moods = relationship("SubMood", back_populates="package", lazy="select", order_by="SubMood.id")
+    destinations = relationship("Destination", back_populates="package", lazy="select", order_by="Destination.id")
+    days = relationship("PkgDay", back_populates="package", lazy="select", order_by="PkgDay.id")
+    months = relationship("PkgMonth", back_populates="package", lazy="select", order_by="PkgMonth.id")
+    years = relationship("PkgYear", back_populates="package", lazy="select", order_by="PkgYear.id")
+    types = relationship("PkgType", back_populates="package", lazy="select", order_by="PkgType.id")
+    tour_plans = relationship("TourPlan", back_populates="package", lazy="select", order_by="TourPlan.id")
+    prices = relationship("NumberTravelerPrice", back_populates="package", lazy="select", order_by="NumberTravelerPrice.id")
+    meals = relationship("MealSummary", back_populates="package", lazy="select", order_by="MealSummary.id")
+    transportations = relationship("Transportation", back_populates="package", lazy="select", order_by="Transportation.id")
+    transport_upgrades = relationship("TransportationUpgrade", back_populates="package", lazy="select", order_by="TransportationUpgrade.id")
 
     def to_text(self):
         """
         Concatenates relevant text fields into a single string for embedding.
         """
-        parts = [
-            f"Package: {self.name}",
-            f"URL: {self.pkgURL}",
-            f"Duration: {self.numberOfDays}",
-            f"Details: {self.tourDetail}",
-            f"Age Range: {self.ageRange}",
-            f"Promotion: {self.promotionPercentage}",
-            f"Group Size: {self.groupSize}",
-            f"Base Price: {self.basePrice}",
-        ]
-
-        # Add related data if available
-        if self.moods:
-            mood_list = [mood.mood for mood in self.moods if mood.mood]
-            if mood_list:
-                parts.append(f"Moods: {', '.join(mood_list)}")
-
-        if self.destinations:
-            dest_list = [dest.destination for dest in self.destinations if dest.destination]
-            if dest_list:
-                parts.append(f"Destinations: {', '.join(dest_list)}")
-
-        if self.types:
-            type_list = [type.type for type in self.types if type.type]
-            if type_list:
-                parts.append(f"Types: {', '.join(type_list)}")
-
-        if self.days:
-            day_list = [day.day for day in self.days if day.day]
-            if day_list:
-                parts.append(f"Available Days: {', '.join(day_list)}")
-
-        if self.months:
-            month_list = [month.month for month in self.months if month.month]
-            if month_list:
-                parts.append(f"Available Months: {', '.join(month_list)}")
-
-        if self.years:
-            year_list = [year.year for year in self.years if year.year]
-            if year_list:
-                parts.append(f"Available Years: {', '.join(year_list)}")
-
-        if self.tour_plans:
-            plan_list = [f"{plan.dayNumber}: {plan.detail}" for plan in self.tour_plans if plan.detail]
-            if plan_list:
-                parts.append(f"Tour Plans: {'; '.join(plan_list[:3])}")  # Limit to first 3 to avoid too much text
-
-        if self.meals:
-            meal_list = [f"{meal.mealType}: {meal.detail}" for meal in self.meals if meal.detail]
-            if meal_list:
-                parts.append(f"Meals: {'; '.join(meal_list)}")
-
-        if self.transportations:
-            transport_list = [f"{transport.mode}: {transport.detail}" for transport in self.transportations if transport.detail]
-            if transport_list:
-                parts.append(f"Transportation: {'; '.join(transport_list)}")
-
-        if self.transport_upgrades:
-            upgrade_list = [f"{upgrade.upgradeType}: {upgrade.detail}" for upgrade in self.transport_upgrades if upgrade.detail]
-            if upgrade_list:
-                parts.append(f"Transportation Upgrades: {'; '.join(upgrade_list)}")
-
-        if self.prices:
-            price_list = [f"{price.rangeTitle}: ${price.price}" for price in self.prices if price.rangeTitle and price.price]
-            if price_list:
-                parts.append(f"Prices: {'; '.join(price_list)}")
-
-        return "\n".join(part for part in parts if part and str(part).strip() != "None" and str(part).strip() != ":")
+        return package_to_text(self)
 
 
 class PackageMood(Base):
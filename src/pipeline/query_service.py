@@ -0,0 +1,377 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import numpy as np
+from .backends import load_model
+from .chunking import package_key
+from .config import (
+    EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND, QUERY_SERVICE_HOST, QUERY_SERVICE_PORT, QUERY_MAX_BATCH_SIZE,
+    QUERY_MAX_WAIT_MS, QUERY_CACHE_SIZE, QUERY_FANOUT_WORKERS, VECTOR_BACKEND, INDEX_ALIAS_PATH, INDEX_ALIAS_POLL_SECONDS,
+)
+from .embedding_cache import cache_key
+from .metrics import registry as metrics
+from .vector_store import VectorStore, get_vector_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Marks the end of the request stream for the batching thread.
+_STOP = object()
+
+class QueryEmbedder:
+    """
+    Embeds query texts with a resident model, coalescing concurrent requests.
+
+    Callers block in embed(); a single background thread collects the texts
+    that arrive within ``max_wait_ms`` of the first one (up to
+    ``max_batch_size``) and encodes them with one model call. Embeddings are
+    kept in an in-memory LRU cache, so repeated queries skip the model.
+    """
+    def __init__(
+        self,
+        model,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        max_batch_size: int = QUERY_MAX_BATCH_SIZE,
+        max_wait_ms: float = QUERY_MAX_WAIT_MS,
+        cache_size: int = QUERY_CACHE_SIZE,
+    ):
+        self.model = model
+        self.model_name = model_name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="query-embedder", daemon=True)
+        self._thread.start()
+
+    def _cached(self, key: str) -> Optional[np.ndarray]:
+        with self._cache_lock:
+            embedding = self._cache.get(key)
+            if embedding is not None:
+                self._cache.move_to_end(key)
+            return embedding
+
+    def _remember(self, key: str, embedding: np.ndarray):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = embedding
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _collect(self, first) -> list:
+        """
+        Returns the first request plus whatever arrives before the batch is
+        full or the wait expires.
+        """
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is _STOP:
+                self._requests.put(_STOP)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._requests.get()
+            if first is _STOP:
+                return
+            batch = self._collect(first)
+
+            # Identical texts arriving together are encoded once.
+            texts = list(dict.fromkeys(text for _, text, _ in batch))
+            try:
+                start = time.perf_counter()
+                embeddings = np.asarray(self.model.encode(texts, batch_size=len(texts)), dtype=np.float32)
+                metrics.observe("pipeline_query_encode_seconds", time.perf_counter() - start)
+                metrics.observe("pipeline_query_batch_size", len(texts))
+            except Exception as e:
+                logger.error(f"Failed to encode {len(texts)} queries: {e}")
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            by_text = dict(zip(texts, embeddings))
+            for key, text, future in batch:
+                self._remember(key, by_text[text])
+                future.set_result(by_text[text])
+
+    def embed(self, text: str) -> np.ndarray:
+        """
+        Returns the embedding of a query text, waiting for its batch if it is
+        not cached.
+        """
+        key = cache_key(self.model_name, text)
+        embedding = self._cached(key)
+        if embedding is not None:
+            metrics.inc("pipeline_query_cache_hits_total")
+            return embedding
+
+        metrics.inc("pipeline_query_cache_misses_total")
+        future = Future()
+        self._requests.put((key, text, future))
+        return future.result()
+
+    def close(self):
+        self._requests.put(_STOP)
+        self._thread.join()
+
+def collapse_chunks(matches: list[dict], top_k: int) -> list[dict]:
+    """
+    Keeps the best-scoring match of each package, so chunked packages
+    ("<package id>#<n>") are returned once. Matches must be sorted by score.
+    """
+    seen = set()
+    collapsed = []
+    for match in matches:
+        key = package_key(match["id"])
+        if key in seen:
+            continue
+        seen.add(key)
+        collapsed.append(match)
+        if len(collapsed) >= top_k:
+            break
+    return collapsed
+
+class QueryService:
+    """
+    A long-lived semantic search service: the embedding model and the vector
+    store connection are loaded once and shared by every request.
+    """
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        backend: str = EMBEDDING_BACKEND,
+        store: Optional[VectorStore] = None,
+        embedder: Optional[QueryEmbedder] = None,
+        fanout_workers: int = QUERY_FANOUT_WORKERS,
+        alias_poll_seconds: float = INDEX_ALIAS_POLL_SECONDS,
+    ):
+        """
+        Args:
+            model_name: The sentence-transformers model the index was built with.
+            backend: The inference backend, see pipeline.backends.
+            store: The vector store to query; defaults to VECTOR_BACKEND's.
+            embedder: A ready QueryEmbedder (mainly for tests).
+            fanout_workers: Vector store queries run concurrently for
+                            multi-query requests.
+            alias_poll_seconds: How often the index alias is checked for a
+                                switch; 0 disables it. Only applies when
+                                neither store nor embedder is given.
+        """
+        follow_alias = store is None and embedder is None and alias_poll_seconds > 0 and bool(INDEX_ALIAS_PATH)
+        if embedder is None:
+            logger.info(f"Loading query model: {model_name} ({backend} backend)")
+            embedder = QueryEmbedder(load_model(model_name, backend), model_name)
+        self.backend = backend
+        # Searches read the (embedder, store) pair once, so an alias switch swaps both atomically.
+        self._active = (embedder, store if store is not None else get_vector_store())
+        self._executor = ThreadPoolExecutor(max_workers=max(1, fanout_workers), thread_name_prefix="query")
+
+        self._stop = threading.Event()
+        self._watcher = None
+        if follow_alias:
+            self._watcher = threading.Thread(
+                target=self._follow_alias, args=(alias_poll_seconds,), name="index-alias", daemon=True
+            )
+            self._watcher.start()
+
+    @property
+    def embedder(self) -> QueryEmbedder:
+        return self._active[0]
+
+    @property
+    def store(self) -> VectorStore:
+        return self._active[1]
+
+    def _follow_alias(self, poll_seconds: float):
+        """
+        Watches the index alias and, when a reindex switches it, opens the new
+        index (and loads the new model, if it changed) before swapping them
+        in. The old index keeps serving until the swap; it is closed one poll
+        later, once searches that started before the swap have finished.
+        """
+        from .reindex import read_alias
+
+        def modified() -> Optional[float]:
+            try:
+                return os.path.getmtime(INDEX_ALIAS_PATH)
+            except OSError:
+                return None
+
+        seen = modified()
+        retired = []
+        while not self._stop.wait(poll_seconds):
+            for embedder, store in retired:
+                if embedder is not self.embedder:
+                    embedder.close()
+                if store is not self.store and hasattr(store, "close"):
+                    store.close()
+            retired = []
+
+            mtime = modified()
+            if mtime is None or mtime == seen:
+                continue
+            seen = mtime
+            try:
+                alias = read_alias(INDEX_ALIAS_PATH)
+                if alias.get("backend") != VECTOR_BACKEND:
+                    continue
+                embedder = self.embedder
+                model_name = alias.get("model") or embedder.model_name
+                if model_name != embedder.model_name:
+                    logger.info(f"Index alias switched models; loading {model_name} ({self.backend} backend)")
+                    embedder = QueryEmbedder(load_model(model_name, self.backend), model_name)
+                store = get_vector_store(VECTOR_BACKEND, index=alias["index"])
+            except Exception as e:
+                logger.error(f"Failed to follow the index alias, still serving the current index: {e}")
+                continue
+            retired.append(self._active)
+            self._active = (embedder, store)
+            logger.info(f"Now serving index '{alias['index']}' ({model_name}).")
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        filter: Optional[dict] = None,
+        namespace: Optional[str] = None,
+        include_metadata: bool = True,
+    ) -> dict:
+        """
+        Embeds one query and returns the store's top matches, at most one per
+        package.
+
+        Returns:
+            {"query": ..., "matches": [{"id", "score", "metadata"}, ...]}.
+        """
+        start = time.perf_counter()
+        embedder, store = self._active
+        embedding = embedder.embed(query)
+        # Ask for extra matches so collapsing chunks still leaves top_k packages
+        # (Pinecone returns at most 1000 matches with metadata).
+        results = store.query(
+            vector=embedding.tolist(),
+            top_k=min(top_k * 3, 1000),
+            include_values=False,
+            include_metadata=include_metadata,
+            filter=filter,
+            namespace=namespace,
+        )
+        matches = [
+            {key: match[key] for key in ("id", "score", "metadata") if key in match}
+            for match in results["matches"]
+        ]
+        metrics.observe("pipeline_query_seconds", time.perf_counter() - start)
+        return {"query": query, "matches": collapse_chunks(matches, top_k)}
+
+    def search_many(self, queries: list[dict]) -> list[dict]:
+        """
+        Runs several searches concurrently. Each entry holds search()'s
+        keyword arguments, e.g. {"query": "beach", "top_k": 5}.
+        """
+        futures = [self._executor.submit(self.search, **request) for request in queries]
+        return [future.result() for future in futures]
+
+    def close(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        self._executor.shutdown(wait=True)
+        self.embedder.close()
+
+def serve(service: QueryService, host: str = QUERY_SERVICE_HOST, port: int = QUERY_SERVICE_PORT) -> ThreadingHTTPServer:
+    """
+    Creates the HTTP server for a query service. Call serve_forever() on it.
+
+    Endpoints:
+        POST /search   {"query": "...", "top_k": 10, "filter": {...}} or
+                       {"queries": [{...}, ...]} for several at once.
+        GET /metrics   Prometheus text, including query latency p50/p99.
+        GET /summary   The same metrics as JSON.
+        GET /health
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send(200, metrics.render_prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+            elif self.path == "/summary":
+                self._send(200, json.dumps(metrics.snapshot()).encode("utf-8"))
+            elif self.path == "/health":
+                self._send(200, b'{"status": "ok"}')
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            if self.path != "/search":
+                self.send_error(404)
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if "queries" in request:
+                    response = {"results": service.search_many(request["queries"])}
+                else:
+                    response = service.search(**request)
+            except (ValueError, TypeError, KeyError) as e:
+                metrics.inc("pipeline_query_errors_total")
+                self._send(400, json.dumps({"error": str(e)}).encode("utf-8"))
+                return
+            except Exception as e:
+                metrics.inc("pipeline_query_errors_total")
+                logger.error(f"Search failed: {e}")
+                self._send(500, json.dumps({"error": str(e)}).encode("utf-8"))
+                return
+            self._send(200, json.dumps(response).encode("utf-8"))
+
+        def log_message(self, format, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        # The default backlog of 5 resets connections under bursts of clients.
+        request_queue_size = 128
+
+    server = Server((host, port), Handler)
+    logger.info(f"Query service listening on http://{host}:{port}/search")
+    return server
+
+def search_remote(base_url: str, query: str, top_k: int = 10, filter: Optional[dict] = None, timeout: float = 30) -> dict:
+    """
+    Sends one search to a running query service and returns its response.
+    """
+    body = {"query": query, "top_k": top_k}
+    if filter is not None:
+        body["filter"] = filter
+    request = urllib.request.Request(
+        f"{base_url.rstrip('/')}/search",
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
@@ -0,0 +1,137 @@
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from sqlalchemy.orm import Session
+from . import extractor
+from .chunking import chunk_id, manifest_key
+from .config import EMBEDDING_MODEL_NAME, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS, EXTRACTION_MODE
+from .deletes import find_orphaned_ids, iter_live_ids
+from .manifest import package_fingerprint
+from .vector_store import VectorStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Vector ids per fetch request; Pinecone passes them in the URL, so keep it modest.
+FETCH_SIZE = 200
+
+@dataclass
+class ReconcileReport:
+    """
+    The differences between MySQL and the vector index.
+
+    missing: packages with no vector.
+    stale: packages whose vector's content_hash differs from the fingerprint
+           of their current content (or was written before fingerprints
+           were stored).
+    orphaned: vector ids whose package no longer exists.
+    """
+    packages: int = 0
+    vectors_checked: int = 0
+    matched: int = 0
+    missing: list[int] = field(default_factory=list)
+    stale: list[int] = field(default_factory=list)
+    orphaned: list[str] = field(default_factory=list)
+
+    @property
+    def repair_ids(self) -> list[int]:
+        """
+        The packages a targeted repair has to re-embed.
+        """
+        return sorted(set(self.missing) | set(self.stale))
+
+    @property
+    def consistent(self) -> bool:
+        return not (self.missing or self.stale or self.orphaned)
+
+def reconcile(
+    db: Session,
+    store: VectorStore,
+    batch_size: int = 500,
+    fetch_size: int = FETCH_SIZE,
+    concurrency: int = 8,
+    model_name: str = EMBEDDING_MODEL_NAME,
+    chunk_tokens: int = CHUNK_TOKENS,
+    chunk_overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    mode: str = EXTRACTION_MODE,
+    find_orphans: bool = True,
+) -> ReconcileReport:
+    """
+    Compares every package in MySQL with its vector in the index.
+
+    Packages are streamed in id order and their fingerprints recomputed
+    exactly as the manifest computes them at upsert time. The matching
+    vectors (the first chunk when chunking) are fetched by id in batches of
+    ``fetch_size``, with up to ``concurrency`` fetches in flight while the
+    next packages are read, and their stored ``content_hash`` is compared.
+    Orphans are then found with the same merge scan as delete propagation.
+
+    Args:
+        db: The SQLAlchemy database session.
+        store: The vector store to reconcile.
+        batch_size: Packages read per query.
+        fetch_size: Vector ids per fetch request.
+        concurrency: Fetch requests kept in flight.
+        model_name, chunk_tokens, chunk_overlap_tokens: The embedding settings
+            the index was built with; they are part of the fingerprint.
+        mode: The extraction mode, see extractor.iter_record_batches().
+        find_orphans: Also list vectors whose package is gone.
+
+    Returns:
+        A ReconcileReport.
+    """
+    report = ReconcileReport()
+    fingerprint_model = manifest_key(model_name, chunk_tokens, chunk_overlap_tokens)
+
+    def vector_id(package_id: int) -> str:
+        return chunk_id(package_id, 0) if chunk_tokens > 0 else str(package_id)
+
+    def compare(expected: dict[int, str], vectors: dict):
+        report.vectors_checked += len(vectors)
+        for package_id, fingerprint in expected.items():
+            vector = vectors.get(vector_id(package_id))
+            if vector is None:
+                report.missing.append(package_id)
+            elif (vector.get("metadata") or {}).get("content_hash") != fingerprint:
+                report.stale.append(package_id)
+            else:
+                report.matched += 1
+
+    def fetch(ids: list[str]) -> dict:
+        return store.fetch(ids)["vectors"]
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="reconcile") as executor:
+        in_flight = deque()
+        for records in extractor.iter_record_batches(db, batch_size, mode=mode):
+            report.packages += len(records)
+            fingerprints = {
+                record.id: package_fingerprint(record, fingerprint_model, chunk_tokens) for record in records
+            }
+            package_ids = list(fingerprints)
+            for i in range(0, len(package_ids), fetch_size):
+                expected = {package_id: fingerprints[package_id] for package_id in package_ids[i:i + fetch_size]}
+                in_flight.append((expected, executor.submit(fetch, [vector_id(package_id) for package_id in expected])))
+                # Bound the fingerprints held in memory while fetches catch up.
+                while len(in_flight) > concurrency:
+                    expected, future = in_flight.popleft()
+                    compare(expected, future.result())
+            logger.info(f"Reconciled {report.packages} packages ({len(report.missing)} missing, {len(report.stale)} stale).")
+        while in_flight:
+            expected, future = in_flight.popleft()
+            compare(expected, future.result())
+
+    if find_orphans:
+        def vector_ids():
+            for page in store.list_ids():
+                yield from page
+
+        report.orphaned = list(find_orphaned_ids(iter_live_ids(db), vector_ids()))
+
+    report.missing.sort()
+    report.stale.sort()
+    logger.info(
+        f"Reconciliation checked {report.packages} packages: {report.matched} match, {len(report.missing)} missing, "
+        f"{len(report.stale)} stale, {len(report.orphaned)} orphaned vectors."
+    )
+    return report
@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import re
+import shutil
+from datetime import datetime, timezone
+from typing import Optional
+from .config import (
+    VECTOR_BACKEND, PINECONE_API_KEY, PINECONE_INDEX_NAME, LOCAL_STORE_DIR, INDEX_ALIAS_PATH, INDEX_ALIAS, EMBEDDING_BACKEND,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pinecone index names: lowercase letters, digits and hyphens, at most 45 characters.
+_MAX_INDEX_NAME = 45
+
+def read_alias(path: str = INDEX_ALIAS_PATH) -> dict:
+    """
+    Returns the current index alias, or {} if no reindex has switched one yet.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def write_alias(alias: dict, path: str = INDEX_ALIAS_PATH):
+    """
+    Atomically replaces the alias file, so readers see either the old or the
+    new index, never a partial file.
+    """
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(alias, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+def live_index(backend: str = VECTOR_BACKEND, path: str = INDEX_ALIAS_PATH) -> str:
+    """
+    Returns the index currently serving: the alias target, or the configured
+    index if there is no alias for this backend.
+    """
+    alias = read_alias(path)
+    if alias.get("backend") == backend:
+        return alias["index"]
+    return PINECONE_INDEX_NAME if backend == "pinecone" else LOCAL_STORE_DIR
+
+def alias_model_conflict(model_name: str, backend: str = VECTOR_BACKEND, alias: Optional[dict] = None) -> Optional[str]:
+    """
+    Checks a model against the one the aliased index was built with. An
+    EMBEDDING_MODEL_NAME left in .env takes precedence over the alias, so
+    after a reindex it would embed into the new index with the old model.
+
+    Returns:
+        An error message naming the setting to change, or None if there is
+        no alias for this backend or it names the same model.
+    """
+    alias = INDEX_ALIAS if alias is None else alias
+    alias_model = alias.get("model")
+    if alias.get("backend") != backend or not alias_model or alias_model == model_name:
+        return None
+    return (
+        f"The index alias points at '{alias['index']}', built with {alias_model}, but the configured model is "
+        f"{model_name}. Set EMBEDDING_MODEL_NAME={alias_model} in .env (or remove it to follow the alias)."
+    )
+
+def env_model_change(model_name: str) -> Optional[str]:
+    """
+    Returns the .env change an operator has to make after switching the
+    alias to ``model_name``, or None if EMBEDDING_MODEL_NAME is not set to
+    another model.
+    """
+    configured = os.getenv("EMBEDDING_MODEL_NAME")
+    if not configured or configured == model_name:
+        return None
+    return f"EMBEDDING_MODEL_NAME is set to {configured}; change it to {model_name} (or remove it) before the next run."
+
+def new_index_name(backend: str = VECTOR_BACKEND, now: Optional[datetime] = None) -> str:
+    """
+    Returns a fresh index name (Pinecone) or directory (local) for a
+    reindex, derived from the configured one and the current time.
+    """
+    stamp = (now or datetime.now(timezone.utc)).strftime("%Y%m%d%H%M")
+    if backend == "local":
+        return f"{LOCAL_STORE_DIR.rstrip('/')}-{stamp}"
+    base = re.sub(r"[^a-z0-9-]", "-", PINECONE_INDEX_NAME.lower())[:_MAX_INDEX_NAME - len(stamp) - 1]
+    return f"{base}-{stamp}"
+
+def detect_dimension(model_name: str, backend: str = EMBEDDING_BACKEND) -> int:
+    """
+    Loads the model and returns its output dimension.
+    """
+    from .backends import load_model
+
+    return load_model(model_name, backend).get_sentence_embedding_dimension()
+
+def switch_alias(
+    backend: str,
+    index: str,
+    model_name: str,
+    dimension: int,
+    manifest_path: str,
+    live_manifest_path: str,
+    path: str = INDEX_ALIAS_PATH,
+) -> dict:
+    """
+    Points the alias at a backfilled index.
+
+    The alias is replaced first and the new index's manifest moved into
+    place second: if the process dies in between, the next run re-embeds
+    into the new index rather than skipping packages it does not have.
+
+    Returns:
+        The new alias; "previous" holds the alias (or index) it replaced.
+    """
+    previous = read_alias(path) or {"backend": backend, "index": live_index(backend, path)}
+    previous.pop("previous", None)
+    alias = {
+        "backend": backend,
+        "index": index,
+        "model": model_name,
+        "dimension": dimension,
+        "switched_at": datetime.now(timezone.utc).isoformat(),
+        "previous": previous,
+    }
+    write_alias(alias, path)
+    os.replace(manifest_path, live_manifest_path)
+    logger.info(f"Alias now points at '{index}' ({model_name}, dimension {dimension}); previously '{previous['index']}'.")
+    change = env_model_change(model_name)
+    if change:
+        logger.warning(change)
+    return alias
+
+def retire_index(backend: str, index: str):
+    """
+    Deletes an index that no longer serves: the Pinecone index, or the local
+    store directory.
+    """
+    if backend == "local":
+        shutil.rmtree(index)
+    elif backend == "pinecone":
+        from pinecone import Pinecone
+
+        Pinecone(api_key=PINECONE_API_KEY).delete_index(index)
+    else:
+        raise ValueError(f"Unknown vector backend '{backend}'.")
+    logger.info(f"Retired index '{index}'.")
@@ -0,0 +1,139 @@
+import logging
+import queue
+import threading
+from typing import Any, Callable, Iterable, Optional
+from .metrics import registry as metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stream between two stages.
+_END = object()
+
+# How often blocked stages wake up to check whether the run was aborted.
+_POLL_SECONDS = 0.5
+
+class StagedPipeline:
+    """
+    Runs a source iterable and a chain of stage functions as concurrent
+    threads connected by bounded queues.
+
+    Each stage receives the items produced by the previous one; a stage that
+    returns None produces nothing for the next stage. Because every queue is
+    bounded, a slow stage applies backpressure to the ones before it, and
+    wall-clock time approaches that of the slowest stage.
+
+    If any stage raises, the remaining stages are stopped and the first
+    exception is re-raised from run().
+    """
+    def __init__(self, source: Iterable, stages: list[tuple[str, Callable[[Any], Any]]], queue_size: int = 2):
+        """
+        Args:
+            source: The iterable feeding the first stage (e.g. the extractor).
+            stages: (name, function) pairs, run in order.
+            queue_size: Maximum number of items buffered between two stages.
+        """
+        self.source = source
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._error_lock = threading.Lock()
+
+    def _fail(self, name: str, error: BaseException):
+        with self._error_lock:
+            if self._error is None:
+                logger.error(f"Stage '{name}' failed: {error}")
+                self._error = error
+        self._stop.set()
+
+    def _record_depth(self, position: int):
+        metrics.set("pipeline_queue_depth", self.queues[position].qsize(), stage=self.stages[position][0])
+
+    def _put(self, position: int, item) -> bool:
+        """
+        Puts an item on the queue in front of stage ``position``, giving up if
+        the run was aborted.
+        """
+        while not self._stop.is_set():
+            try:
+                self.queues[position].put(item, timeout=_POLL_SECONDS)
+                self._record_depth(position)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        """
+        Gets an item from a queue, returning _END if the run was aborted.
+        """
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _run_source(self):
+        try:
+            for item in self.source:
+                if not self._put(0, item):
+                    break
+        except BaseException as e:
+            self._fail("extract", e)
+        finally:
+            self._put(0, _END)
+            close = getattr(self.source, "close", None)
+            if close is not None:
+                close()
+
+    def _run_stage(self, position: int):
+        name, function = self.stages[position]
+        has_next = position + 1 < len(self.queues)
+        try:
+            while True:
+                item = self._get(self.queues[position])
+                self._record_depth(position)
+                if item is _END:
+                    break
+                result = function(item)
+                if has_next and result is not None:
+                    if not self._put(position + 1, result):
+                        break
+        except BaseException as e:
+            self._fail(name, e)
+        finally:
+            if has_next:
+                self._put(position + 1, _END)
+
+    def queue_depths(self) -> dict[str, int]:
+        """
+        Returns the number of items currently waiting in front of each stage.
+        """
+        return {name: q.qsize() for (name, _), q in zip(self.stages, self.queues)}
+
+    def run(self):
+        """
+        Starts all stages, waits for them to drain and re-raises the first
+        error, if any.
+        """
+        threads = [threading.Thread(target=self._run_source, name="stage-extract", daemon=True)]
+        threads += [
+            threading.Thread(target=self._run_stage, args=(i,), name=f"stage-{name}", daemon=True)
+            for i, (name, _) in enumerate(self.stages)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=_POLL_SECONDS)
+        except KeyboardInterrupt as e:
+            self._fail("main", e)
+            for thread in threads:
+                thread.join()
+
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,133 @@
+import logging
+import random
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from . import models
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WORDS = (
+    "tour package day trip hotel breakfast lunch dinner guide transfer airport beach mountain "
+    "city museum cruise safari desert island temple market village lake river forest castle "
+    "wine tasting sunset hiking snorkeling old town cathedral palace garden festival local"
+).split()
+MOODS = ["Adventure", "Relaxation", "Romance", "Culture", "Family", "Nature", "Luxury", "Wellness"]
+DESTINATIONS = ["Paris", "Rome", "Kyoto", "Cusco", "Cairo", "Bali", "Reykjavik", "Cape Town", "Lisbon", "Hanoi"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August",
+          "September", "October", "November", "December"]
+YEARS = ["2025", "2026", "2027"]
+TYPES = ["Group", "Private", "Self-guided", "Cruise", "Rail"]
+MEAL_TYPES = ["Breakfast", "Lunch", "Dinner"]
+TRANSPORT_MODES = ["Bus", "Train", "Flight", "Boat", "Car"]
+UPGRADE_TYPES = ["First Class", "Private Car", "Business Class"]
+PRICE_RANGES = ["1 traveler", "2-3 travelers", "4-6 travelers", "7+ travelers"]
+
+# Average number of child rows per package, by table.
+DEFAULT_FANOUT = {
+    "packageMood": 2,
+    "subMood": 2,
+    "destinations": 3,
+    "pkgDays": 3,
+    "pkgMonths": 4,
+    "pkgYears": 2,
+    "pkgType": 1,
+    "tourPlan": 6,
+    "numberTravelerPrice": 3,
+    "mealSummary": 3,
+    "transportation": 2,
+    "transportationUpgrade": 1,
+}
+
+# Word-count distributions (lognormal mu, sigma) for the free-text columns.
+TEXT_PROFILES = {
+    "short": {"detail": (3.0, 0.5), "child_detail": (2.0, 0.5)},
+    "realistic": {"detail": (4.5, 0.9), "child_detail": (3.0, 0.8)},
+    "long": {"detail": (6.0, 0.6), "child_detail": (4.0, 0.6)},
+}
+
+def _words(rng: random.Random, mu: float, sigma: float, cap: int = 3000) -> str:
+    count = max(1, min(cap, int(rng.lognormvariate(mu, sigma))))
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def _child_count(rng: random.Random, mean: float) -> int:
+    # Uniform on [0, 2 * mean] keeps the requested mean with some spread.
+    return rng.randint(0, int(round(2 * mean)))
+
+def populate_synthetic_catalog(
+    engine: Engine,
+    num_packages: int,
+    fanout: dict = None,
+    text_profile: str = "realistic",
+    seed: int = 0,
+    chunk_size: int = 1000,
+) -> dict:
+    """
+    Creates the schema from pipeline.models and fills every table with
+    synthetic tour packages.
+
+    Args:
+        engine: The engine to populate (e.g. a SQLite file).
+        num_packages: Number of rows in 'packages'.
+        fanout: Average child rows per package, keyed by table name; missing
+                tables use DEFAULT_FANOUT.
+        text_profile: One of TEXT_PROFILES, controlling free-text lengths.
+        seed: Random seed, so runs are reproducible across commits.
+        chunk_size: Packages inserted per transaction.
+
+    Returns:
+        The number of rows inserted per table.
+    """
+    fanout = {**DEFAULT_FANOUT, **(fanout or {})}
+    profile = TEXT_PROFILES[text_profile]
+    rng = random.Random(seed)
+    models.Base.metadata.create_all(engine)
+
+    counts = {table.name: 0 for table in models.Base.metadata.sorted_tables}
+    for start in range(1, num_packages + 1, chunk_size):
+        ids = range(start, min(start + chunk_size, num_packages + 1))
+        rows = {table.name: [] for table in models.Base.metadata.sorted_tables}
+        for package_id in ids:
+            rows["packages"].append({
+                "id": package_id,
+                "name": f"{rng.choice(DESTINATIONS)} {rng.choice(WORDS).title()} Tour {package_id}",
+                "pkgURL": f"https://example.com/packages/{package_id}",
+                "numberOfDays": f"{rng.randint(1, 21)} days",
+                "tourDetail": _words(rng, *profile["detail"]),
+                "ageRange": f"{rng.randint(0, 18)}-{rng.randint(60, 99)}",
+                "isChildFriendly": rng.random() < 0.5,
+                "isHandicapAccessible": rng.random() < 0.3,
+                "insurancerequired": rng.random() < 0.2,
+                "promotionPercentage": f"{rng.choice([0, 5, 10, 15, 20])}%",
+                "seatsPerTour": str(rng.randint(4, 40)),
+                "groupSize": str(rng.randint(2, 30)),
+                "basePrice": f"{rng.randint(200, 9000)}.00",
+                "singleSupplementPrc": f"{rng.randint(50, 900)}.00",
+            })
+
+            def children(table, make):
+                for n in range(_child_count(rng, fanout[table])):
+                    rows[table].append({"package_id": package_id, **make(n)})
+
+            children("packageMood", lambda n: {"mood": rng.choice(MOODS)})
+            children("subMood", lambda n: {"sub_mood": rng.choice(MOODS).lower()})
+            children("destinations", lambda n: {"destination": rng.choice(DESTINATIONS)})
+            children("pkgDays", lambda n: {"day": rng.choice(DAYS)})
+            children("pkgMonths", lambda n: {"month": rng.choice(MONTHS)})
+            children("pkgYears", lambda n: {"year": rng.choice(YEARS)})
+            children("pkgType", lambda n: {"type": rng.choice(TYPES)})
+            children("tourPlan", lambda n: {"dayNumber": f"Day {n + 1}", "detail": _words(rng, *profile["child_detail"])})
+            children("numberTravelerPrice", lambda n: {"rangeTitle": PRICE_RANGES[n % len(PRICE_RANGES)], "price": rng.randint(100, 9000)})
+            children("mealSummary", lambda n: {"mealType": rng.choice(MEAL_TYPES), "detail": _words(rng, *profile["child_detail"])})
+            children("transportation", lambda n: {"mode": rng.choice(TRANSPORT_MODES), "detail": _words(rng, *profile["child_detail"])})
+            children("transportationUpgrade", lambda n: {"upgradeType": rng.choice(UPGRADE_TYPES), "detail": _words(rng, *profile["child_detail"])})
+
+        with engine.begin() as connection:
+            for table in models.Base.metadata.sorted_tables:
+                if rows[table.name]:
+                    connection.execute(insert(table), rows[table.name])
+                    counts[table.name] += len(rows[table.name])
+
+    logger.info(f"Generated synthetic catalog: {counts}")
+    return counts
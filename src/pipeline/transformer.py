@@ -1,7 +1,21 @@
 import logging
-from sentence_transformers import SentenceTransformer
+import time
+from typing import Optional
+import numpy as np
 from . import models
-from .config import EMBEDDING_MODEL_NAME
+from .backends import load_model, model_key
+from .batching import encode_in_token_batches, token_lengths
+from .chunking import chunk_document, chunk_id, package_document
+from .config import (
+    EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND, EMBEDDING_CACHE_DIR, EMBEDDING_WORKERS, EMBEDDING_THREADS_PER_WORKER,
+    EMBEDDING_TOKEN_BUDGET, CHUNK_TOKENS, CHUNK_OVERLAP_TOKENS,
+)
+from .embedding_cache import EmbeddingCache, cache_key
+from .encode_pool import EncodePool
+from .metadata import package_metadata
+from .metrics import registry as metrics
+from .reindex import alias_model_conflict
+from .vector_batch import VectorBatch
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -10,48 +24,243 @@ class Transformer:
     """
     A class to handle the transformation of text data into embeddings.
     """
-    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME):
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        cache: Optional[EmbeddingCache] = None,
+        num_workers: int = EMBEDDING_WORKERS,
+        threads_per_worker: int = EMBEDDING_THREADS_PER_WORKER,
+        token_budget: int = EMBEDDING_TOKEN_BUDGET,
+        use_cache: bool = True,
+        chunk_tokens: int = CHUNK_TOKENS,
+        chunk_overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+        backend: str = EMBEDDING_BACKEND,
+    ):
         """
         Initializes the Transformer by loading the sentence-transformer model.
+
+        Args:
+            model_name: The sentence-transformers model to load.
+            cache: The embedding cache to consult before encoding. Defaults to
+                   the cache in EMBEDDING_CACHE_DIR, if one is configured.
+            num_workers: If greater than 1, encoding is sharded across this many
+                         worker processes, each with its own model copy.
+            threads_per_worker: torch threads per worker process (0 = auto).
+            token_budget: If positive, texts are bucketed by token length and
+                          encoded in batches of at most this many padded tokens.
+            use_cache: Set to False to always run the model.
+            chunk_tokens: If positive, each package's full document is split
+                          into chunks of at most this many tokens, embedded as
+                          separate vectors. Smaller chunks encode faster
+                          (attention is quadratic in length); larger ones keep
+                          more context per vector.
+            chunk_overlap_tokens: Tokens repeated between the windows of a
+                                  field that is split across chunks.
+            backend: The inference backend ("torch", "int8", "onnx" or
+                     "onnx-int8"), see pipeline.backends.
         """
-        logger.info(f"Loading embedding model: {model_name}")
+        logger.info(f"Loading embedding model: {model_name} ({backend} backend)")
+        self.model_name = model_name
+        self.backend = backend
+        # Cached vectors are keyed on the backend too, so a quantized run's vectors never answer an fp32 one.
+        self.cache_model = model_key(model_name, backend)
+        self.token_budget = token_budget
         try:
-            self.model = SentenceTransformer(model_name)
+            self.model = load_model(model_name, backend)
             logger.info("Embedding model loaded successfully.")
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")
             raise
 
-    def generate_embeddings(self, records: list[models.Package]) -> list[dict]:
+        conflict = alias_model_conflict(model_name)
+        if conflict:
+            logger.error(conflict)
+
+        # The index is created with (and checked against) the model's output dimension.
+        self.dimension = self.model.get_sentence_embedding_dimension()
+
+        if not use_cache:
+            cache = None
+        elif cache is None and EMBEDDING_CACHE_DIR:
+            cache = EmbeddingCache(EMBEDDING_CACHE_DIR)
+            # A cache holds one dimension; a model with another (e.g. during a reindex) gets its own.
+            if cache.dimension not in (None, self.dimension):
+                cache.close()
+                cache = EmbeddingCache(f"{EMBEDDING_CACHE_DIR.rstrip('/')}-{self.dimension}")
+        self.cache = cache
+
+        # Chunks must fit the model, which also adds its special tokens.
+        self.chunk_tokens = min(chunk_tokens, self.model.max_seq_length - 2) if chunk_tokens > 0 else 0
+        self.chunk_overlap_tokens = chunk_overlap_tokens
+
+        self.pool = None
+        if num_workers > 1:
+            self.pool = EncodePool(model_name, num_workers, threads_per_worker, token_budget, backend)
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        """
+        Runs the model on a list of texts, in-process or on the worker pool.
+
+        Token counts come from the length bucketing, which tokenizes anyway;
+        without a token budget nothing is tokenized up front, so the token
+        metrics are not updated.
+        """
+        tokens = None
+        start = time.perf_counter()
+        if self.pool is not None:
+            embeddings, tokens = self.pool.encode_with_tokens(texts)
+        elif self.token_budget > 0:
+            lengths = token_lengths(self.model, texts)
+            tokens = sum(lengths)
+            embeddings = encode_in_token_batches(self.model, texts, self.token_budget, lengths=lengths)
+        else:
+            embeddings = np.asarray(self.model.encode(texts, show_progress_bar=True), dtype=np.float32)
+        elapsed = time.perf_counter() - start
+
+        metrics.observe("pipeline_encode_seconds", elapsed)
+        metrics.inc("pipeline_encode_texts_total", len(texts))
+        if tokens is not None:
+            metrics.inc("pipeline_encode_tokens_total", tokens)
+            if elapsed > 0:
+                metrics.set("pipeline_encode_tokens_per_second", tokens / elapsed)
+        return embeddings
+
+    def close(self):
+        """
+        Stops the encode workers and closes the embedding cache.
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+        if self.cache is not None:
+            self.cache.close()
+
+    def encode_texts(self, texts: list[str]) -> np.ndarray:
+        """
+        Encodes a list of texts, consulting the embedding cache first.
+        Identical texts within the list are only encoded once.
+
+        Args:
+            texts: The texts to encode.
+
+        Returns:
+            A float32 array with one embedding row per input text.
+        """
+        keys = [cache_key(self.cache_model, text) for text in texts]
+        unique_texts = dict(zip(keys, texts))
+
+        cached = self.cache.get_many(list(unique_texts)) if self.cache is not None else {}
+        missing = [key for key in unique_texts if key not in cached]
+        if self.cache is not None:
+            metrics.inc("pipeline_embedding_cache_hits_total", len(cached))
+            metrics.inc("pipeline_embedding_cache_misses_total", len(missing))
+
+        vectors = dict(cached)
+        if missing:
+            encoded = self._encode([unique_texts[key] for key in missing])
+            new_vectors = dict(zip(missing, encoded))
+            if self.cache is not None:
+                self.cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        if self.cache is not None:
+            stats = self.cache.stats()
+            logger.info(
+                f"Embedding cache: {len(cached)} hits, {len(missing)} encoded "
+                f"({stats['hits']} hits / {stats['misses']} misses this run)."
+            )
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([vectors[key] for key in keys])
+
+    @staticmethod
+    def _metadata(record, fingerprints: Optional[dict[int, str]]) -> dict:
+        metadata = package_metadata(record)
+        if fingerprints and record.id in fingerprints:
+            metadata["content_hash"] = fingerprints[record.id]
+        return metadata
+
+    def generate_embeddings(self, records: list[models.Package], fingerprints: Optional[dict[int, str]] = None) -> VectorBatch:
         """
-        Generates embeddings for a list of Package records.
+        Generates embeddings for a list of Package records. With chunking
+        enabled this returns one entry per chunk (see
+        generate_chunk_embeddings()).
 
         Args:
             records: A list of Package objects.
+            fingerprints: Content hashes by package id, stored in the metadata
+                          as ``content_hash`` so the index can be reconciled
+                          against MySQL later.
 
         Returns:
-            A list of dictionaries, where each dictionary contains the record id,
-            the generated embedding, and the model version.
+            A VectorBatch holding the record ids, the embeddings as one float32
+            matrix, the model version and each package's filterable metadata
+            (see pipeline.metadata).
         """
         if not records:
-            return []
+            return VectorBatch([], np.empty((0, self.dimension), dtype=np.float32), model_version=self.model_name)
+        if self.chunk_tokens:
+            return self.generate_chunk_embeddings(records, fingerprints)
 
         logger.info(f"Generating embeddings for {len(records)} records.")
-        
+
         # Get the text to be embedded from each record
-        texts_to_embed = [record.to_text() for record in records]
-        
+        with metrics.timer("pipeline_to_text_seconds"):
+            texts_to_embed = [record.to_text() for record in records]
+
         # Generate embeddings
-        embeddings = self.model.encode(texts_to_embed, show_progress_bar=True)
-        
-        # Prepare the data for the loader
-        transformed_data = []
-        for i, record in enumerate(records):
-            transformed_data.append({
-                "id": str(record.id),
-                "embedding": embeddings[i].tolist(),
-                "model_version": EMBEDDING_MODEL_NAME
-            })
-            
+        embeddings = self.encode_texts(texts_to_embed)
+
+        # Prepare the data for the loader; the embedding matrix is passed on as is
+        transformed_data = VectorBatch(
+            [str(record.id) for record in records],
+            embeddings,
+            [self._metadata(record, fingerprints) for record in records],
+            self.model_name,
+        )
+
         logger.info("Embeddings generated successfully.")
         return transformed_data
+
+    def generate_chunk_embeddings(self, records: list[models.Package], fingerprints: Optional[dict[int, str]] = None) -> VectorBatch:
+        """
+        Splits each record's full document into token-bounded chunks and
+        embeds every chunk as its own vector.
+
+        Args:
+            records: A list of Package objects.
+            fingerprints: Content hashes by package id, see generate_embeddings().
+
+        Returns:
+            A VectorBatch like generate_embeddings(), one vector per chunk,
+            with ids "<package id>#<chunk>" and the package's metadata plus
+            the package id, the chunk number and the package's chunk count.
+        """
+        logger.info(f"Generating chunk embeddings for {len(records)} records.")
+
+        with metrics.timer("pipeline_to_text_seconds"):
+            documents = [package_document(record) for record in records]
+            chunks = [
+                chunk_document(self.model.tokenizer, document, self.chunk_tokens, self.chunk_overlap_tokens)
+                for document in documents
+            ]
+
+        embeddings = self.encode_texts([chunk for package_chunks in chunks for chunk in package_chunks])
+        metrics.inc("pipeline_chunks_total", len(embeddings))
+
+        ids = []
+        chunk_metadata = []
+        for record, package_chunks in zip(records, chunks):
+            metadata = self._metadata(record, fingerprints)
+            for n in range(len(package_chunks)):
+                ids.append(chunk_id(record.id, n))
+                chunk_metadata.append(
+                    {**metadata, "package_id": record.id, "chunk": n, "chunk_count": len(package_chunks)}
+                )
+        if not ids:
+            embeddings = np.empty((0, self.dimension), dtype=np.float32)
+        transformed_data = VectorBatch(ids, embeddings, chunk_metadata, self.model_name)
+
+        logger.info(f"Chunk embeddings generated successfully ({len(transformed_data)} chunks).")
+        return transformed_data
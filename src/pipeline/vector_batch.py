@@ -0,0 +1,180 @@
+import json
+import logging
+from typing import Optional
+import numpy as np
+from .metadata import limit_metadata_size
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Value encodings a batch can travel in: float32 as produced by the model, float16 (half the
+# bytes) or int8 with one float32 scale per vector (a quarter of the bytes, plus the scales).
+TRANSPORT_DTYPES = ("float32", "float16", "int8")
+
+# Upper bounds for a vector in a JSON request body: a float32 value printed as a Python float takes
+# at most 23 characters (e.g. -1.1754943508222875e-38) plus the ", " separator, and the object
+# around it ({"id": ..., "values": [...], "metadata": ...} and the separator to the next) 38.
+_JSON_VALUE_BYTES = 25
+_JSON_VECTOR_OVERHEAD = 38
+
+class VectorBatch:
+    """
+    A batch of vectors kept as arrays from the Transformer to the vector store.
+
+    ``values`` is one C-contiguous (n, dimension) matrix rather than a Python
+    list of floats per vector; slicing a batch (e.g. into upsert requests)
+    returns views, so embeddings are not copied or boxed until a store
+    serializes them into its request payload.
+
+    Attributes:
+        ids: The vector ids.
+        values: The (n, dimension) matrix, float32 unless the batch was
+                converted for transport (see astype()).
+        metadata: Per-vector metadata, without ``model_version``.
+        model_version: The embedding model, added to every vector's metadata.
+        scales: Per-vector dequantization scales of an int8 batch.
+    """
+    def __init__(
+        self,
+        ids: list[str],
+        values: np.ndarray,
+        metadata: Optional[list[dict]] = None,
+        model_version: Optional[str] = None,
+        scales: Optional[np.ndarray] = None,
+    ):
+        values = np.asarray(values)
+        if values.ndim != 2 or len(values) != len(ids):
+            raise ValueError(f"Expected a ({len(ids)}, dimension) matrix of values, got shape {values.shape}.")
+        self.ids = ids
+        self.values = values if values.dtype in (np.float16, np.int8) else np.ascontiguousarray(values, dtype=np.float32)
+        self.metadata = metadata if metadata is not None else [{} for _ in ids]
+        self.model_version = model_version
+        self.scales = scales
+        self._payload_metadata = None
+
+    @classmethod
+    def from_items(cls, items: list[dict]) -> "VectorBatch":
+        """
+        Builds a batch from {"id", "embedding", "model_version", "metadata"}
+        dicts, the format the Transformer produced before batches existed.
+        """
+        if not items:
+            return cls([], np.empty((0, 0), dtype=np.float32))
+        return cls(
+            [item["id"] for item in items],
+            np.asarray([item["embedding"] for item in items], dtype=np.float32),
+            [item.get("metadata") or {} for item in items],
+            items[0].get("model_version"),
+        )
+
+    @property
+    def dtype(self) -> str:
+        return self.values.dtype.name
+
+    @property
+    def dimension(self) -> int:
+        return self.values.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: slice) -> "VectorBatch":
+        """
+        Returns the vectors in a slice, sharing this batch's arrays.
+        """
+        if not isinstance(index, slice):
+            raise TypeError("VectorBatch only supports slicing.")
+        batch = VectorBatch.__new__(VectorBatch)
+        batch.ids = self.ids[index]
+        batch.values = self.values[index]
+        batch.metadata = self.metadata[index]
+        batch.model_version = self.model_version
+        batch.scales = self.scales[index] if self.scales is not None else None
+        batch._payload_metadata = self._payload_metadata[index] if self._payload_metadata is not None else None
+        return batch
+
+    def payload_metadata(self) -> list[dict]:
+        """
+        Returns the metadata stored with each vector: ``model_version`` plus
+        the vector's metadata, trimmed to the per-vector size limit. Computed
+        once per batch and shared by its slices.
+        """
+        if self._payload_metadata is None:
+            self._payload_metadata = [
+                limit_metadata_size({"model_version": self.model_version, **metadata}) if self.model_version
+                else limit_metadata_size(dict(metadata))
+                for metadata in self.metadata
+            ]
+        return self._payload_metadata
+
+    def astype(self, dtype: str) -> "VectorBatch":
+        """
+        Returns the batch with its values encoded for transport: "float16",
+        "int8" (symmetric, one scale per vector) or "float32" (decoded).
+        """
+        if dtype not in TRANSPORT_DTYPES:
+            raise ValueError(f"Unknown transport dtype '{dtype}'; expected one of {TRANSPORT_DTYPES}.")
+        if dtype == self.dtype:
+            return self
+        values = self.float32_values()
+        scales = None
+        if dtype == "float16":
+            values = values.astype(np.float16)
+        elif dtype == "int8":
+            scales = np.abs(values).max(axis=1) / 127
+            scales[scales == 0] = 1
+            values = np.rint(values / scales[:, None]).astype(np.int8)
+            scales = scales.astype(np.float32)
+        batch = VectorBatch(self.ids, values, self.metadata, self.model_version, scales)
+        batch._payload_metadata = self._payload_metadata
+        return batch
+
+    def float32_values(self) -> np.ndarray:
+        """
+        Returns the values as float32, decoding a float16 or int8 batch.
+        """
+        if self.dtype == "int8":
+            return self.values.astype(np.float32) * self.scales[:, None]
+        return self.values.astype(np.float32, copy=False)
+
+    def vector_bytes(self) -> np.ndarray:
+        """
+        Estimates each vector's share of an upsert request: its encoded
+        values plus its id and JSON-encoded metadata.
+        """
+        row_bytes = self.values.itemsize * self.values.shape[1] + (self.scales.itemsize if self.scales is not None else 0)
+        return np.fromiter(
+            (row_bytes + len(id_) + len(json.dumps(metadata)) for id_, metadata in zip(self.ids, self.payload_metadata())),
+            dtype=np.int64,
+            count=len(self.ids),
+        )
+
+    def json_bytes(self) -> np.ndarray:
+        """
+        Bounds each vector's share of a JSON request body, with the values
+        encoded as decimal floats (about 22 bytes each for normalized float32
+        embeddings, five times their binary size). Computed without
+        converting the values.
+        """
+        row_bytes = _JSON_VECTOR_OVERHEAD + _JSON_VALUE_BYTES * self.values.shape[1]
+        return np.fromiter(
+            (row_bytes + len(json.dumps(id_)) + len(json.dumps(metadata)) for id_, metadata in zip(self.ids, self.payload_metadata())),
+            dtype=np.int64,
+            count=len(self.ids),
+        )
+
+    def payload_bytes(self) -> int:
+        """
+        Estimates the request size of upserting this batch.
+        """
+        return int(self.vector_bytes().sum())
+
+    def to_vectors(self) -> list[dict]:
+        """
+        Returns {"id", "values", "metadata"} dicts with the values as float
+        lists, for stores that only take the generic upsert() format.
+        """
+        return [
+            {"id": id_, "values": values, "metadata": metadata}
+            for id_, values, metadata in zip(self.ids, self.float32_values().tolist(), self.payload_metadata())
+        ]
@@ -0,0 +1,474 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional
+import numpy as np
+from .config import (
+    VECTOR_BACKEND, LOCAL_STORE_DIR, PINECONE_API_KEY, PINECONE_ENVIRONMENT, PINECONE_INDEX_NAME, INDEX_ALIAS,
+)
+from .vector_batch import VectorBatch
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class VectorStore(ABC):
+    """
+    The operations the pipeline and its tools need from a vector index.
+
+    Responses use the same shapes as the Pinecone client (``matches``,
+    ``vectors``, ``total_vector_count``, ...), so callers can index into them
+    the same way whichever backend is configured.
+    """
+    # Value encodings upsert_batch() accepts, see pipeline.vector_batch.
+    transport_dtypes = ("float32",)
+
+    @abstractmethod
+    def upsert(self, vectors: list[dict], namespace: Optional[str] = None):
+        """
+        Inserts or replaces vectors given as {"id", "values", "metadata"} dicts.
+        """
+
+    def upsert_batch(self, batch: VectorBatch, namespace: Optional[str] = None):
+        """
+        Inserts or replaces the vectors of a VectorBatch. Stores override this
+        to serialize the batch's arrays straight into their request.
+        """
+        return self.upsert(batch.to_vectors(), namespace=namespace)
+
+    def request_bytes(self, batch: VectorBatch) -> np.ndarray:
+        """
+        Returns each vector's share of an upsert request as this store
+        serializes it, which the Loader packs requests by. Defaults to the
+        batch's binary size.
+        """
+        return batch.vector_bytes()
+
+    @abstractmethod
+    def fetch(self, ids: list[str], namespace: Optional[str] = None):
+        """
+        Returns {"vectors": {id: {"id", "values", "metadata"}}} for the ids that exist.
+        """
+
+    @abstractmethod
+    def delete(self, ids: list[str], namespace: Optional[str] = None):
+        """
+        Deletes vectors by id; unknown ids are ignored.
+        """
+
+    @abstractmethod
+    def list_ids(
+        self,
+        prefix: Optional[str] = None,
+        page_size: int = 1000,
+        namespace: Optional[str] = None,
+    ) -> Iterator[list[str]]:
+        """
+        Yields every vector id (optionally only those starting with
+        ``prefix``) in pages, in ascending string order.
+        """
+
+    @abstractmethod
+    def query(
+        self,
+        vector: list[float],
+        top_k: int = 10,
+        include_values: bool = False,
+        include_metadata: bool = True,
+        filter: Optional[dict] = None,
+        namespace: Optional[str] = None,
+    ):
+        """
+        Returns {"matches": [{"id", "score", "values", "metadata"}]} ordered by
+        descending cosine similarity.
+        """
+
+    @abstractmethod
+    def describe_index_stats(self):
+        """
+        Returns {"dimension", "total_vector_count", "namespaces"}.
+        """
+
+class PineconeStore(VectorStore):
+    """
+    A VectorStore backed by a Pinecone serverless index.
+    """
+    def __init__(self, index_name: str = PINECONE_INDEX_NAME, dimension: Optional[int] = None):
+        """
+        Connects to Pinecone and opens the index, creating it if it doesn't exist.
+
+        Args:
+            index_name: The index to open.
+            dimension: The embedding model's output dimension. Required to
+                       create the index; an existing index with another
+                       dimension is rejected rather than failing every upsert.
+        """
+        from pinecone import Pinecone, ServerlessSpec
+
+        if not PINECONE_API_KEY or not PINECONE_ENVIRONMENT:
+            raise ValueError("PINECONE_API_KEY and PINECONE_ENVIRONMENT must be set.")
+
+        logger.info("Initializing Pinecone connection...")
+        self.pc = Pinecone(api_key=PINECONE_API_KEY)
+        self.index_name = index_name
+
+        if index_name not in self.pc.list_indexes().names():
+            if dimension is None:
+                raise ValueError(f"Index '{index_name}' does not exist and no dimension was given to create it.")
+            logger.info(f"Index '{index_name}' not found. Creating it with dimension {dimension}...")
+            self.pc.create_index(
+                name=index_name,
+                dimension=dimension,
+                metric='cosine',
+                spec=ServerlessSpec(cloud='aws', region=PINECONE_ENVIRONMENT)
+            )
+            logger.info(f"Index '{index_name}' created successfully.")
+        else:
+            existing = self.pc.describe_index(index_name).dimension
+            if dimension is not None and existing != dimension:
+                raise ValueError(
+                    f"Index '{index_name}' has dimension {existing}, but the embedding model produces {dimension}; "
+                    "run a blue/green reindex to switch models."
+                )
+            logger.info(f"Found existing index '{index_name}'.")
+
+        self.index = self.pc.Index(index_name)
+
+    def upsert(self, vectors: list[dict], namespace: Optional[str] = None):
+        return self.index.upsert(vectors=vectors, namespace=namespace or "")
+
+    def upsert_batch(self, batch: VectorBatch, namespace: Optional[str] = None):
+        """
+        Upserts a VectorBatch as (id, values, metadata) tuples.
+
+        The REST client only takes the values as Python float lists (it
+        validates and JSON-encodes them itself), so each request's slice of
+        the matrix is still boxed here, converted in one tolist() call; the
+        batch stays an array until then, and float32 is the only encoding
+        this store accepts.
+        """
+        vectors = list(zip(batch.ids, batch.float32_values().tolist(), batch.payload_metadata()))
+        return self.index.upsert(vectors=vectors, namespace=namespace or "")
+
+    def request_bytes(self, batch: VectorBatch) -> np.ndarray:
+        # The REST client sends JSON, which Pinecone's 2 MB request limit applies to.
+        return batch.json_bytes()
+
+    def fetch(self, ids: list[str], namespace: Optional[str] = None):
+        return self.index.fetch(ids=ids, namespace=namespace or "")
+
+    def delete(self, ids: list[str], namespace: Optional[str] = None):
+        return self.index.delete(ids=ids, namespace=namespace or "")
+
+    def list_ids(self, prefix=None, page_size=1000, namespace=None):
+        # Listing is only available on serverless indexes; ids come back sorted.
+        for ids in self.index.list(prefix=prefix, limit=page_size, namespace=namespace or ""):
+            yield list(ids)
+
+    def query(self, vector, top_k=10, include_values=False, include_metadata=True, filter=None, namespace=None):
+        return self.index.query(
+            vector=vector,
+            top_k=top_k,
+            include_values=include_values,
+            include_metadata=include_metadata,
+            filter=filter,
+            namespace=namespace or "",
+        )
+
+    def describe_index_stats(self):
+        return self.index.describe_index_stats()
+
+def _matches_filter(metadata: dict, filter: dict) -> bool:
+    """
+    Evaluates a Pinecone-style metadata filter ($eq, $ne, $in, $nin, $gt,
+    $gte, $lt, $lte, $and, $or). List-valued metadata matches $eq/$in if any
+    element matches.
+    """
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(_matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(_matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        value = metadata.get(key)
+        values = value if isinstance(value, list) else [value]
+        for op, expected in condition.items():
+            if op == "$eq":
+                ok = expected in values
+            elif op == "$ne":
+                ok = expected not in values
+            elif op == "$in":
+                ok = any(v in expected for v in values)
+            elif op == "$nin":
+                ok = not any(v in expected for v in values)
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                if not isinstance(value, (int, float)) or isinstance(value, bool):
+                    return False
+                ok = {
+                    "$gt": value > expected,
+                    "$gte": value >= expected,
+                    "$lt": value < expected,
+                    "$lte": value <= expected,
+                }[op]
+            else:
+                raise ValueError(f"Unsupported filter operator '{op}'.")
+            if not ok:
+                return False
+    return True
+
+class LocalStore(VectorStore):
+    """
+    A local VectorStore for load tests and CI.
+
+    Vectors live in a memory-mapped float32 matrix (``vectors.f32``); a SQLite
+    table maps each id to its row and metadata. Deleted rows are reused by
+    later upserts. Queries are answered with a single vectorized cosine
+    similarity over the matrix. Namespaces are not supported.
+    """
+    _GROWTH_ROWS = 4096
+
+    def __init__(self, directory: str = LOCAL_STORE_DIR, dimension: Optional[int] = None):
+        """
+        Opens (or creates) the store in the given directory.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._lock = threading.RLock()
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS vectors (
+                id TEXT PRIMARY KEY,
+                row INTEGER NOT NULL UNIQUE,
+                metadata TEXT
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            """
+        )
+        stored = dict(self._conn.execute("SELECT name, value FROM meta").fetchall())
+        self.dimension = stored.get("dimension", dimension)
+        if dimension is not None and self.dimension != dimension:
+            raise ValueError(f"Local store at '{directory}' has dimension {self.dimension}, not {dimension}.")
+        if "dimension" not in stored and dimension is not None:
+            self._conn.execute("INSERT INTO meta (name, value) VALUES ('dimension', ?)", (dimension,))
+            self._conn.commit()
+
+        self._row_of = {}
+        self._metadata = {}
+        for id_, row, metadata in self._conn.execute("SELECT id, row, metadata FROM vectors"):
+            self._row_of[id_] = row
+            self._metadata[id_] = json.loads(metadata) if metadata else {}
+
+        self._vectors = None
+        self._live = np.zeros(0, dtype=bool)
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._ids = []
+        if self.dimension is not None:
+            self._open_vectors(max(self._row_of.values(), default=-1) + 1)
+        logger.info(f"Opened local vector store at '{directory}' with {len(self._row_of)} vectors.")
+
+    def _open_vectors(self, min_rows: int):
+        """
+        Maps the vector file, growing it to hold at least ``min_rows`` rows,
+        and rebuilds the in-memory row bookkeeping.
+        """
+        row_bytes = self.dimension * 4
+        rows = os.path.getsize(self._vectors_path) // row_bytes if os.path.exists(self._vectors_path) else 0
+        if rows < min_rows or not os.path.exists(self._vectors_path):
+            rows = max(min_rows, rows + self._GROWTH_ROWS, rows * 2)
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(rows * row_bytes)
+        if self._vectors is not None:
+            self._vectors.flush()
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dimension))
+
+        self._ids = [None] * rows
+        self._live = np.zeros(rows, dtype=bool)
+        for id_, row in self._row_of.items():
+            self._ids[row] = id_
+            self._live[row] = True
+        self._norms = np.linalg.norm(self._vectors, axis=1).astype(np.float32)
+
+    def upsert(self, vectors: list[dict], namespace: Optional[str] = None):
+        if not vectors:
+            return {"upserted_count": 0}
+        return self._upsert_arrays(
+            [vector["id"] for vector in vectors],
+            np.asarray([vector["values"] for vector in vectors], dtype=np.float32),
+            [vector.get("metadata") or {} for vector in vectors],
+        )
+
+    def upsert_batch(self, batch: VectorBatch, namespace: Optional[str] = None):
+        if not len(batch):
+            return {"upserted_count": 0}
+        return self._upsert_arrays(batch.ids, batch.float32_values(), batch.payload_metadata())
+
+    def _upsert_arrays(self, ids: list[str], values: np.ndarray, metadata: list[dict]):
+        """
+        Writes an (n, dimension) float32 matrix of vectors into the store. An
+        id that appears more than once keeps its last vector.
+        """
+        last_position = {id_: position for position, id_ in enumerate(ids)}
+        if len(last_position) < len(ids):
+            keep = sorted(last_position.values())
+            ids = [ids[position] for position in keep]
+            values = values[keep]
+            metadata = [metadata[position] for position in keep]
+
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = values.shape[1]
+                self._conn.execute("INSERT INTO meta (name, value) VALUES ('dimension', ?)", (self.dimension,))
+                self._open_vectors(len(ids))
+
+            if values.shape[1] != self.dimension:
+                raise ValueError(f"Vector dimension {values.shape[1]} does not match store dimension {self.dimension}.")
+
+            new_ids = [id_ for id_ in ids if id_ not in self._row_of]
+            free_rows = list(np.flatnonzero(~self._live)[:len(new_ids)])
+            if len(free_rows) < len(new_ids):
+                self._open_vectors(len(self._ids) + len(new_ids) - len(free_rows))
+                free_rows = list(np.flatnonzero(~self._live)[:len(new_ids)])
+            for id_, row in zip(new_ids, free_rows):
+                self._row_of[id_] = int(row)
+                self._ids[row] = id_
+                self._live[row] = True
+
+            rows = np.array([self._row_of[id_] for id_ in ids])
+            self._vectors[rows] = values
+            self._norms[rows] = np.linalg.norm(values, axis=1)
+            self._metadata.update(zip(ids, metadata))
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (id, row, metadata) VALUES (?, ?, ?)",
+                [(id_, self._row_of[id_], json.dumps(vector_metadata)) for id_, vector_metadata in zip(ids, metadata)],
+            )
+            self._vectors.flush()
+            self._conn.commit()
+        return {"upserted_count": len(ids)}
+
+    def fetch(self, ids: list[str], namespace: Optional[str] = None):
+        with self._lock:
+            return {
+                "vectors": {
+                    id_: {
+                        "id": id_,
+                        "values": self._vectors[self._row_of[id_]].tolist(),
+                        "metadata": self._metadata[id_],
+                    }
+                    for id_ in ids if id_ in self._row_of
+                }
+            }
+
+    def delete(self, ids: list[str], namespace: Optional[str] = None):
+        with self._lock:
+            deleted = [id_ for id_ in ids if id_ in self._row_of]
+            for id_ in deleted:
+                row = self._row_of.pop(id_)
+                self._metadata.pop(id_, None)
+                self._ids[row] = None
+                self._live[row] = False
+            self._conn.executemany("DELETE FROM vectors WHERE id = ?", [(id_,) for id_ in deleted])
+            self._conn.commit()
+        return {}
+
+    def list_ids(self, prefix=None, page_size=1000, namespace=None):
+        # SQLite compares TEXT bytewise, which matches Python's str ordering for these ids.
+        last_id = ""
+        while True:
+            with self._lock:
+                page = [
+                    id_ for (id_,) in self._conn.execute(
+                        "SELECT id FROM vectors WHERE id > ? AND substr(id, 1, ?) = ? ORDER BY id LIMIT ?",
+                        (last_id, len(prefix or ""), prefix or "", page_size),
+                    )
+                ]
+            if not page:
+                return
+            yield page
+            last_id = page[-1]
+
+    def query(self, vector, top_k=10, include_values=False, include_metadata=True, filter=None, namespace=None):
+        with self._lock:
+            if not self._row_of:
+                return {"matches": []}
+
+            query = np.asarray(vector, dtype=np.float32)
+            query_norm = np.linalg.norm(query) or 1.0
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scores = (self._vectors @ query) / (self._norms * query_norm)
+            scores = np.where(self._live, np.nan_to_num(scores, nan=0.0), -np.inf)
+
+            if filter is None:
+                candidates = np.argpartition(-scores, min(top_k, len(scores) - 1))[:top_k]
+                candidates = candidates[np.argsort(-scores[candidates])]
+            else:
+                candidates = np.argsort(-scores)
+
+            matches = []
+            for row in candidates:
+                if not self._live[row]:
+                    break
+                id_ = self._ids[row]
+                if filter is not None and not _matches_filter(self._metadata[id_], filter):
+                    continue
+                match = {"id": id_, "score": float(scores[row])}
+                if include_values:
+                    match["values"] = self._vectors[row].tolist()
+                if include_metadata:
+                    match["metadata"] = self._metadata[id_]
+                matches.append(match)
+                if len(matches) >= top_k:
+                    break
+            return {"matches": matches}
+
+    def describe_index_stats(self):
+        with self._lock:
+            return {
+                "dimension": self.dimension or 0,
+                "total_vector_count": len(self._row_of),
+                "namespaces": {"": {"vector_count": len(self._row_of)}},
+            }
+
+    def close(self):
+        """
+        Flushes the vector file and closes the index.
+        """
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._conn.close()
+
+def get_vector_store(
+    backend: str = VECTOR_BACKEND, index: Optional[str] = None, dimension: Optional[int] = None
+) -> VectorStore:
+    """
+    Returns the vector store selected by VECTOR_BACKEND ("pinecone" or "local").
+
+    Args:
+        backend: "pinecone" or "local".
+        index: The Pinecone index name or local store directory. Defaults to
+               the index the alias (INDEX_ALIAS_PATH) points to, if any, then
+               PINECONE_INDEX_NAME / LOCAL_STORE_DIR.
+        dimension: The embedding dimension, used to create a missing index and
+                   to reject one built for another model.
+    """
+    if index is None and INDEX_ALIAS.get("backend") == backend:
+        index = INDEX_ALIAS["index"]
+    if backend == "pinecone":
+        return PineconeStore(index or PINECONE_INDEX_NAME, dimension)
+    if backend == "local":
+        return LocalStore(index or LOCAL_STORE_DIR, dimension)
+    raise ValueError(f"Unknown vector backend '{backend}'.")
@@ -0,0 +1,168 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, TextIO
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from . import extractor, models
+from .chunking import chunk_id, package_key
+from .config import EMBEDDING_MODEL_NAME, CHUNK_TOKENS, QUERY_SERVICE_URL
+from .vector_store import VectorStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Vector ids per fetch request; Pinecone passes them in the URL, so keep it modest.
+FETCH_SIZE = 200
+
+# Number of missing or stale ids kept in the report summary.
+_SAMPLE_SIZE = 20
+
+@dataclass
+class VerifyReport:
+    """
+    The outcome of one verification pass.
+    """
+    packages: int = 0
+    scanned: int = 0
+    indexed: int = 0
+    missing: int = 0
+    stale_model: int = 0
+    vectors_in_index: int = 0
+    missing_sample: list[str] = field(default_factory=list)
+    stale_sample: list[str] = field(default_factory=list)
+
+def count_packages(db: Session) -> int:
+    """
+    Counts the packages with a server-side COUNT, without loading rows.
+    """
+    return db.scalar(select(func.count()).select_from(models.Package))
+
+def _search(store: VectorStore, query: str, top_k: int) -> list[dict]:
+    """
+    Runs a sample semantic search, through the query service when
+    QUERY_SERVICE_URL is set, otherwise with a locally loaded model.
+    """
+    from .query_service import QueryService, search_remote
+
+    if QUERY_SERVICE_URL:
+        return search_remote(QUERY_SERVICE_URL, query, top_k=top_k)["matches"]
+    service = QueryService(store=store, fanout_workers=1)
+    try:
+        return service.search(query, top_k=top_k)["matches"]
+    finally:
+        service.close()
+
+def verify_index(
+    db: Session,
+    store: VectorStore,
+    out: TextIO,
+    batch_size: int = 100,
+    fetch_size: int = FETCH_SIZE,
+    model_version: str = EMBEDDING_MODEL_NAME,
+    chunked: bool = CHUNK_TOKENS > 0,
+    query: Optional[str] = None,
+    top_k: int = 10,
+    preview_chars: int = 200,
+) -> VerifyReport:
+    """
+    Checks that every package in MySQL has a vector in the index and writes
+    a per-package report.
+
+    Packages are streamed in id order, ``batch_size`` at a time, and each
+    batch's vectors are fetched by id, so memory stays bounded however large
+    the catalog is. Every package's text is built once, and report lines are
+    written (and flushed) as each batch completes.
+
+    Args:
+        db: The SQLAlchemy database session.
+        store: The vector store to verify.
+        out: Where the report is written.
+        batch_size: Packages read per query.
+        fetch_size: Vector ids per fetch request.
+        model_version: Vectors whose metadata names another model are
+                       reported as stale.
+        chunked: Expect chunk vectors ("<package id>#0") instead of one vector
+                 per package.
+        query: If given, also run this semantic search and list its matches
+               with their source packages.
+        top_k: Matches listed for ``query``.
+        preview_chars: Characters of each package's text in the report.
+
+    Returns:
+        A VerifyReport.
+    """
+    report = VerifyReport(packages=count_packages(db))
+    stats = store.describe_index_stats()
+    report.vectors_in_index = stats["total_vector_count"]
+
+    out.write("VERIFICATION REPORT: Database vs vector index\n")
+    out.write("=" * 60 + "\n")
+    out.write(f"Packages in MySQL: {report.packages}\n")
+    out.write(f"Vectors in index: {report.vectors_in_index} (dimension {stats['dimension']})\n\n")
+    out.write("PACKAGES:\n" + "-" * 30 + "\n")
+
+    for records in extractor.iter_record_batches(db, batch_size):
+        vector_ids = {record.id: chunk_id(record.id, 0) if chunked else str(record.id) for record in records}
+        ids = list(vector_ids.values())
+        vectors = {}
+        for i in range(0, len(ids), fetch_size):
+            vectors.update(store.fetch(ids[i:i + fetch_size])["vectors"])
+
+        lines = []
+        for record in records:
+            text = record.to_text()
+            vector = vectors.get(vector_ids[record.id])
+            stored_model = (vector.get("metadata") or {}).get("model_version") if vector is not None else None
+            if vector is None:
+                status = "MISSING"
+                report.missing += 1
+                if len(report.missing_sample) < _SAMPLE_SIZE:
+                    report.missing_sample.append(str(record.id))
+            elif stored_model != model_version:
+                status = f"stale model ({stored_model})"
+                report.stale_model += 1
+                if len(report.stale_sample) < _SAMPLE_SIZE:
+                    report.stale_sample.append(str(record.id))
+            else:
+                status = "ok"
+                report.indexed += 1
+            preview = text[:preview_chars].replace("\n", " | ")
+            lines.append(
+                f"Package {record.id}: {record.name}\n"
+                f"  Vector: {status}\n"
+                f"  Text ({len(text)} chars): {preview}{'...' if len(text) > preview_chars else ''}\n"
+            )
+        report.scanned += len(records)
+        out.write("".join(lines))
+        out.flush()
+        logger.info(f"Verified {report.scanned}/{report.packages} packages ({report.missing} missing).")
+
+    if query:
+        out.write(f"\nQUERY RESULTS for '{query}':\n" + "-" * 30 + "\n")
+        matches = _search(store, query, top_k)
+        keys = [package_key(match["id"]) for match in matches]
+        # Look the matched packages up by id in one query.
+        match_ids = {int(key) for key in keys if key.isdigit()}
+        packages = {
+            str(package.id): package
+            for package in extractor._package_query(db).filter(models.Package.id.in_(match_ids))
+        } if match_ids else {}
+        for i, (match, key) in enumerate(zip(matches, keys)):
+            out.write(f"Result {i+1}: ID: {match['id']}  Score: {match['score']:.4f}\n")
+            out.write(f"  Metadata: {match.get('metadata')}\n")
+            package = packages.get(key)
+            if package is None:
+                out.write("  Source package: not found in MySQL\n")
+            else:
+                text = package.to_text()
+                preview = text[:preview_chars].replace("\n", " | ")
+                out.write(f"  Source Text Length: {len(text)} characters\n")
+                out.write(f"  Source Text Preview: {preview}...\n")
+
+    out.write("\n" + "=" * 60 + "\nSUMMARY:\n" + "-" * 30 + "\n")
+    out.write(f"Packages scanned: {report.scanned} of {report.packages}\n")
+    out.write(f"Indexed with {model_version}: {report.indexed}\n")
+    out.write(f"Missing from the index: {report.missing}{' (e.g. ' + ', '.join(report.missing_sample) + ')' if report.missing_sample else ''}\n")
+    out.write(f"Embedded with another model: {report.stale_model}{' (e.g. ' + ', '.join(report.stale_sample) + ')' if report.stale_sample else ''}\n")
+    out.flush()
+    return report
@@ -0,0 +1,28 @@
+import argparse
+import logging
+from pipeline.database import get_db_session
+from pipeline.deletes import propagate_deletes
+from pipeline.manifest import EmbeddingManifest
+from pipeline.vector_store import get_vector_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete vectors whose package no longer exists in MySQL.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted.")
+    parser.add_argument("--page-size", type=int, default=1000, help="Vector ids listed per request.")
+    args = parser.parse_args()
+
+    db = next(get_db_session(read_only=True))
+    manifest = EmbeddingManifest()
+    try:
+        report = propagate_deletes(db, get_vector_store(), dry_run=args.dry_run, manifest=manifest, page_size=args.page_size)
+    finally:
+        manifest.close()
+        db.close()
+
+    print(f"Scanned {report.vectors_scanned} vectors; {report.orphaned} have no package in MySQL.")
+    if report.sample:
+        print(f"Examples: {', '.join(report.sample)}")
+    print(f"{'Would delete' if report.dry_run else 'Deleted'} {report.orphaned if report.dry_run else report.deleted} vectors.")
@@ -0,0 +1,141 @@
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from pipeline.config import (
+    VECTOR_BACKEND, EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND, INDEX_ALIAS_PATH, INDEX_ALIAS_POLL_SECONDS, MANIFEST_PATH,
+    CHECKPOINT_PATH, RUN_SUMMARY_PATH,
+)
+from pipeline.reindex import detect_dimension, env_model_change, live_index, new_index_name, retire_index, switch_alias
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+def _state_path(path: str, index: str) -> str:
+    """
+    Returns the per-index variant of a state file, e.g.
+    embedding_manifest.ubid-post-agent-202610181200.db.
+    """
+    root, extension = os.path.splitext(path)
+    return f"{root}.{os.path.basename(index.rstrip('/'))}{extension}"
+
+def backfill(index: str, model_name: str, dimension: int, shards: int, workers: int, upsert_concurrency: int) -> dict:
+    """
+    Embeds the whole catalog into ``index`` with a separate pipeline run.
+
+    The run has its own manifest, checkpoint and summary, so the live index's
+    state is untouched and an interrupted backfill resumes where it stopped.
+
+    Returns:
+        The run summary.
+    """
+    summary_path = _state_path(RUN_SUMMARY_PATH or "run_summary.json", index)
+    env = {
+        **os.environ,
+        # The live alias must not redirect the backfill to the index it replaces.
+        "INDEX_ALIAS_PATH": "",
+        "EMBEDDING_MODEL_NAME": model_name,
+        "PINECONE_INDEX_NAME" if VECTOR_BACKEND == "pinecone" else "LOCAL_STORE_DIR": index,
+        "MANIFEST_PATH": _state_path(MANIFEST_PATH, index),
+        "CHECKPOINT_PATH": _state_path(CHECKPOINT_PATH, index),
+        "RUN_SUMMARY_PATH": summary_path,
+        "PROPAGATE_DELETES": "off",
+        # Nothing is serving from the new index yet, so run at full throughput.
+        "PIPELINE_MODE": "pipelined",
+        "EXTRACTION_SHARDS": str(shards),
+        "DB_POOL_SIZE": str(max(int(os.getenv("DB_POOL_SIZE", 5)), shards + 1)),
+        "EMBEDDING_WORKERS": str(workers),
+        "UPSERT_CONCURRENCY": str(upsert_concurrency),
+    }
+    logger.info(f"Backfilling '{index}' with {model_name} (dimension {dimension})...")
+    completed = subprocess.run([sys.executable, MAIN], env=env)
+    if completed.returncode != 0 or not os.path.exists(summary_path):
+        raise RuntimeError(f"The backfill run into '{index}' exited with {completed.returncode}.")
+    with open(summary_path) as f:
+        return json.load(f)
+
+def reindex(
+    model_name: str = EMBEDDING_MODEL_NAME,
+    target: str = None,
+    shards: int = 4,
+    workers: int = 0,
+    upsert_concurrency: int = 16,
+    switch: bool = True,
+    retire: bool = False,
+) -> dict:
+    """
+    Rebuilds the index for ``model_name`` next to the live one and switches
+    the alias to it.
+
+    The live index keeps serving throughout: the model's output dimension is
+    detected, a new index is created with it and backfilled, then a second,
+    incremental pass picks up packages that changed during the backfill.
+    Only then is the alias switched, after which the pipeline and the query
+    service use the new index.
+
+    Args:
+        model_name: The embedding model to reindex with.
+        target: The new index name (or local directory); defaults to a
+                timestamped one. Pass the same target to resume a backfill.
+        shards, workers, upsert_concurrency: Extraction shards, embedding
+            worker processes and upserts in flight for the backfill.
+        switch: Switch the alias once the backfill completes.
+        retire: Delete the previous index after switching.
+
+    Returns:
+        The alias (after a switch) or the backfill summary.
+    """
+    previous = live_index(VECTOR_BACKEND, INDEX_ALIAS_PATH)
+    target = target or new_index_name(VECTOR_BACKEND)
+    if target == previous:
+        raise ValueError(f"'{target}' is the live index; reindex into a new one.")
+
+    dimension = detect_dimension(model_name, EMBEDDING_BACKEND)
+    summary = {}
+    for attempt in ("backfill", "catch-up"):
+        summary = backfill(target, model_name, dimension, shards, workers, upsert_concurrency)
+        if summary.get("status") != "completed":
+            raise RuntimeError(f"The {attempt} run into '{target}' did not complete: {summary}")
+        logger.info(f"{attempt.capitalize()} embedded {summary.get('embedded')} packages, skipped {summary.get('skipped')}.")
+    if not switch:
+        logger.info(f"'{target}' is ready; run again with --target {target} to switch to it.")
+        return summary
+
+    alias = switch_alias(
+        VECTOR_BACKEND, target, model_name, dimension,
+        manifest_path=_state_path(MANIFEST_PATH, target), live_manifest_path=MANIFEST_PATH, path=INDEX_ALIAS_PATH,
+    )
+    change = env_model_change(model_name)
+    if change:
+        print(change)
+    if retire:
+        # Give running query services a couple of alias polls to move off the old index.
+        time.sleep(2 * INDEX_ALIAS_POLL_SECONDS)
+        retire_index(VECTOR_BACKEND, previous)
+    return alias
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blue/green reindex: backfill a new index, then switch the alias to it.")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME, help="Embedding model for the new index.")
+    parser.add_argument("--target", help="New index name or local directory (default: timestamped). Reuse it to resume.")
+    parser.add_argument("--shards", type=int, default=4, help="Extraction shards for the backfill.")
+    parser.add_argument("--workers", type=int, default=0, help="Embedding worker processes for the backfill.")
+    parser.add_argument("--upsert-concurrency", type=int, default=16, help="Upserts in flight for the backfill.")
+    parser.add_argument("--no-switch", action="store_true", help="Backfill only; leave the alias on the live index.")
+    parser.add_argument("--retire", action="store_true", help="Delete the previous index after switching.")
+    args = parser.parse_args()
+
+    reindex(
+        model_name=args.model,
+        target=args.target,
+        shards=args.shards,
+        workers=args.workers,
+        upsert_concurrency=args.upsert_concurrency,
+        switch=not args.no_switch,
+        retire=args.retire,
+    )
@@ -0,0 +1,23 @@
+import argparse
+import logging
+from pipeline.config import QUERY_SERVICE_HOST, QUERY_SERVICE_PORT
+from pipeline.query_service import QueryService, serve
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the resident semantic search service.")
+    parser.add_argument("--host", default=QUERY_SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=QUERY_SERVICE_PORT)
+    args = parser.parse_args()
+
+    service = QueryService()
+    server = serve(service, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down the query service.")
+    finally:
+        server.server_close()
+        service.close()
@@ -0,0 +1,22 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from pipeline.synthetic import populate_synthetic_catalog
+
+@pytest.fixture
+def engine():
+    """
+    An in-memory SQLite catalog of 250 synthetic packages, shared by every
+    session (StaticPool keeps the single connection alive).
+    """
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    populate_synthetic_catalog(engine, 250, text_profile="short")
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
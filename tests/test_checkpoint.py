@@ -0,0 +1,49 @@
+from pipeline.checkpoint import CheckpointStore
+
+def test_pending_ranges_after_out_of_order_commits(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoint.db"))
+    store.start_run("full")
+    assert store.pending_ranges() == [(0, None)]
+
+    store.commit_batch(100, 200, records=100)
+    store.commit_batch(300, 400, records=100)
+    assert store.watermark == 0
+    assert store.pending_ranges() == [(0, 100), (200, 300), (400, None)]
+
+    store.commit_batch(0, 100, records=100)
+    assert store.watermark == 200
+    assert store.pending_ranges() == [(200, 300), (400, None)]
+    store.close()
+
+def test_resume_skips_committed_batches_and_retries_failed_ones(tmp_path):
+    path = str(tmp_path / "checkpoint.db")
+    store = CheckpointStore(path)
+    run_id = store.start_run("full")
+    store.commit_batch(0, 100, records=100, embedded=100)
+    store.commit_batch(100, 200, records=100, embedded=90, failed=10)
+    store.commit_batch(200, 300, records=100, embedded=100)
+    store.close()
+
+    store = CheckpointStore(path)
+    assert store.start_run("full") == run_id
+    assert store.watermark == 100
+    assert store.pending_ranges() == [(100, 200), (300, None)]
+
+    store.commit_batch(100, 200, records=100, embedded=10)
+    assert store.pending_ranges() == [(300, None)]
+    store.finish_run("completed")
+    store.close()
+
+    store = CheckpointStore(path)
+    assert store.start_run("full") != run_id
+    assert store.pending_ranges() == [(0, None)]
+    store.close()
+
+def test_start_run_without_resume_starts_over(tmp_path):
+    path = str(tmp_path / "checkpoint.db")
+    store = CheckpointStore(path)
+    run_id = store.start_run("full")
+    store.commit_batch(0, 100, records=100)
+    assert store.start_run("full", resume=False) != run_id
+    assert store.pending_ranges() == [(0, None)]
+    store.close()
@@ -0,0 +1,31 @@
+from pipeline.backends import model_key
+from pipeline.chunking import chunk_id, manifest_key, package_key, stale_vector_ids
+
+def test_model_key_separates_backends():
+    assert model_key("all-MiniLM-L6-v2", "torch") == "all-MiniLM-L6-v2"
+    assert model_key("all-MiniLM-L6-v2", "int8") == "all-MiniLM-L6-v2@int8"
+    assert model_key("all-MiniLM-L6-v2", "onnx", "avx2") == "all-MiniLM-L6-v2@onnx"
+    assert model_key("all-MiniLM-L6-v2", "onnx-int8", "avx2") == "all-MiniLM-L6-v2@onnx-int8-avx2"
+    assert model_key("all-MiniLM-L6-v2", "onnx-int8", "avx2") != model_key("all-MiniLM-L6-v2", "onnx-int8", "avx512_vnni")
+
+def test_manifest_key_includes_chunking_and_backend():
+    assert manifest_key("m", 0, 0, "torch") == "m"
+    assert manifest_key("m", 0, 32, "int8") == "m@int8"
+    assert manifest_key("m", 64, 32, "torch") == "m#chunks=64/32"
+    assert manifest_key("m", 64, 32, "onnx-int8", "avx512_vnni") == "m@onnx-int8-avx512_vnni#chunks=64/32"
+    assert manifest_key("m", 64, 16, "torch") != manifest_key("m", 64, 32, "torch")
+
+def test_chunk_ids():
+    assert chunk_id(42, 3) == "42#3"
+    assert package_key("42#3") == "42"
+    assert package_key("42") == "42"
+    # Chunk ids list right after their package and before the next id sharing its prefix.
+    assert sorted(["420", "42#1", "42", "42#0"]) == ["42", "42#0", "42#1", "420"]
+
+def test_stale_vector_ids():
+    assert stale_vector_ids(7, None, 3) == []
+    assert stale_vector_ids(7, 0, 0) == []
+    assert stale_vector_ids(7, 0, 2) == ["7"]
+    assert stale_vector_ids(7, 4, 2) == ["7#2", "7#3"]
+    assert stale_vector_ids(7, 2, 4) == []
+    assert stale_vector_ids(7, 2, 0) == ["7#0", "7#1"]
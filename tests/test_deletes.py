@@ -0,0 +1,41 @@
+from sqlalchemy import delete
+from pipeline import models
+from pipeline.chunking import chunk_id
+from pipeline.deletes import find_orphaned_ids, propagate_deletes
+from pipeline.fake_index import FakeIndex
+from pipeline.manifest import EmbeddingManifest
+
+def load_index(ids: list[str]) -> FakeIndex:
+    index = FakeIndex()
+    index.upsert([{"id": id_, "values": [1.0, 0.0], "metadata": {}} for id_ in ids])
+    return index
+
+def test_find_orphaned_ids_merges_string_ordered_streams():
+    live = sorted(["1", "10", "2", "20"])
+    vectors = sorted(["1", "10#0", "10#1", "11", "2", "3#0", "30"])
+    assert list(find_orphaned_ids(live, vectors)) == ["11", "3#0", "30"]
+
+def test_propagate_deletes_removes_vectors_of_deleted_packages(db, tmp_path):
+    vector_ids = [str(i) for i in range(1, 201)] + [chunk_id(i, n) for i in range(201, 251) for n in range(2)]
+    index = load_index(vector_ids + ["9999", "9999#0"])
+    manifest = EmbeddingManifest(str(tmp_path / "manifest.db"), "test-model")
+    manifest.commit({i: "hash" for i in (3, 150, 210, 9999)}, {3: 0, 150: 0, 210: 2, 9999: 1})
+
+    removed = [3, 30, 150, 210]
+    db.execute(delete(models.Package).where(models.Package.id.in_(removed)))
+    db.commit()
+
+    report = propagate_deletes(db, index, dry_run=True, page_size=37)
+    assert report.orphaned == 7
+    assert report.deleted == 0
+    assert len(index.vectors) == len(vector_ids) + 2
+
+    report = propagate_deletes(db, index, manifest=manifest, page_size=37, delete_batch_size=3)
+    expected = {"3", "30", "150", "210#0", "210#1", "9999", "9999#0"}
+    assert report.vectors_scanned == len(vector_ids) + 2
+    assert report.deleted == len(expected)
+    assert set(index.vectors) == set(vector_ids) - expected
+    assert manifest.chunk_counts([3, 150, 210, 9999]) == {}
+
+    assert propagate_deletes(db, index).orphaned == 0
+    manifest.close()
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.orm import sessionmaker
+from pipeline import extractor, models
+
+def test_get_records_to_update_pages_by_primary_key(db):
+    first = extractor.get_records_to_update(db, 100)
+    assert [record.id for record in first] == list(range(1, 101))
+    window = extractor.get_records_to_update(db, 100, after_id=120, until_id=130)
+    assert [record.id for record in window] == list(range(121, 131))
+
+@pytest.mark.parametrize("mode", ["orm", "core"])
+def test_iter_record_batches_reads_every_package_once(db, mode):
+    db.execute(delete(models.Package).where(models.Package.id.in_([5, 6, 7, 150])))
+    db.commit()
+    live_ids = db.scalars(select(models.Package.id).order_by(models.Package.id)).all()
+
+    batches = list(extractor.iter_record_batches(db, 64, mode=mode))
+    assert [record.id for batch in batches for record in batch] == live_ids
+    # Batches chain exactly, so the checkpoint can track them.
+    assert batches[0].after_id == 0
+    for previous, batch in zip(batches, batches[1:]):
+        assert batch.after_id == previous.until_id
+    assert batches[-1].until_id == live_ids[-1]
+
+def test_core_and_orm_records_render_the_same_text(db):
+    orm = extractor.get_records_to_update(db, 20)
+    core = extractor.get_package_rows(db, 20)
+    assert [record.to_text() for record in core] == [record.to_text() for record in orm]
+
+def test_iter_range_batches_reads_only_the_given_ranges(db):
+    batches = list(extractor.iter_range_batches(db, 30, [(0, 50), (100, 150), (240, None)]))
+    ids = [record.id for batch in batches for record in batch]
+    assert ids == list(range(1, 51)) + list(range(101, 151)) + list(range(241, 251))
+    # A range's last batch covers it up to its until_id.
+    assert (batches[1].after_id, batches[1].until_id) == (30, 50)
+
+def test_sharded_batches_cover_the_table(engine, db):
+    factory = sessionmaker(bind=engine)
+    ranges = extractor.get_id_ranges(db, 4)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 250
+    for (_, until_id), (after_id, _) in zip(ranges, ranges[1:]):
+        assert until_id == after_id
+
+    ids = [
+        record.id
+        for batch in extractor.iter_sharded_record_batches(factory, 25, shards=4, mode="core")
+        for record in batch
+    ]
+    assert sorted(ids) == list(range(1, 251))
@@ -0,0 +1,87 @@
+import numpy as np
+from pipeline.fake_index import FakeIndex, FakeIndexError
+from pipeline.loader import Loader, UpsertTuner, is_transient_error, pack_requests
+from pipeline.vector_batch import VectorBatch
+
+def make_batch(n: int, dimension: int = 8, detail: str = "x") -> VectorBatch:
+    rng = np.random.default_rng(0)
+    return VectorBatch(
+        [str(i) for i in range(1, n + 1)],
+        rng.standard_normal((n, dimension)),
+        [{"detail": detail} for _ in range(n)],
+        "test-model",
+    )
+
+def test_pack_requests_respects_byte_and_count_limits():
+    sizes = np.array([40, 40, 40, 100, 10, 10, 10, 10])
+    spans = pack_requests(sizes, max_bytes=90, max_vectors=3)
+    assert spans == [(0, 2), (2, 3), (3, 4), (4, 7), (7, 8)]
+
+def test_pack_requests_sends_oversized_vector_alone():
+    assert pack_requests(np.array([500, 10, 10]), max_bytes=100, max_vectors=10) == [(0, 1), (1, 3)]
+    assert pack_requests(np.array([], dtype=np.int64), max_bytes=100, max_vectors=10) == []
+
+def test_upsert_tuner_increases_additively_and_decreases_multiplicatively():
+    tuner = UpsertTuner(max_bytes=1000, min_bytes=100, target_latency=1.0)
+    assert tuner.target_bytes == 1000
+
+    tuner.throttled()
+    assert tuner.target_bytes == 500
+    tuner.succeeded(latency=2.0)
+    assert tuner.target_bytes == 375
+    tuner.succeeded(latency=0.1)
+    assert tuner.target_bytes == 475
+
+    for _ in range(10):
+        tuner.throttled()
+    assert tuner.target_bytes == 100
+    for _ in range(20):
+        tuner.succeeded(latency=0.1)
+    assert tuner.target_bytes == 1000
+
+def test_upsert_tuner_too_large_lowers_the_ceiling():
+    tuner = UpsertTuner(max_bytes=1000, min_bytes=100, target_latency=1.0)
+    tuner.too_large(800)
+    assert tuner.max_bytes == 720
+    assert tuner.target_bytes == 500
+    for _ in range(10):
+        tuner.succeeded(latency=0.1)
+    assert tuner.target_bytes == 720
+
+    tuner.too_large(50)
+    assert tuner.max_bytes == 100
+
+def test_is_transient_error():
+    assert is_transient_error(FakeIndexError(429, "Too Many Requests"))
+    assert is_transient_error(FakeIndexError(503, "Service Unavailable"))
+    assert not is_transient_error(FakeIndexError(400, "Bad Request"))
+    assert is_transient_error(ConnectionError())
+    assert not is_transient_error(ValueError())
+
+def test_loader_splits_requests_the_index_rejects_as_too_large():
+    index = FakeIndex(max_request_bytes=4000)
+    # The tuner starts far above the index's limit, so the first requests get a 413.
+    loader = Loader(index=index, concurrency=2, tuner=UpsertTuner(max_bytes=100000, min_bytes=500))
+    batch = make_batch(60, detail="word " * 40)
+    try:
+        report = loader.upsert_data(batch)
+    finally:
+        loader.close()
+
+    assert report.failed_ids == set()
+    assert report.succeeded_ids == set(batch.ids)
+    assert set(index.vectors) == set(batch.ids)
+    assert len(report.batches) > 1
+    assert loader.tuner.max_bytes < 100000
+
+def test_loader_reports_failed_ids():
+    index = FakeIndex(fail_ids={"7"})
+    loader = Loader(index=index, concurrency=1, max_retries=1, max_batch_size=5)
+    try:
+        report = loader.upsert_data(make_batch(20))
+    finally:
+        loader.close()
+
+    assert report.failed_ids == {"6", "7", "8", "9", "10"}
+    assert len(index.vectors) == 15
+    assert report.retries == 0
@@ -0,0 +1,58 @@
+import json
+import numpy as np
+import pytest
+from pipeline.vector_batch import VectorBatch
+
+@pytest.fixture
+def batch():
+    rng = np.random.default_rng(1)
+    values = rng.standard_normal((50, 32))
+    values /= np.linalg.norm(values, axis=1, keepdims=True)
+    values[3] = 0
+    return VectorBatch(
+        [str(i) for i in range(50)],
+        values,
+        [{"destination": "Paris", "detail": "day trip " * i} for i in range(50)],
+        "test-model",
+    )
+
+def test_int8_round_trip(batch):
+    encoded = batch.astype("int8")
+    assert encoded.dtype == "int8"
+    assert encoded.scales.shape == (50,)
+
+    decoded = encoded.astype("float32")
+    assert decoded.dtype == "float32"
+    # Symmetric quantization is off by at most half a step per component.
+    error = np.abs(decoded.values - batch.values)
+    assert np.all(error <= encoded.scales[:, None] / 2 + 1e-7)
+    assert np.all(decoded.values[3] == 0)
+    nonzero = np.arange(50) != 3
+    cosine = np.sum(decoded.values * batch.values, axis=1)[nonzero] / np.linalg.norm(decoded.values[nonzero], axis=1)
+    assert np.all(cosine > 0.999)
+
+def test_float16_round_trip(batch):
+    decoded = batch.astype("float16").float32_values()
+    np.testing.assert_allclose(decoded, batch.values, atol=1e-3)
+
+def test_astype_rejects_unknown_dtype(batch):
+    with pytest.raises(ValueError):
+        batch.astype("bfloat16")
+    assert batch.astype("float32") is batch
+
+def test_slices_share_values(batch):
+    encoded = batch.astype("int8")
+    part = encoded[10:20]
+    assert part.ids == encoded.ids[10:20]
+    assert np.shares_memory(part.values, encoded.values)
+    np.testing.assert_array_equal(part.scales, encoded.scales[10:20])
+    np.testing.assert_allclose(part.float32_values(), encoded.float32_values()[10:20])
+
+def test_json_bytes_bounds_the_request_body(batch):
+    for vector, estimate in zip(batch.to_vectors(), batch.json_bytes()):
+        assert len(json.dumps(vector)) <= estimate
+
+def test_vector_bytes_shrink_with_the_transport_dtype(batch):
+    float32 = batch.vector_bytes()
+    int8 = batch.astype("int8").vector_bytes()
+    assert np.all(float32 - int8 == 32 * 4 - 32 - 4)